@@ -0,0 +1,38 @@
+"""Add the indexed fields to analyses saved before they were recorded.
+
+    python backfill_analyses.py
+
+Documents written before the history and cache series have no
+created_at, url_hash, host, origin or domain. Until they are backfilled
+they sort after all newer analyses in /v2/history, do not show up in
+/v2/history/{domain} and are never reused by the verdict cache. The time
+comes from each document's ObjectId. Only documents without created_at are
+touched, so the job can be rerun and can run while the API serves traffic.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from dotenv import load_dotenv
+import pathlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv(dotenv_path=pathlib.Path(__file__).parent / ".env")
+
+async def backfill(chunk: int):
+    from services.db import backfill_analyses, ensure_indexes
+    started = time.perf_counter()
+    updated = await backfill_analyses(chunk=chunk)
+    print(f"Backfilled {updated} analyses in {time.perf_counter() - started:.1f}s")
+    await ensure_indexes()
+
+def main():
+    parser = argparse.ArgumentParser(description="Add created_at, url_hash, host, origin and domain to old analyses")
+    parser.add_argument('--chunk', type=int, default=1000, help="documents updated per bulk write")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.chunk))
+
+if __name__ == '__main__':
+    main()
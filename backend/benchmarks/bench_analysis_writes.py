@@ -0,0 +1,129 @@
+"""Benchmark: inline insert_one against the write-behind AnalysisWriter.
+
+Saves --requests analysis documents from --concurrency concurrent
+"requests" and reports how long each request waited on its save, the
+total wall time and the number of Mongo round trips, for both paths and
+both document schemas. The stand-in is a mongomock collection that sleeps
+--rtt-ms per call (a round trip to a nearby mongod); pass --mongo-uri to
+write to a real server instead.
+
+    python benchmarks/bench_analysis_writes.py --requests 2000 --concurrency 50 --rtt-ms 1
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import bson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class StandInCollection:
+    """mongomock collection behind an async API with a per-call delay"""
+
+    def __init__(self, rtt: float):
+        import mongomock
+        self.collection = mongomock.MongoClient()['bench']['analyses']
+        self.rtt = rtt
+        self.round_trips = 0
+
+    async def insert_one(self, doc):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+        return self.collection.insert_one(doc)
+
+    async def insert_many(self, docs, ordered=True):
+        self.round_trips += 1
+        await asyncio.sleep(self.rtt)
+        return self.collection.insert_many(docs, ordered=ordered)
+
+def virustotal_report(rng: random.Random) -> dict:
+    engines = [f"Engine{i:02d}" for i in range(70)]
+    scans = {engine: {'detected': rng.random() < 0.05, 'version': '1.0.%d' % rng.randrange(100),
+                      'result': 'clean site', 'update': '20240601'} for engine in engines}
+    return {'scan_id': '%064x' % rng.getrandbits(256), 'resource': 'https://example.com/',
+            'url': 'https://example.com/', 'response_code': 1, 'scan_date': '2024-06-01 10:00:00',
+            'permalink': 'https://www.virustotal.com/gui/url/%064x' % rng.getrandbits(256),
+            'verbose_msg': 'Scan finished', 'filescan_id': None,
+            'positives': sum(scan['detected'] for scan in scans.values()), 'total': len(scans), 'scans': scans}
+
+def analysis_doc(i: int, rng: random.Random) -> dict:
+    url = f"https://host{i}.example.com/login"
+    return {
+        'url': url, 'url_hash': '%064x' % rng.getrandbits(256), 'host': f"host{i}.example.com",
+        'domain': 'example.com', 'created_at': datetime.utcnow(), 'trust_score': rng.randrange(100),
+        'risk_level': 'LOW', 'rule_pack_version': 'builtin', 'summary': 'Summary sentence. ' * 4,
+        'recommendations': ['Recommendation'] * 3,
+        'details': {
+            'domain_info': {'domain': f"host{i}.example.com", 'virustotal_detections': 0,
+                            'virustotal_details': virustotal_report(rng), 'ssl_details': {'valid': True},
+                            'suspicious_patterns': [], 'probes': {}},
+            'ai_analysis': {'is_phishing': False, 'confidence': 10, 'ai_reasoning': 'Looks fine',
+                            'content_summary': 'Page text ' * 50},
+            'probes': {}, 'pipeline': {'executed': ['lexical', 'reputation', 'ssl', 'virustotal']}
+        }
+    }
+
+async def run_variant(args, write_behind: bool, schema: str) -> dict:
+    os.environ.update(ANALYSIS_WRITE_BEHIND=str(write_behind).lower(), ANALYSIS_SCHEMA=schema)
+    from services.db import AnalysisWriter
+    if args.mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        collection = AsyncIOMotorClient(args.mongo_uri)['bench']['analyses']
+        await collection.drop()
+    else:
+        collection = StandInCollection(args.rtt_ms / 1000)
+    writer = AnalysisWriter(collection)
+    await writer.start()
+
+    rng = random.Random(7)
+    docs = [analysis_doc(i, rng) for i in range(args.requests)]
+    waits = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def request(doc):
+        async with semaphore:
+            started = time.perf_counter()
+            await writer.save(doc)
+            waits.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(request(doc) for doc in docs))
+    await writer.close()
+    wall = time.perf_counter() - started
+    waits.sort()
+    return {
+        'wall_s': wall,
+        'p50_ms': statistics.median(waits) * 1000,
+        'p99_ms': waits[int(len(waits) * 0.99) - 1] * 1000,
+        'round_trips': getattr(collection, 'round_trips', writer.counts['batches'] + writer.counts['inline']),
+        'doc_bytes': len(bson.BSON.encode(_stored(docs[0], schema)))
+    }
+
+def _stored(doc: dict, schema: str) -> dict:
+    from services.db import slim_analysis
+    doc = dict(doc)
+    doc.pop('_id', None)
+    return slim_analysis(doc) if schema == 'slim' else doc
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="stand-in delay per Mongo call")
+    parser.add_argument("--mongo-uri", help="write to this mongod instead of the stand-in")
+    args = parser.parse_args()
+
+    print(f"{'variant':>20} {'wall s':>8} {'wait p50 ms':>12} {'wait p99 ms':>12} {'round trips':>12} {'doc bytes':>10}")
+    for write_behind, schema in ((False, 'full'), (True, 'full'), (True, 'slim')):
+        result = asyncio.run(run_variant(args, write_behind, schema))
+        name = f"{'write-behind' if write_behind else 'inline'} {schema}"
+        print(f"{name:>20} {result['wall_s']:>8.2f} {result['p50_ms']:>12.3f} {result['p99_ms']:>12.3f} "
+              f"{result['round_trips']:>12} {result['doc_bytes']:>10}")
+
+if __name__ == "__main__":
+    main()
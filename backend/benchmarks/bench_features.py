@@ -0,0 +1,59 @@
+"""Benchmark: lexical feature extraction, one URL at a time vs one batch.
+
+Generates URLs spread over a pool of domains (bulk lists repeat domains) and
+times extract_features on the whole list against calling it once per URL,
+the way the single-URL path does.
+
+    python benchmarks/bench_features.py --urls 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.features import extract_features
+from services.rulepack import rule_packs
+
+WORDS = ['secure', 'login', 'account', 'shop', 'news', 'mail', 'pay', 'cloud', 'app', 'verify']
+TLDS = ['com', 'net', 'org', 'tk', 'co.uk', 'io', 'ml']
+
+def make_urls(count: int, rng: random.Random):
+    domains = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(rng.randint(4, 14)))
+               + '.' + rng.choice(TLDS) for _ in range(max(1, count // 5))]
+    urls = []
+    for _ in range(count):
+        host = rng.choice(domains)
+        if rng.random() < 0.3:
+            host = rng.choice(WORDS) + '.' + host
+        path = '/'.join(rng.choice(WORDS) for _ in range(rng.randint(0, 4)))
+        urls.append(f"{rng.choice(['http', 'https'])}://{host}/{path}?id={rng.randint(0, 99999)}")
+    return urls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    pack = rule_packs.current
+    pack.typosquat  # build the brand index outside the timings
+    rng = random.Random(7)
+    print(f"{'urls':>8} {'per-URL s':>10} {'batch s':>8} {'URLs/s batch':>13}  same matrix")
+    for count in args.urls:
+        urls = make_urls(count, rng)
+
+        started = time.perf_counter()
+        rows = [extract_features([url], pack).matrix[0] for url in urls]
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = extract_features(urls, pack)
+        batched = time.perf_counter() - started
+
+        same = all((row == batch.matrix[i]).all() for i, row in enumerate(rows))
+        print(f"{count:>8} {single:>10.2f} {batched:>8.2f} {count / batched:>13.0f}  {same}")
+
+if __name__ == "__main__":
+    main()
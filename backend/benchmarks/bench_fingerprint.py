@@ -0,0 +1,94 @@
+"""Benchmark: phishing-kit clone detection with the fingerprint index.
+
+Builds a few synthetic phishing kits and serves each on many throwaway
+hosts with the usual per-clone noise (host names in links and form
+actions, victim tokens, a changed sentence). One clone per kit is judged
+and stored; the report shows how many of the other clones reuse its
+verdict, how many unrelated pages wrongly match, and lookup latency as the
+index fills with background pages.
+
+    python benchmarks/bench_fingerprint.py --clones 200 --background 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.fingerprint import FingerprintIndex
+
+VOCABULARY = ("account verify password login secure bank update suspended confirm identity "
+              "payment card billing support team customer service access restore limited "
+              "unusual activity sign review details information required immediately click "
+              "news sport weather recipe travel music film garden school health market").split()
+
+def make_kit(rng: random.Random) -> dict:
+    sentences = [' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 16))) for _ in range(25)]
+    inputs = [{'type': t, 'name': n} for t, n in rng.sample(
+        [('email', 'email'), ('password', 'pass'), ('text', 'card'), ('text', 'cvv'),
+         ('text', 'ssn'), ('hidden', 'token'), ('text', 'phone')], 4)]
+    return {'title': ' '.join(rng.choice(VOCABULARY) for _ in range(4)), 'sentences': sentences,
+            'inputs': inputs, 'paths': [f"/{rng.choice(VOCABULARY)}/{i}" for i in range(15)]}
+
+def render(kit: dict, host: str, rng: random.Random) -> dict:
+    sentences = list(kit['sentences'])
+    sentences[rng.randrange(len(sentences))] = ' '.join(rng.choice(VOCABULARY) for _ in range(10))
+    return {
+        'title': kit['title'],
+        'text': '. '.join(sentences) + f". Reference {rng.randrange(10 ** 8)}",
+        'forms': [{'action': f"https://{host}/submit.php?sid={rng.randrange(10 ** 6)}", 'method': 'post',
+                   'inputs': kit['inputs']}],
+        'links': [f"https://{host}{path}" for path in kit['paths']] + ['https://www.paypal.com/help']
+    }
+
+def random_host(rng: random.Random) -> str:
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(12)) + '.xyz'
+
+async def run(args):
+    rng = random.Random(3)
+    kits = [make_kit(rng) for _ in range(args.kits)]
+    unrelated = [render(make_kit(rng), random_host(rng), rng) for _ in range(args.unrelated)]
+
+    print(f"{'background':>10} {'clone hits':>11} {'false hits':>11} {'p50 us':>8} {'p99 us':>8}")
+    for background in args.background:
+        index = FingerprintIndex()
+        index.max_entries = background + args.kits
+        noise = np.random.default_rng(background).integers(0, 2 ** 32, size=(background, 64), dtype=np.uint32)
+        for signature in noise:
+            await index.add(signature, {'is_phishing': False})
+        for kit in kits:
+            first = index.fingerprint(render(kit, random_host(rng), rng))
+            await index.add(first, {'is_phishing': True, 'reasoning': 'judged once'})
+
+        hits, timings = 0, []
+        clones = [render(kit, random_host(rng), rng) for kit in kits for _ in range(args.clones)]
+        for page in clones:
+            value = index.fingerprint(page)
+            started = time.perf_counter()
+            match = await index.lookup(value)
+            timings.append(time.perf_counter() - started)
+            hits += match is not None and match['verdict'].get('is_phishing', False)
+        false_hits = 0
+        for page in unrelated:
+            match = await index.lookup(index.fingerprint(page))
+            false_hits += match is not None and match['verdict'].get('is_phishing', False)
+
+        timings.sort()
+        print(f"{background:>10} {hits / len(clones):>11.1%} {false_hits / len(unrelated):>11.2%} "
+              f"{statistics.median(timings) * 1e6:>8.1f} {timings[int(len(timings) * 0.99) - 1] * 1e6:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kits", type=int, default=5)
+    parser.add_argument("--clones", type=int, default=100, help="clones per kit")
+    parser.add_argument("--unrelated", type=int, default=500)
+    parser.add_argument("--background", type=int, nargs="+", default=[1000, 100000])
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: the offline fallback translator as its glossary grows.
+
+Compares the old fallback (lowercase, then one ``str.replace`` per glossary
+entry) with the word-trie Glossary on a short warning and a ~2 KB page of
+text, for the shipped Kannada glossary and for synthetic glossaries of a
+few thousand entries.
+
+    python benchmarks/bench_glossary.py --sizes 1000 5000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.glossary import Glossary
+from services.locales import Locale, DEFAULT_LOCALES_DIR
+
+SHORT = "Warning: this URL looks unsafe. Do not click the link or enter personal information."
+
+def replace_loop(text: str, glossary: dict) -> str:
+    translated = text.lower()
+    for english, replacement in glossary.items():
+        translated = translated.replace(english, replacement)
+    return translated
+
+def synthetic_glossary(base: dict, size: int, rng: random.Random) -> dict:
+    glossary = dict(base)
+    while len(glossary) < size:
+        words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                 for _ in range(rng.randint(1, 3))]
+        glossary[' '.join(words)] = f"<{len(glossary)}>"
+    return glossary
+
+def timed(fn, text: str, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000], help="synthetic glossary sizes")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    base = Locale.from_file(DEFAULT_LOCALES_DIR / "kn.json").glossary
+    long_text = ' '.join([SHORT] * 24)
+    print(f"{'entries':>8} {'text':>6} {'replace loop':>14} {'trie':>10}")
+    for glossary in [base] + [synthetic_glossary(base, size, rng) for size in args.sizes]:
+        started = time.perf_counter()
+        trie = Glossary(glossary)
+        build_ms = (time.perf_counter() - started) * 1000
+        for label, text in (('short', SHORT), ('2KB', long_text)):
+            old = timed(lambda t: replace_loop(t, glossary), text, args.repeat)
+            new = timed(trie.translate, text, args.repeat)
+            print(f"{len(glossary):>8} {label:>6} {old:>11.1f} µs {new:>7.1f} µs")
+        print(f"{'':>8} built in {build_ms:.1f} ms")
+
+    print("\nSample (shipped glossary):")
+    print(f"  replace loop: {replace_loop(SHORT, base)}")
+    print(f"  trie:         {Glossary(base).translate(SHORT)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark: history queries at depth, skip/limit against keyset cursors.
+
+Seeds --docs analysis documents (default 10M, about 1 KB each, spread over
+--domains registrable domains and half a year) into a scratch database,
+creates the ANALYSIS_INDEXES from services.db and times one 20-item page at
+increasing depths, for the global history and for one busy domain:
+
+  skip     find().sort().skip(depth * 20).limit(20)
+  keyset   history_query(cursor=...) from the cursor of the previous page
+
+Against a real mongod it also reports documents examined per query
+(explain executionStats). --no-index runs the same queries before the
+indexes exist; --mongomock runs a small smoke test without a server.
+
+    python benchmarks/bench_history.py --mongo-uri mongodb://localhost:27017 --docs 10000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.db import ANALYSIS_INDEXES, HISTORY_PROJECTION, HISTORY_SORT, encode_cursor, history_query
+
+PAGE = 20
+
+def seed(collection, docs: int, domains: int, batch: int = 10000):
+    rng = random.Random(11)
+    start = datetime(2024, 1, 1)
+    names = [f"site{i}.com" for i in range(domains)]
+    weights = [1 / (i + 1) for i in range(domains)]  # a few busy domains, a long tail
+    written = 0
+    started = time.perf_counter()
+    while written < docs:
+        count = min(batch, docs - written)
+        chosen = rng.choices(names, weights, k=count)
+        collection.insert_many([{
+            'url': f"https://www.{domain}/p/{written + i}",
+            'url_hash': '%040x' % rng.getrandbits(160),
+            'host': f"www.{domain}",
+            'domain': domain,
+            'created_at': start + timedelta(seconds=(written + i) * 180 * 86400 // docs),
+            'trust_score': rng.randrange(101),
+            'risk_level': rng.choice(('LOW', 'MEDIUM', 'HIGH')),
+            'rule_pack_version': 'builtin',
+            'details': {'blob': 'x' * 900}
+        } for i, domain in enumerate(chosen)], ordered=False)
+        written += count
+        if written % 1000000 < batch:
+            print(f"  seeded {written} ({written / (time.perf_counter() - started):.0f}/s)", file=sys.stderr)
+
+def timed(run, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+def examined(collection, query, skip: int):
+    try:
+        plan = collection.find(query, HISTORY_PROJECTION).sort(HISTORY_SORT).skip(skip).limit(PAGE) \
+            .explain()['executionStats']
+        return plan['totalDocsExamined'], plan['totalKeysExamined']
+    except Exception:
+        return None, None
+
+def measure(collection, label: str, domain, depths, repeats: int):
+    base = history_query(domain)
+    print(f"{label}")
+    print(f"{'depth':>8} {'skip ms':>9} {'keyset ms':>10} {'skip docs':>10} {'keyset docs':>12}")
+    for depth in depths:
+        skip = depth * PAGE
+        previous = list(collection.find(base, {'created_at': 1}).sort(HISTORY_SORT).skip(skip - 1).limit(1)) \
+            if skip else []
+        if skip and not previous:
+            break
+        keyset = history_query(domain, cursor=encode_cursor(previous[0])) if previous else base
+        skip_ms = timed(lambda: list(collection.find(base, HISTORY_PROJECTION).sort(HISTORY_SORT)
+                                     .skip(skip).limit(PAGE)), repeats)
+        keyset_ms = timed(lambda: list(collection.find(keyset, HISTORY_PROJECTION).sort(HISTORY_SORT)
+                                       .limit(PAGE)), repeats)
+        skip_docs, _ = examined(collection, base, skip)
+        keyset_docs, _ = examined(collection, keyset, 0)
+        print(f"{depth:>8} {skip_ms:>9.2f} {keyset_ms:>10.2f} {str(skip_docs):>10} {str(keyset_docs):>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--mongomock", action="store_true", help="no server: small in-memory smoke test")
+    parser.add_argument("--docs", type=int, default=10000000)
+    parser.add_argument("--domains", type=int, default=50000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10, 100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--no-index", action="store_true", help="also time the queries before indexing")
+    parser.add_argument("--reuse", action="store_true", help="keep an already seeded collection")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        collection = mongomock.MongoClient()['bench']['analyses']
+    else:
+        import pymongo
+        collection = pymongo.MongoClient(args.mongo_uri)['surakshak_bench']['analyses']
+
+    if not (args.reuse and collection.estimated_document_count()):
+        collection.drop()
+        started = time.perf_counter()
+        seed(collection, args.docs, args.domains)
+        print(f"seeded {args.docs} documents in {time.perf_counter() - started:.0f} s")
+
+    busy = 'site0.com'
+    if args.no_index:
+        collection.drop_indexes()
+        measure(collection, "global history, no indexes", None, args.depths[:2], 1)
+        measure(collection, f"history/{busy}, no indexes", busy, args.depths[:2], 1)
+
+    started = time.perf_counter()
+    for keys, name in ANALYSIS_INDEXES:
+        collection.create_index(keys, name=name)
+    print(f"indexes built in {time.perf_counter() - started:.1f} s")
+    measure(collection, "global history", None, args.depths, args.repeats)
+    measure(collection, f"history/{busy}", busy, args.depths, args.repeats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: page parsing time and peak memory per parser mode.
+
+Generates phishing-style fixture pages of increasing size and parses each one
+with every installed backend (stream, html.parser, lxml, selectolax). Each
+size is run for an ASCII page and a UTF-8 page of Kannada and accented text
+with no meta charset, so a backend that guesses the charset wrong reads
+False under "same output". The stream extractor stops after
+STREAM_MAX_TEXT_CHARS of text, so on large pages its output is a prefix of
+the others and "same output" reads False for it too. Peak memory is
+the RSS high-water mark above the starting RSS in a spawned child (Linux
+/proc), which also covers the C-level allocations of lxml/selectolax that
+tracemalloc cannot see.
+
+    python benchmarks/bench_html_parse.py --sizes-kb 100 1000 5000
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.html_parser import PARSER_MODES, SelectolaxParser, lxml, parse_html
+
+BLOCK = """
+<div class="card"><h2>Account notice {i}</h2>
+<p>Your account has been <b>suspended</b>. Verify your identity within 24 hours
+or it will be locked. <a href="https://example.com/verify?id={i}">Click here</a>.</p>
+<script>var tracking{i} = "{i}";</script><style>.c{i} {{ color: red; }}</style>
+<form action="/login/{i}" method="post"><input type="text" name="user{i}" placeholder="Email">
+<input type="password" name="password" required><select name="bank"><option>SBI</option></select>
+<textarea name="note">Card number</textarea></form></div>
+"""
+
+KANNADA_BLOCK = """
+<div class="card"><h2>ಖಾತೆ ಸೂಚನೆ {i}</h2>
+<p>ನಿಮ್ಮ ಖಾತೆಯನ್ನು <b>ಅಮಾನತುಗೊಳಿಸಲಾಗಿದೆ</b>. 24 ಗಂಟೆಗಳಲ್ಲಿ ನಿಮ್ಮ ಗುರುತನ್ನು ಪರಿಶೀಲಿಸಿ — café, naïve, €100.
+<a href="https://example.com/ಪರಿಶೀಲಿಸಿ?id={i}">ಇಲ್ಲಿ ಕ್ಲಿಕ್ ಮಾಡಿ</a>.</p>
+<form action="/login/{i}" method="post"><input type="text" name="user{i}" placeholder="ಇಮೇಲ್">
+<input type="password" name="password" required><textarea name="note">ಕಾರ್ಡ್ ಸಂಖ್ಯೆ</textarea></form></div>
+"""
+
+FIXTURES = {'ascii': ("Security alert", BLOCK), 'kannada': ("ಭದ್ರತಾ ಎಚ್ಚರಿಕೆ", KANNADA_BLOCK)}
+
+def make_page(size_kb: int, fixture: str = 'ascii') -> bytes:
+    title, block = FIXTURES[fixture]
+    parts = [f"<html><head><title>{title}</title></head><body>"]
+    i = 0
+    while sum(len(p.encode("utf-8")) for p in parts) < size_kb * 1024:
+        parts.append(block.format(i=i))
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+def available_modes():
+    modes = ['stream', 'html.parser']
+    if lxml is not None:
+        modes.append('lxml')
+    if SelectolaxParser is not None:
+        modes.append('selectolax')
+    return [m for m in PARSER_MODES if m in modes]
+
+def _proc_status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+def _peak_child(page: bytes, mode: str, queue):
+    # Reset the high-water mark so only the parse itself is measured
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    before = _proc_status_kb("VmRSS")
+    parse_html(page, mode)
+    queue.put(_proc_status_kb("VmHWM") - before)
+
+def peak_rss_kb(page: bytes, mode: str) -> int:
+    # Spawned rather than forked: a fork inherits the parent's already-grown
+    # heap, so the parse would reuse resident pages and look free
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_peak_child, args=(page, mode, queue))
+    child.start()
+    delta = queue.get()
+    child.join()
+    return delta
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modes = available_modes()
+    print(f"{'size':>8} {'fixture':<8} {'mode':<12} {'median ms':>10} {'peak +RSS MB':>13}  same output")
+    for size_kb, fixture in ((size_kb, fixture) for size_kb in args.sizes_kb for fixture in FIXTURES):
+        page = make_page(size_kb, fixture)
+        reference = parse_html(page, 'html.parser')
+        for mode in modes:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = parse_html(page, mode)
+                timings.append(time.perf_counter() - started)
+            peak = peak_rss_kb(page, mode) / 1024
+            print(f"{size_kb:>6}KB {fixture:<8} {mode:<12} {statistics.median(timings) * 1000:>10.1f} "
+                  f"{peak:>13.1f}  {result == reference}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark: LLM page analysis against the local stub server.
+
+Sends the same set of pages (with --duplicate-ratio of them repeated)
+through three variants and reports wall time, requests that reached the
+server and the worst event-loop stall seen while they ran:
+
+  blocking   the old pattern: a synchronous completion call inside async code
+  async      LLMClient: AsyncOpenAI, concurrency limit, cache, shared in-flight calls
+  batched    LLMClient with LLM_BATCH_SIZE pages per prompt
+
+    python benchmarks/bench_llm_client.py --pages 64 --latency 0.2 --rate-limit-every 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import httpx
+import openai
+import uvicorn
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.llm_stub_server import create_app
+from services.llm_client import PAGE_PROMPT, SYSTEM_PROMPT, LLMClient, parse_verdict
+
+WORDS = ['account', 'verify', 'password', 'offer', 'shipping', 'login', 'news', 'weather',
+         'urgent', 'suspended', 'recipe', 'football', 'bank', 'invoice', 'gift']
+
+def make_pages(count: int, duplicate_ratio: float, rng: random.Random):
+    unique = [(f"Page {i}", ' '.join(rng.choice(WORDS) for _ in range(300)))
+              for i in range(max(1, int(count * (1 - duplicate_ratio))))]
+    return [unique[i] if i < len(unique) else rng.choice(unique) for i in range(count)]
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        worst = max(worst, time.perf_counter() - started - 0.005)
+    return worst
+
+async def run_blocking(base_url: str, pages):
+    client = openai.OpenAI(api_key="stub", base_url=base_url)
+
+    async def analyze(title, text):
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "system", "content": SYSTEM_PROMPT},
+                      {"role": "user", "content": PAGE_PROMPT.format(title=title, text=text)}],
+            max_tokens=500, temperature=0.1)
+        return parse_verdict(response.choices[0].message.content)
+
+    return await asyncio.gather(*(analyze(title, text) for title, text in pages), return_exceptions=True)
+
+async def run_client(base_url: str, pages, batch_size: int):
+    os.environ["LLM_BATCH_SIZE"] = str(batch_size)
+    client = LLMClient(api_key="stub", base_url=base_url)
+    try:
+        return await asyncio.gather(*(client.analyze(title, text) for title, text in pages),
+                                    return_exceptions=True)
+    finally:
+        await client.close()
+
+async def measure(name: str, run, stub_url: str):
+    before = httpx.get(f"{stub_url}/stats").json()
+    stop = asyncio.Event()
+    lag = asyncio.ensure_future(loop_lag(stop))
+    started = time.perf_counter()
+    results = await run()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag
+    after = httpx.get(f"{stub_url}/stats").json()
+    errors = sum(isinstance(result, Exception) for result in results)
+    print(f"{name:>9} {elapsed:>7.2f} {after['requests'] - before['requests']:>9} "
+          f"{after['rate_limited'] - before['rate_limited']:>6} {worst_lag * 1000:>12.0f} {errors:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.25)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    server = uvicorn.Server(uvicorn.Config(create_app(args.latency, args.rate_limit_every),
+                                           host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    stub_url = f"http://127.0.0.1:{args.port}"
+    base_url = f"{stub_url}/v1"
+
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LLM_RETRY_BASE_SECONDS"] = "0.05"
+    pages = make_pages(args.pages, args.duplicate_ratio, random.Random(1))
+
+    print(f"{'variant':>9} {'wall s':>7} {'requests':>9} {'429s':>6} {'max lag ms':>12} {'errors':>7}")
+
+    async def run_all():
+        await measure("blocking", lambda: run_blocking(base_url, pages), stub_url)
+        await measure("async", lambda: run_client(base_url, pages, 1), stub_url)
+        await measure("batched", lambda: run_client(base_url, pages, args.batch_size), stub_url)
+
+    asyncio.run(run_all())
+    server.should_exit = True
+
+if __name__ == "__main__":
+    main()
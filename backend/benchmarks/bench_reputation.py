@@ -0,0 +1,79 @@
+"""Benchmark: reputation list memory and lookup latency.
+
+Builds a DomainSet (Bloom filter + sorted 64-bit fingerprints) over
+synthetic domain lists and compares its memory per million entries with a
+plain Python set of the same strings. Lookups are timed for members and
+non-members, and the Bloom filter's measured false-positive rate is shown
+next to the configured one.
+
+    python benchmarks/bench_reputation.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.reputation import DomainSet, fingerprint
+
+TLDS = ['com', 'net', 'org', 'io', 'co.uk', 'de', 'xyz', 'top']
+
+def make_domains(count: int, rng: random.Random):
+    letters = string.ascii_lowercase
+    return [f"{''.join(rng.choice(letters) for _ in range(rng.randint(4, 12)))}{i}.{rng.choice(TLDS)}"
+            for i in range(count)]
+
+def timed(fn, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings) * 1e6, timings[int(len(timings) * 0.99) - 1] * 1e6
+
+def measure(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, elapsed, memory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'entries':>9} {'structure':>10} {'build s':>8} {'MB/million':>11} "
+          f"{'hit p50 us':>11} {'miss p50 us':>12} {'bloom FP':>9}")
+    for size in args.sizes:
+        domains = make_domains(size, rng)
+        members = rng.sample(domains, min(args.queries, size))
+        misses = make_domains(args.queries, random.Random(size))
+
+        domain_set, build, memory = measure(lambda: DomainSet.from_domains(domains, args.error_rate))
+        hit, _ = timed(domain_set.__contains__, members)
+        miss, _ = timed(domain_set.__contains__, misses)
+        false_positives = sum(domain_set.might_contain(fingerprint(d)) for d in misses) / len(misses)
+        print(f"{size:>9} {'DomainSet':>10} {build:>8.2f} {memory / size:>11.2f} "
+              f"{hit:>11.2f} {miss:>12.2f} {false_positives:>9.4f}")
+
+        python_set, build, memory = measure(lambda: set(domains))
+        memory += sum(map(sys.getsizeof, domains))  # the set keeps the strings alive
+        hit, _ = timed(python_set.__contains__, members)
+        miss, _ = timed(python_set.__contains__, misses)
+        print(f"{size:>9} {'set':>10} {build:>8.2f} {memory / size:>11.2f} "
+              f"{hit:>11.2f} {miss:>12.2f} {'-':>9}")
+
+if __name__ == "__main__":
+    main()
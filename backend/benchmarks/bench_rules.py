@@ -0,0 +1,82 @@
+"""Benchmark: content rule matching, per-rule scans vs the compiled RuleSet.
+
+Builds page texts of increasing size and times the previous approach (one
+substring scan per keyword, one re.search per urgency regex) against a
+single RuleSet.scan. Two texts per size: a phishing-like page where rules hit
+early, and a clean page where no rule hits and every per-rule scan has to
+read the whole text.
+
+    python benchmarks/bench_rules.py --sizes-kb 50 500 5000
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import rules
+from services.rulepack import RulePack, rule_packs
+
+PHISHING_WORDS = ("your account has been suspended please verify your identity within 24 hours "
+                  "or it will be locked click here security alert").split()
+CLEAN_WORDS = ("the quarterly report covers revenue growth in the northern region and outlines "
+               "hiring plans for the engineering team next year").split()
+
+def make_text(words, size_kb: int) -> str:
+    rng = random.Random(size_kb)
+    parts = []
+    size = 0
+    while size < size_kb * 1024:
+        word = rng.choice(words)
+        parts.append(word)
+        size += len(word) + 1
+    return ' '.join(parts)
+
+def per_rule(pack, text: str):
+    keywords = [k for k in pack.phishing_keywords if k in text]
+    urgency = any(re.search(p, text) for p in pack.urgency_patterns)
+    return keywords, urgency
+
+def compiled(pack, text: str):
+    hits = pack.content_rules.scan(text)
+    return [r.id for r in hits if r.group == 'keyword'], any(r.group == 'urgency' for r in hits)
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    source = rule_packs.current.source
+    automaton = rules.ahocorasick
+    packs = {'per-rule': RulePack(source), 'ruleset': RulePack(source)}
+    if automaton is not None:
+        rules.ahocorasick = None
+        packs['ruleset/find'] = RulePack(source)  # fallback without pyahocorasick
+        rules.ahocorasick = automaton
+
+    print(f"{'size':>8} {'text':<9} {'method':<13} {'median ms':>10}  same hits")
+    for size_kb in args.sizes_kb:
+        for label, words in (('phishing', PHISHING_WORDS), ('clean', CLEAN_WORDS)):
+            text = make_text(words, size_kb)
+            reference = per_rule(packs['per-rule'], text)
+            for method, pack in packs.items():
+                run = per_rule if method == 'per-rule' else compiled
+                elapsed = median_ms(lambda: run(pack, text), args.repeat)
+                print(f"{size_kb:>6}KB {label:<9} {method:<13} {elapsed:>10.2f}  "
+                      f"{run(pack, text) == reference}")
+
+if __name__ == "__main__":
+    main()
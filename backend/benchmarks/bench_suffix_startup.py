@@ -0,0 +1,77 @@
+"""Benchmark: cold-start cost of public suffix lookups.
+
+Each variant runs in a fresh interpreter and reports the time to import,
+to the first extraction (which loads the suffix list) and per extraction
+afterwards:
+
+  bundled     SuffixList over data/public_suffix_list.dat (what the app uses)
+  warm-cache  module-level tldextract.extract with its disk cache populated
+  cold-cache  module-level tldextract.extract with an empty cache dir: it
+              tries the network first (bounded by --fetch-timeout), then
+              falls back to its own snapshot
+
+    python benchmarks/bench_suffix_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+if sys.argv[1] == "bundled":
+    sys.path.insert(0, sys.argv[2])
+    from services.suffixes import suffixes
+    extract = suffixes.extract
+else:
+    import tldextract
+    extract = tldextract.extract
+imported = time.perf_counter()
+extract("www.example.co.uk")
+first = time.perf_counter()
+for _ in range(1000):
+    extract("login.secure.example.com.au")
+after = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "first_ms": (first - imported) * 1000,
+                  "per_call_us": (after - first) * 1000}))
+'''
+
+def run(variant: str, env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", CHILD, variant, BACKEND], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--fetch-timeout", type=float, default=2.0,
+                        help="TLDEXTRACT_CACHE_TIMEOUT for the cold-cache variant")
+    args = parser.parse_args()
+
+    warm_cache = tempfile.mkdtemp(prefix="tldextract-warm-")
+    base = dict(os.environ, TLDEXTRACT_CACHE_TIMEOUT=str(args.fetch_timeout))
+    run("default", dict(base, TLDEXTRACT_CACHE=warm_cache))  # populate the cache once
+
+    print(f"{'variant':>11} {'import ms':>10} {'first ms':>10} {'per call us':>12}")
+    for variant in ("bundled", "warm-cache", "cold-cache"):
+        results = []
+        for _ in range(args.runs):
+            env = dict(base)
+            if variant == "warm-cache":
+                env["TLDEXTRACT_CACHE"] = warm_cache
+            elif variant == "cold-cache":
+                env["TLDEXTRACT_CACHE"] = tempfile.mkdtemp(prefix="tldextract-cold-")
+            results.append(run("bundled" if variant == "bundled" else "default", env))
+        print(f"{variant:>11} "
+              f"{statistics.median(r['import_ms'] for r in results):>10.0f} "
+              f"{statistics.median(r['first_ms'] for r in results):>10.0f} "
+              f"{statistics.median(r['per_call_us'] for r in results):>12.2f}")
+
+if __name__ == "__main__":
+    main()
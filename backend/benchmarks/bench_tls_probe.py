@@ -0,0 +1,163 @@
+"""Benchmark: legacy blocking SSL check vs the async TLS probe.
+
+Starts a local TLS server (self-signed cert, generated with the openssl CLI)
+behind a relay that adds artificial round-trip latency, then runs N analyses
+concurrently with each implementation while a heartbeat task measures how
+long the event loop was blocked.
+
+    python benchmarks/bench_tls_probe.py --analyses 20 --rtt-ms 40
+"""
+import argparse
+import asyncio
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_certificate(workdir: str):
+    cert = os.path.join(workdir, "cert.pem")
+    key = os.path.join(workdir, "key.pem")
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+        "-keyout", key, "-out", cert, "-days", "1",
+        "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost"
+    ], check=True, capture_output=True)
+    return cert, key
+
+class LocalTLSServer:
+    """TLS server plus latency relay running on their own event loop thread"""
+
+    def __init__(self, cert: str, key: str, rtt_ms: float):
+        self.cert, self.key = cert, key
+        self.delay = rtt_ms / 2000
+        self.handshakes = 0
+        self.port = None
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop)
+        self._ready.wait()
+
+    async def _start(self):
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(self.cert, self.key)
+
+        async def on_tls(reader, writer):
+            await reader.read()
+            writer.close()
+
+        tls_server = await asyncio.start_server(on_tls, "127.0.0.1", 0, ssl=context)
+        tls_port = tls_server.sockets[0].getsockname()[1]
+
+        async def pipe(reader, writer):
+            try:
+                while data := await reader.read(65536):
+                    await asyncio.sleep(self.delay)
+                    writer.write(data)
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        async def on_relay(reader, writer):
+            # Every probe connection carries exactly one handshake
+            self.handshakes += 1
+            up_reader, up_writer = await asyncio.open_connection("127.0.0.1", tls_port)
+            await asyncio.gather(pipe(reader, up_writer), pipe(up_reader, writer))
+
+        relay = await asyncio.start_server(on_relay, "127.0.0.1", 0)
+        self.port = relay.sockets[0].getsockname()[1]
+        self._ready.set()
+
+def legacy_check_ssl(url: str) -> dict:
+    """The pre-async implementation, kept verbatim for comparison"""
+    from urllib.parse import urlparse
+    try:
+        parsed = urlparse(url)
+        hostname = parsed.hostname
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        if parsed.scheme != 'https':
+            return {'valid': False, 'reason': 'Not HTTPS'}
+        context = ssl.create_default_context()
+        sock = socket.create_connection((hostname, port), timeout=10)
+        ssock = context.wrap_socket(sock, server_hostname=hostname)
+        cert = ssock.getpeercert()
+        ssock.close()
+        return {
+            'valid': True,
+            'issuer': dict(x[0] for x in cert['issuer']),
+            'subject': dict(x[0] for x in cert['subject']),
+            'not_after': cert['notAfter'],
+            'not_before': cert['notBefore']
+        }
+    except Exception as e:
+        return {'valid': False, 'error': str(e)}
+
+async def legacy_analysis(url: str) -> dict:
+    # analyze_url used to call _check_ssl twice, both on the event loop
+    ssl_info = legacy_check_ssl(url)
+    ssl_details = legacy_check_ssl(url)
+    return ssl_details
+
+async def measure(label: str, server: LocalTLSServer, run_one, url: str, analyses: int):
+    blocked = 0.0
+    worst = 0.0
+    interval = 0.001
+    stop = asyncio.Event()
+
+    async def heartbeat():
+        nonlocal blocked, worst
+        last = time.perf_counter()
+        while not stop.is_set():
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            lag = now - last - interval
+            if lag > 0.002:
+                blocked += lag
+                worst = max(worst, lag)
+            last = now
+
+    before = server.handshakes
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_one(url) for _ in range(analyses)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+
+    print(f"{label:<8} analyses={analyses:<4} handshakes={server.handshakes - before:<4} "
+          f"wall={elapsed * 1000:8.1f} ms  loop_blocked={blocked * 1000:8.1f} ms  "
+          f"worst_stall={worst * 1000:7.1f} ms")
+    return results
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    cert, key = make_certificate(workdir)
+    # Trust the self-signed cert in every default context
+    os.environ["SSL_CERT_FILE"] = cert
+
+    from services.url_analyzer import URLAnalyzer
+    analyzer = URLAnalyzer()
+    server = LocalTLSServer(cert, key, args.rtt_ms)
+    url = f"https://localhost:{server.port}/"
+
+    legacy = await measure("legacy", server, legacy_analysis, url, args.analyses)
+    current = await measure("async", server, analyzer._check_ssl, url, args.analyses)
+
+    same = all(a == b for a, b in zip(legacy, current))
+    print(f"results identical: {same}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Benchmark: typosquat lookup latency as the brand list grows.
+
+Builds TyposquatIndex over 10 .. 100k synthetic brand labels and times
+lookups of typo'd, homoglyph and unrelated labels. The old approach, a
+Levenshtein call per brand, is timed alongside on a few queries per size
+(it is linear in the brand count, so it is skipped above --brute-max).
+
+    python benchmarks/bench_typosquat.py --sizes 10 1000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.typosquat import TyposquatIndex, levenshtein
+
+SEED_BRANDS = ['google', 'facebook', 'amazon', 'microsoft', 'apple',
+               'paypal', 'ebay', 'twitter', 'instagram', 'linkedin']
+# Consonant-vowel syllables plus a few words that many real brands share
+SYLLABLES = [c + v for c in 'bcdfghjklmnprstvwz' for v in 'aeiou'] + [
+    'net', 'pay', 'bank', 'shop', 'tel', 'secure', 'cloud', 'soft', 'app', 'mail']
+
+def make_brands(count: int, rng: random.Random):
+    brands = list(SEED_BRANDS[:count])
+    seen = set(brands)
+    while len(brands) < count:
+        brand = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+        if brand not in seen:
+            seen.add(brand)
+            brands.append(brand)
+    return brands
+
+def make_queries(brands, count: int, rng: random.Random):
+    queries = []
+    for i in range(count):
+        brand = rng.choice(brands)
+        kind = i % 3
+        if kind == 0:  # one or two random edits
+            chars = list(brand)
+            for _ in range(rng.randint(1, 2)):
+                chars[rng.randrange(len(chars))] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+            queries.append(''.join(chars))
+        elif kind == 1:  # homoglyph swap
+            queries.append(brand.replace('o', '0').replace('l', '1').replace('a', 'а'))
+        else:  # unrelated label
+            queries.append(''.join(rng.choice('qwxz') for _ in range(8)))
+    return queries
+
+def brute_force(brands, label: str):
+    return [brand for brand in brands if levenshtein(label, brand) <= 2]
+
+def timed(fn, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings) * 1e6, timings[int(len(timings) * 0.99) - 1] * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=600)
+    parser.add_argument("--brute-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'brands':>8} {'build s':>8} {'index MB':>9} {'p50 us':>8} {'p99 us':>8} "
+          f"{'brute p50 us':>13}")
+    for size in args.sizes:
+        brands = make_brands(size, rng)
+        queries = make_queries(brands, args.queries, rng)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = TyposquatIndex(brands)
+        build = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+        tracemalloc.stop()
+
+        p50, p99 = timed(index.lookup, queries)
+        brute = '-'
+        if size <= args.brute_max:
+            brute = f"{timed(lambda q: brute_force(brands, q), queries[:30])[0]:.0f}"
+        print(f"{size:>8} {build:>8.2f} {memory:>9.1f} {p50:>8.0f} {p99:>8.0f} {brute:>13}")
+
+if __name__ == "__main__":
+    main()
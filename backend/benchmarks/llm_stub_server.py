@@ -0,0 +1,85 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Answers POST /v1/chat/completions with a canned phishing verdict after a
+fixed latency, so LLMClient can be exercised without network access or an
+API key. Batched prompts get a JSON array with one verdict per page. Every
+--rate-limit-every'th request is answered with a 429 and Retry-After.
+
+    python benchmarks/llm_stub_server.py --port 8799 --latency 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:8799/v1 OPENAI_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SUSPICIOUS = ('password', 'verify', 'urgent', 'suspended', 'login')
+
+def verdict(text: str, page: int = None) -> dict:
+    hits = [word for word in SUSPICIOUS if word in text.lower()]
+    result = {
+        'is_phishing': len(hits) >= 2,
+        'confidence': min(100, 30 * len(hits)),
+        'reasoning': f"stub: matched {', '.join(hits) or 'nothing'}",
+        'risk_factors': hits
+    }
+    if page is not None:
+        result['page'] = page
+    return result
+
+def create_app(latency: float = 0.2, rate_limit_every: int = 0, retry_after: float = 0.1) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+    app.state.counts = {'requests': 0, 'rate_limited': 0, 'pages': 0}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        counts = app.state.counts
+        counts['requests'] += 1
+        if rate_limit_every and counts['requests'] % rate_limit_every == 0:
+            counts['rate_limited'] += 1
+            return JSONResponse({'error': {'message': 'Rate limit reached', 'type': 'rate_limit'}},
+                                status_code=429, headers={'retry-after': str(retry_after)})
+
+        await asyncio.sleep(latency)
+        prompt = body['messages'][-1]['content']
+        pages = re.findall(r'<<<PAGE (\d+) (\w+)>>>\n(.*?)\n<<<END PAGE \1 \2>>>', prompt, re.DOTALL)
+        if 'JSON array' in prompt and pages:
+            content = json.dumps([verdict(text, int(number)) for number, _, text in pages])
+            counts['pages'] += len(pages)
+        else:
+            content = json.dumps(verdict(prompt))
+            counts['pages'] += 1
+        return {
+            'id': f"stub-{counts['requests']}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4,
+                      'total_tokens': (len(prompt) + len(content)) // 4}
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.counts
+
+    return app
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="429 every Nth request (0 = never)")
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.rate_limit_every, args.retry_after),
+                host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
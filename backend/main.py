@@ -1,23 +1,77 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 from deep_translator import GoogleTranslator
 import asyncio
+import json
+import time
 from services.url_analyzer import URLAnalyzer
-from services.ai_analyzer import AIAnalyzer
-from services.translator import TranslationService
-from services.db import save_analysis
+from services.ai_analyzer import AIAnalyzer, init_worker
+from services.html_parser import ParsePool
+from services.translator import TranslationMemo, TranslationService
+from services.db import db, analysis_writer, risk_rollups, ensure_indexes, get_history, get_recent_logs, save_analysis
+from services.cache import VerdictCache, is_page_cacheable
+from services.singleflight import SingleFlight
+from services.batch import BatchRunner, parse_url_lines
+from services.scoring import calculate_trust_score, risk_level_for
+from services.url_utils import normalize_url, url_hash, url_host, url_origin, registrable_domain
+from services.http_client import http_clients
+from services.rulepack import rule_packs
+from services.features import BatchFeatures
+from services.prefilter import prefilter
+from services.reputation import reputation
+from services.suffixes import suffixes
+from services.locales import locales
+from services.fingerprint import FingerprintIndex
+from services.pipeline import AnalysisPipeline
+from services.metrics import TimingBreakdown, metrics
+from services.logs import configure_logging, get_logger
+from contextlib import asynccontextmanager
+from datetime import datetime
 import pathlib
 
 
 dotenv_path = pathlib.Path(__file__).parent / ".env"
-print("Looking for .env at:", dotenv_path)  
 load_dotenv(dotenv_path=dotenv_path)
-print("Mongo URI from env:", os.getenv("MONGO_URI"))
+# LOG_LEVEL and LOG_FORMAT may come from the .env file
+configure_logging()
+log = get_logger('api')
+log.debug("Environment loaded", extra={'dotenv': str(dotenv_path), 'dotenv_found': dotenv_path.exists(),
+                                       'mongo_uri_set': bool(os.getenv("MONGO_URI"))})
 
-app = FastAPI(title="Scam URL Detector API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared connection pools for VirusTotal and page fetches
+    await http_clients.open()
+    # Public suffix trie from the bundled snapshot, never the network
+    suffixes.load()
+    # Compile the rule pack before the first request, then poll for edits
+    rule_packs.reload()
+    # Localized response messages, prebuilt per message and language
+    locales.load()
+    prefilter.load()
+    # Allow/deny lists: loaded off the event loop, then re-read on change
+    await asyncio.to_thread(reputation.refresh)
+    # Verdicts of already-judged pages, for phishing-kit clones
+    await fingerprints.load()
+    # Analyses are written behind the response, in batches
+    await analysis_writer.start()
+    # Index builds run server-side; on a large collection they must not hold up startup
+    tasks = [asyncio.create_task(ensure_indexes()),
+             asyncio.create_task(rule_packs.watch()), asyncio.create_task(reputation.watch())]
+    yield
+    for task in tasks:
+        task.cancel()
+    await analysis_writer.close()
+    await ai_analyzer.llm.close()
+    await http_clients.close()
+    parse_pool.shutdown()
+
+app = FastAPI(title="Scam URL Detector API", version="1.0.0", lifespan=lifespan)
 
 
 # CORS configuration
@@ -29,14 +83,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+HTTP_SECONDS = metrics.histogram('scam_detector_http_request_seconds', 'HTTP request latency by route',
+                                 ('method', 'route', 'status'))
+HTTP_IN_FLIGHT = metrics.gauge('scam_detector_http_requests_in_flight', 'HTTP requests being served', ('method',))
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Streaming responses (/analyze-batch) are timed until their headers are sent
+    started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(request.method)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec(request.method)
+        # The route template, not the raw path, so /history/{domain} is one series
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(request.method, getattr(route, "path", "unmatched"), str(status),
+                             value=time.perf_counter() - started)
+
 # Initialize services
 url_analyzer = URLAnalyzer()
-ai_analyzer = AIAnalyzer()
-translator = TranslationService()
+parse_pool = ParsePool(initializer=init_worker)
+fingerprints = FingerprintIndex(db["fingerprints"])
+ai_analyzer = AIAnalyzer(parse_pool=parse_pool, fingerprints=fingerprints)
+# Shares the LLM client (and its concurrency limit) with the page analysis
+translator = TranslationService(memo=TranslationMemo(db["translations"]), llm=ai_analyzer.llm)
+verdict_cache = VerdictCache(
+    collection=db["analyses"] if os.getenv("VERDICT_CACHE_SHARED", "").lower() in ("1", "true", "yes") else None
+)
+pipeline = AnalysisPipeline(url_analyzer, ai_analyzer, prefilter, reputation)
+analysis_flight = SingleFlight("analyze-url")
+
+# Counters the services already keep, read when /metrics is scraped
+metrics.callback('scam_detector_pipeline_stages_total', 'Pipeline stages by outcome (ran, cached, skipped)',
+                 lambda: {(stage, status): count for stage, counts in pipeline.counts.items()
+                          for status, count in counts.items()}, ('stage', 'status'), kind='counter')
+metrics.callback('scam_detector_verdict_cache_total', 'Verdict cache lookups by tier and result',
+                 lambda: {(tier, result): stats[tier][result] for stats in [verdict_cache.stats()]
+                          for tier in ('page', 'domain')
+                          for result in ('hits', 'misses', 'shared_hits', 'shared_misses')},
+                 ('tier', 'result'), kind='counter')
+metrics.callback('scam_detector_llm_calls_total', 'LLM API calls, retries, rate limits and failures',
+                 lambda: {(outcome,): ai_analyzer.llm.counts[outcome]
+                          for outcome in ('requests', 'retries', 'rate_limited', 'failures')},
+                 ('outcome',), kind='counter')
+metrics.callback('scam_detector_analyses_total', 'Analyses written, written inline and dropped',
+                 lambda: {(outcome,): analysis_writer.counts[outcome] for outcome in ('written', 'inline', 'dropped')},
+                 ('outcome',), kind='counter')
+metrics.callback('scam_detector_analysis_queue_depth', 'Analyses waiting for the write-behind writer',
+                 lambda: analysis_writer.stats()['depth'])
 
 class URLRequest(BaseModel):
     url: str
-    language: str = "en"  # en or kn (kannada)
+    language: str = "en"  # a data/locales language code: en, kn (kannada), ...
+    force_refresh: bool = False  # bypass the verdict cache
+    timings: bool = False  # attach the per-stage timing breakdown
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+    language: str = "en"
+    force_refresh: bool = False
+    concurrency: int = 8  # capped by BATCH_MAX_CONCURRENCY
+    timings: bool = False
 
 class URLResponse(BaseModel):
     url: str
@@ -45,134 +156,323 @@ class URLResponse(BaseModel):
     summary: dict
     details: dict
     recommendations: dict
+    timings: Optional[dict] = None  # only when requested
 
 @app.get("/")
 async def root():
     return {"message": "Scam URL Detector API is running"}
 
-@app.post("/analyze-url", response_model=URLResponse)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latency histograms, error counters and in-flight gauges, in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return dict(verdict_cache.stats(), singleflight=analysis_flight.stats())
+
+@app.get("/rules")
+async def rules_info():
+    return dict(rule_packs.info(), suffix_list=suffixes.info())
+
+@app.post("/rules/reload")
+async def reload_rules():
+    previous = rule_packs.current.version
+    rule_packs.reload()
+    if rule_packs.last_error:
+        raise HTTPException(status_code=422, detail=rule_packs.last_error)
+    return dict(rule_packs.info(), previous_version=previous)
+
+@app.get("/prefilter/stats")
+async def prefilter_stats():
+    return prefilter.stats()
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return ai_analyzer.llm.stats()
+
+@app.get("/fingerprints/stats")
+async def fingerprint_stats():
+    return fingerprints.stats()
+
+@app.get("/analyses/stats")
+async def analyses_stats():
+    return dict(analysis_writer.stats(), rollups=risk_rollups.stats())
+
+@app.get("/stats")
+async def risk_stats(granularity: str = "hour", window: int = 24, domain: Optional[str] = None,
+                     tld: Optional[str] = None):
+    """HIGH/MEDIUM/LOW counts for the last ``window`` minute/hour/day buckets, from the rollups"""
+    try:
+        return await risk_rollups.series(granularity, window,
+                                         domain=registrable_domain(domain.lower()) if domain else None, tld=tld)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/locales")
+async def locales_info():
+    return dict(locales.info(), translations=translator.stats())
+
+@app.get("/reputation")
+async def reputation_info():
+    return reputation.info()
+
+@app.get("/pipeline/stats")
+async def pipeline_stats():
+    return pipeline.stats()
+
+@app.get("/history")
+async def recent_history(limit: int = 10):
+    """The most recent analyses as full documents, newest first (the
+    original response; /v2/history pages through projected entries)"""
+    limit = max(1, min(limit, int(os.getenv("HISTORY_MAX_LIMIT", "100"))))
+    docs = await get_recent_logs(limit)
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return docs
+
+@app.get("/v2/history")
+async def history(limit: int = 20, cursor: Optional[str] = None, risk_level: Optional[str] = None):
+    """Recent analyses, newest first; pass ``next_cursor`` back as ``cursor`` for the next page"""
+    return await history_page(None, risk_level, limit, cursor)
+
+@app.get("/v2/history/{domain}")
+async def domain_history(domain: str, limit: int = 20, cursor: Optional[str] = None,
+                         risk_level: Optional[str] = None):
+    """Analyses of URLs under one registrable domain (a hostname is accepted too)"""
+    return await history_page(registrable_domain(domain.lower()), risk_level, limit, cursor)
+
+async def history_page(domain: Optional[str], risk_level: Optional[str], limit: int, cursor: Optional[str]):
+    limit = max(1, min(limit, int(os.getenv("HISTORY_MAX_LIMIT", "100"))))
+    try:
+        return await get_history(domain, risk_level.upper() if risk_level else None, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/analyze-url", response_model=URLResponse, response_model_exclude_unset=True)
 async def analyze_url(request: URLRequest):
-    print(" POST /analyze-url was triggered!")
+    log.debug("Analyzing URL", extra={'url': request.url})
     try:
-        # Step 1: Basic URL analysis
-        url_data = await url_analyzer.analyze_url(request.url)
-
-        # Step 2: AI content analysis
-        ai_analysis = await ai_analyzer.analyze_content(request.url)
-
-        # Step 3: Calculate trust score
-        trust_score = calculate_trust_score(url_data, ai_analysis)
-        
-        # Step 4: Generate summary and recommendations
-        summary = generate_summary(url_data, ai_analysis, trust_score)
-        recommendations = generate_recommendations(trust_score)
-
-        # Step 5: Translate if needed
-        if request.language == "kn":
-            summary = await translator.translate_to_kannada(summary)
-            recommendations = await translator.translate_recommendations(recommendations)
-        
-        # Determine risk level
-        risk_level = "LOW" if trust_score >= 70 else "MEDIUM" if trust_score >= 40 else "HIGH"
-        
-        try:
-            print("Trying to save analysis to MongoDB...")
-
-            await save_analysis({
-                "url": request.url,
-                "trust_score": trust_score,
-                "risk_level": risk_level,
-                "summary": summary,
-                "recommendations": recommendations,
-                "details": {
-                    "domain_info": url_data,
-                    "ai_analysis": ai_analysis
-                }
-            })
-            print("Saved to MongoDB successfully.")
-        except Exception as db_error:
-            print("MongoDB Save Failed:", repr(db_error))
-
-
-        return URLResponse(
-            url=request.url,
-            trust_score=trust_score,
-            risk_level=risk_level,
-            summary=summary,
-            details={
-                "domain_info": url_data,
-                "ai_analysis": ai_analysis
-            },
-            recommendations=recommendations
-        )
-        
+        return await timed_response(request.timings, request.url, request.language, request.force_refresh)
     except Exception as e:
-        print(" Error inside analyze_url():", repr(e))
+        log.error("Analysis failed", extra={'url': request.url, 'error': repr(e)}, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-def calculate_trust_score(url_data: dict, ai_analysis: dict) -> int:
-    """Calculate trust score based on various factors"""
-    score = 100
-    
-    # VirusTotal detections
-    if url_data.get("virustotal_detections", 0) > 0:
-        score -= url_data["virustotal_detections"] * 15
-    
-    # Domain age
-    if url_data.get("domain_age_days", 365) < 30:
-        score -= 20
-    
-    # SSL certificate
-    if not url_data.get("has_ssl", False):
-        score -= 15
-    
-    # Suspicious patterns
-    score -= len(url_data.get("suspicious_patterns", [])) * 10
-    
-    # AI analysis
-    if ai_analysis.get("is_phishing", False):
-        score -= 30
-    
-    if ai_analysis.get("urgency_detected", False):
-        score -= 15
-    
-    return max(0, min(100, score))
+# BatchRequest options a text or multipart batch may set in the query string
+BATCH_QUERY_OPTIONS = ("language", "force_refresh", "concurrency", "timings")
 
-def generate_summary(url_data: dict, ai_analysis: dict, trust_score: int) -> dict:
-    """Generate human-readable summary"""
+def batch_query_options(request: Request) -> dict:
+    """The allowed batch options from the query string; 400 for anything else"""
+    unknown = sorted(set(request.query_params) - set(BATCH_QUERY_OPTIONS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown query parameter(s): {', '.join(unknown)}; "
+                                                    f"allowed: {', '.join(BATCH_QUERY_OPTIONS)}")
+    options = {name: request.query_params[name] for name in BATCH_QUERY_OPTIONS if name in request.query_params}
+    try:
+        BatchRequest(urls=[], **options)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query parameter: {e}")
+    return options
+
+@app.post("/analyze-batch")
+async def analyze_batch(request: Request):
+    """Analyze many URLs and stream one NDJSON line per URL as it finishes.
+
+    Accepts a JSON body (BatchRequest), an NDJSON/plain-text body, or a
+    multipart upload with a ``file`` field. For the non-JSON forms the
+    options come from the BATCH_QUERY_OPTIONS query parameters; any other
+    parameter, or a bad value, is a 400.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/json"):
+            body = await request.json()
+            if not isinstance(body, dict):
+                raise ValueError("the JSON body must be an object")
+            batch = BatchRequest(**body)
+        else:
+            if content_type.startswith("multipart/form-data"):
+                form = await request.form()
+                upload = form.get("file")
+                if upload is None:
+                    raise HTTPException(status_code=400, detail="Missing 'file' upload")
+                text = (await upload.read()).decode("utf-8", errors="replace")
+            else:
+                text = (await request.body()).decode("utf-8", errors="replace")
+            batch = BatchRequest(urls=parse_url_lines(text), **batch_query_options(request))
+    except (ValidationError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch request: {e}")
+
+    max_urls = int(os.getenv("BATCH_MAX_URLS", "50000"))
+    if len(batch.urls) > max_urls:
+        raise HTTPException(status_code=413, detail=f"Batch limited to {max_urls} URLs")
+
+    # Lexical features for the whole batch, extracted a chunk at a time
+    features = BatchFeatures(batch.urls, rule_packs.current)
+
+    async def analyze(url: str) -> URLResponse:
+        lexical = await features.record(url)
+        return await timed_response(batch.timings, url, batch.language, batch.force_refresh, lexical)
+
+    runner = BatchRunner(
+        analyze,
+        concurrency=min(batch.concurrency, int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))),
+        per_host=int(os.getenv("BATCH_PER_HOST", "2"))
+    )
+
+    async def stream():
+        async for url, response, error in runner.run(batch.urls):
+            if error is not None:
+                line = {"url": url, "error": f"Analysis failed: {error}"}
+            else:
+                line = response.model_dump(exclude_unset=True)
+            yield json.dumps(line, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+async def timed_response(timings: bool, *args) -> URLResponse:
+    """build_response(*args), with the request's stage timings attached if asked for"""
+    if not timings:
+        return await build_response(*args)
+    with TimingBreakdown() as breakdown:
+        response = await build_response(*args)
+    response.timings = breakdown.report()
+    return response
+
+async def build_response(url: str, language: str = "en", force_refresh: bool = False,
+                         lexical: Optional[dict] = None) -> URLResponse:
+    """Full /analyze-url pipeline for one URL"""
+    # Concurrent requests for the same URL share one analysis; a forced
+    # refresh only joins another refresh, never a run that may have used the cache
+    result = await analysis_flight.do(
+        f"refresh|{normalize_url(url)}" if force_refresh else normalize_url(url),
+        lambda: run_analysis(url, force_refresh=force_refresh, lexical=lexical)
+    )
+    trust_score = result["trust_score"]
+
+    # Step 4: Summary and recommendations in the requested language
+    summary = await translator.localize(summary_message(trust_score), language)
+    recommendations = await translator.localize(recommendation_message(trust_score), language)
+
+    return URLResponse(
+        url=url,
+        trust_score=trust_score,
+        risk_level=result["risk_level"],
+        summary=summary,
+        details=result["details"],
+        recommendations=recommendations
+    )
+
+async def run_analysis(url: str, force_refresh: bool = False, lexical: Optional[dict] = None) -> dict:
+    """Probe, score and persist one URL (language-independent part of /analyze-url)
+
+    ``lexical`` is a precomputed FeatureBatch record (see /analyze-batch).
+    """
+    key_hash = url_hash(url)
+    host = url_host(url)
+    origin = url_origin(url)
+    # One rule pack for the whole analysis, even if a reload lands mid-way
+    pack = rule_packs.current
+
+    # Step 0: Look up cached facts unless the caller wants a fresh verdict
+    if force_refresh:
+        verdict_cache.invalidate(key_hash, origin)
+        page_facts, domain_facts = None, None
+    else:
+        page_facts = await verdict_cache.get_page(key_hash, pack.version)
+        domain_facts = await verdict_cache.get_domain(origin)
+
+    # Staged analysis: cheap local checks first, stopping as soon as the
+    # remaining stages can no longer change the risk level
+    result = await pipeline.run(url, pack, lexical, page_facts, domain_facts)
+    url_data = result["url_data"]
+    ai_analysis = result["ai_analysis"]
+    remember_facts(key_hash, origin, url_data, ai_analysis, page_facts, domain_facts, pack.version)
+
+    # Step 3: Calculate trust score
+    trust_score = calculate_trust_score(url_data, ai_analysis)
+
+    # Determine risk level
+    risk_level = risk_level_for(trust_score)
+
+    details = {
+        "domain_info": url_data,
+        "ai_analysis": ai_analysis,
+        "probes": result["probes"],
+        "pipeline": result["pipeline"],
+        "rule_pack_version": pack.version
+    }
+
+    try:
+        await save_analysis({
+            "url": url,
+            "url_hash": key_hash,
+            "host": host,
+            "origin": origin,
+            "domain": registrable_domain(url),
+            "created_at": datetime.utcnow(),
+            "trust_score": trust_score,
+            "risk_level": risk_level,
+            "rule_pack_version": pack.version,
+            "summary": generate_summary(url_data, ai_analysis, trust_score),
+            "recommendations": generate_recommendations(trust_score),
+            "details": details
+        })
+    except Exception as db_error:
+        log.error("MongoDB save failed", extra={'url': url, 'error': repr(db_error)})
+
+    return {
+        "url_data": url_data,
+        "ai_analysis": ai_analysis,
+        "trust_score": trust_score,
+        "risk_level": risk_level,
+        "details": dict(details, cache={
+            "page": "hit" if page_facts else "miss",
+            "domain": "hit" if domain_facts else "miss"
+        })
+    }
+
+def remember_facts(key_hash: str, origin: str, url_data: dict, ai_analysis: dict,
+                   page_facts: dict, domain_facts: dict, rule_pack_version: str):
+    """Store freshly probed facts in the verdict cache (failed or skipped stages are not cached)"""
+    probes = url_data.get("probes", {})
+
+    if domain_facts is None and probes.get("ssl", {}).get("status") == "ok":
+        verdict_cache.set_domain(origin, {"ssl_info": url_data["ssl_details"]})
+
+    if page_facts is None and is_page_cacheable(url_data, ai_analysis):
+        verdict_cache.set_page(key_hash, {
+            "rule_pack_version": rule_pack_version,
+            "ai_analysis": ai_analysis,
+            "virustotal": {
+                "detections": url_data.get("virustotal_detections", 0),
+                "details": url_data.get("virustotal_details", {})
+            }
+        })
+
+def summary_message(trust_score: int) -> str:
+    """Catalog id of the summary for a trust score"""
     if trust_score >= 70:
-        return {
-            "english": "This URL appears to be safe to visit. No significant threats detected.",
-            "kannada": "ಈ ಲಿಂಕ್ ಸುರಕ್ಷಿತವಾಗಿ ಕಾಣುತ್ತದೆ. ಯಾವುದೇ ಗಮನಾರ್ಹ ಅಪಾಯಗಳು ಪತ್ತೆಯಾಗಿಲ್ಲ."
-        }
+        return "summary.safe"
     elif trust_score >= 40:
-        return {
-            "english": "This URL shows some suspicious characteristics. Exercise caution before visiting.",
-            "kannada": "ಈ ಲಿಂಕ್ ಕೆಲವು ಅನುಮಾನಾಸ್ಪದ ಲಕ್ಷಣಗಳನ್ನು ತೋರಿಸುತ್ತದೆ. ಭೇಟಿ ನೀಡುವ ಮೊದಲು ಎಚ್ಚರಿಕೆ ವಹಿಸಿ."
-        }
-    else:
-        return {
-            "english": "⚠️ WARNING: This URL appears to be a scam or phishing site. Do not visit or enter any personal information.",
-            "kannada": "⚠️ ಎಚ್ಚರಿಕೆ: ಈ ಲಿಂಕ್ ಮೋಸ ಅಥವಾ ಫಿಶಿಂಗ್ ಸೈಟ್ ಆಗಿ ಕಾಣುತ್ತದೆ. ಭೇಟಿ ನೀಡಬೇಡಿ ಅಥವಾ ಯಾವುದೇ ವೈಯಕ್ತಿಕ ಮಾಹಿತಿಯನ್ನು ನಮೂದಿಸಬೇಡಿ."
-        }
+        return "summary.suspicious"
+    return "summary.scam"
 
-def generate_recommendations(trust_score: int) -> dict:
-    """Generate safety recommendations"""
+def recommendation_message(trust_score: int) -> str:
+    """Catalog id of the safety recommendations for a trust score"""
     if trust_score >= 70:
-        return {
-            "english": "The site appears safe, but always verify the URL before entering sensitive information.",
-            "kannada": "ಸೈಟ್ ಸುರಕ್ಷಿತವಾಗಿ ಕಾಣುತ್ತದೆ, ಆದರೆ ಸೂಕ್ಷ್ಮ ಮಾಹಿತಿಯನ್ನು ನಮೂದಿಸುವ ಮೊದಲು ಯಾವಾಗಲೂ URL ಅನ್ನು ಪರಿಶೀಲಿಸಿ."
-        }
+        return "recommendation.safe"
     elif trust_score >= 40:
-        return {
-            "english": "Proceed with caution. Verify the sender and avoid entering personal information.",
-            "kannada": "ಎಚ್ಚರಿಕೆಯಿಂದ ಮುಂದುವರಿಯಿರಿ. ಕಳುಹಿಸಿದವರನ್ನು ಪರಿಶೀಲಿಸಿ ಮತ್ತು ವೈಯಕ್ತಿಕ ಮಾಹಿತಿಯನ್ನು ನಮೂದಿಸುವುದನ್ನು ತಪ್ಪಿಸಿ."
-        }
-    else:
-        return {
-            "english": "DO NOT visit this site. Block the sender and report as spam/phishing.",
-            "kannada": "ಈ ಸೈಟ್‌ಗೆ ಭೇಟಿ ನೀಡಬೇಡಿ. ಕಳುಹಿಸಿದವರನ್ನು ನಿರ್ಬಂಧಿಸಿ ಮತ್ತು ಸ್ಪ್ಯಾಮ್/ಫಿಶಿಂಗ್ ಆಗಿ ವರದಿ ಮಾಡಿ."
-        }
+        return "recommendation.suspicious"
+    return "recommendation.scam"
+
+def generate_summary(url_data: dict, ai_analysis: dict, trust_score: int) -> dict:
+    """Generate human-readable summary"""
+    return locales.lookup(summary_message(trust_score), "en")
+
+def generate_recommendations(trust_score: int) -> dict:
+    """Generate safety recommendations"""
+    return locales.lookup(recommendation_message(trust_score), "en")
 
 if __name__ == "__main__":
     import uvicorn
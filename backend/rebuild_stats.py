@@ -0,0 +1,88 @@
+"""Rebuild the risk_rollups collection from the stored analyses.
+
+    python rebuild_stats.py                        # all history up to the start of today (UTC)
+    python rebuild_stats.py --since 2024-06-01     # only buckets from that day on
+    python rebuild_stats.py --until 2024-07-01 --dry-run
+
+The API keeps the rollups current as analyses are saved; this job is for
+filling them from older history or repairing them. Buckets between --since
+and --until are deleted and recomputed from the analyses in that range.
+--until defaults to the start of the current UTC day: the running API only
+increments buckets of analyses it saves now, so complete days can be
+rebuilt while it serves traffic. Dashboards reading the range see partial
+counts until the job finishes. Analyses saved before ``created_at`` was
+recorded are placed by the time in their ObjectId.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from bson import ObjectId
+from dotenv import load_dotenv
+import pathlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv(dotenv_path=pathlib.Path(__file__).parent / ".env")
+
+from services.rollups import RiskRollups, bucket_start, increments
+
+PROJECTION = {'url': 1, 'host': 1, 'domain': 1, 'risk_level': 1, 'trust_score': 1, 'created_at': 1}
+
+async def rebuild(since: datetime, until: datetime, chunk: int, dry_run: bool):
+    from services.db import db
+    rollups = RiskRollups(db['risk_rollups'])
+    query = {'$or': [
+        {'created_at': {'$gte': since, '$lt': until}},
+        # Older documents have no created_at; their ObjectId holds the time
+        {'created_at': None, '_id': {'$gte': ObjectId.from_datetime(since), '$lt': ObjectId.from_datetime(until)}}
+    ]}
+    if not dry_run:
+        await rollups.ensure_indexes()
+        deleted = await db['risk_rollups'].delete_many({'bucket': {'$gte': since, '$lt': until}})
+        print(f"Deleted {deleted.deleted_count} buckets from {since:%Y-%m-%d} to {until:%Y-%m-%d}")
+
+    started = time.perf_counter()
+    docs, batch, buckets = 0, [], 0
+    async for doc in db['analyses'].find(query, PROJECTION):
+        batch.append(doc)
+        if len(batch) >= chunk:
+            buckets += await apply(rollups, batch, dry_run)
+            docs += len(batch)
+            batch = []
+            print(f"  {docs} analyses ({docs / (time.perf_counter() - started):.0f}/s)", file=sys.stderr)
+    if batch:
+        buckets += await apply(rollups, batch, dry_run)
+        docs += len(batch)
+    print(f"{'Would fold' if dry_run else 'Folded'} {docs} analyses into {buckets} bucket updates "
+          f"in {time.perf_counter() - started:.1f}s")
+    if rollups.counts['errors']:
+        print(f"{rollups.counts['errors']} bulk writes failed; rerun for the same range", file=sys.stderr)
+
+async def apply(rollups: RiskRollups, batch, dry_run: bool) -> int:
+    # Folding a whole chunk first turns thousands of analyses into one $inc per bucket
+    buckets = increments(batch)
+    if not dry_run:
+        await rollups.apply(buckets)
+    return len(buckets)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the risk_rollups collection from the analyses")
+    parser.add_argument('--since', type=datetime.fromisoformat, default=datetime(1970, 1, 1),
+                        help="first day to rebuild (UTC, default: all history)")
+    parser.add_argument('--until', type=datetime.fromisoformat,
+                        default=datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+                        help="end of the range, exclusive (UTC, default: start of today)")
+    parser.add_argument('--chunk', type=int, default=50000, help="analyses folded per bulk write")
+    parser.add_argument('--dry-run', action='store_true', help="count buckets without writing")
+    args = parser.parse_args()
+    # Whole days only, so no minute, hour or day bucket straddles the range
+    args.since, args.until = bucket_start(args.since, 'day'), bucket_start(args.until, 'day')
+    if args.since >= args.until:
+        parser.error("--since must be before --until")
+    asyncio.run(rebuild(args.since, args.until, args.chunk, args.dry_run))
+
+if __name__ == '__main__':
+    main()
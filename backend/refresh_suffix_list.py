@@ -0,0 +1,94 @@
+"""Update the bundled Public Suffix List snapshot.
+
+    python refresh_suffix_list.py                     # download from publicsuffix.org
+    python refresh_suffix_list.py --source list.dat   # copy a file fetched elsewhere
+    python refresh_suffix_list.py --check             # only report the bundled version
+
+The new list is checked (ICANN section present, a few known suffixes
+resolve) before it replaces data/public_suffix_list.dat, so a bad download
+never reaches the app. Lists without a '// VERSION:' header get one with
+the download time. Commit the updated file; running instances pick it up
+on their next start.
+"""
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import httpx
+import tldextract
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.suffixes import DEFAULT_SUFFIX_LIST_PATH, snapshot_version
+
+PSL_URL = "https://publicsuffix.org/list/public_suffix_list.dat"
+
+# (hostname, expected registrable domain)
+SANITY_CHECKS = [
+    ('www.example.com', 'example.com'),
+    ('a.b.example.co.uk', 'example.co.uk'),
+    ('shop.example.com.au', 'example.com.au'),
+    ('example.xn--p1ai', 'example.xn--p1ai'),
+]
+
+def fetch(source: str) -> str:
+    if os.path.exists(source):
+        with open(source, encoding='utf-8') as f:
+            return f.read()
+    response = httpx.get(source, timeout=30, follow_redirects=True)
+    response.raise_for_status()
+    return response.text
+
+def validate(text: str):
+    if '===BEGIN ICANN DOMAINS===' not in text:
+        raise ValueError("not a Public Suffix List (no ICANN section)")
+    with tempfile.NamedTemporaryFile('w', suffix='.dat', delete=False, encoding='utf-8') as f:
+        f.write(text)
+    try:
+        extractor = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(pathlib.Path(f.name).as_uri(),),
+                                          fallback_to_snapshot=False)
+        for host, expected in SANITY_CHECKS:
+            extracted = extractor(host)
+            got = f"{extracted.domain}.{extracted.suffix}"
+            if got != expected:
+                raise ValueError(f"{host} resolved to {got!r}, expected {expected!r}")
+    finally:
+        os.unlink(f.name)
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the bundled Public Suffix List snapshot")
+    parser.add_argument('--source', default=PSL_URL, help="URL or local file to take the list from")
+    parser.add_argument('-o', '--output', default=str(DEFAULT_SUFFIX_LIST_PATH))
+    parser.add_argument('--check', action='store_true', help="print the bundled version and exit")
+    args = parser.parse_args()
+
+    output = pathlib.Path(args.output)
+    installed = output.read_text(encoding='utf-8') if output.exists() else ''
+    current = snapshot_version(installed) if installed else None
+    if args.check:
+        print(f"{output}: {current}")
+        return
+
+    text = fetch(args.source)
+    if installed.endswith(text):
+        print(f"Suffix list unchanged ({current})")
+        return
+    if snapshot_version(text).startswith('sha256:'):
+        stamp = time.strftime('%Y-%m-%d_%H-%M-%S_UTC', time.gmtime())
+        text = f"// VERSION: {stamp}\n// SOURCE: {args.source}\n\n" + text
+    try:
+        validate(text)
+    except ValueError as e:
+        sys.exit(f"Refusing to install the new list: {e}")
+
+    version = snapshot_version(text)
+    # Write next to the target and rename, so readers never see half a file
+    tmp = output.with_suffix('.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, output)
+    print(f"Suffix list {current} -> {version} ({len(text.encode('utf-8'))} bytes) written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Offline bulk scanner: score a file of URLs without going through the HTTP API.
+
+    python scan.py urls.txt -o results.jsonl
+    cat urls.ndjson | python scan.py - -o results.jsonl --concurrency 64 --workers 8
+
+Input lines may be bare URLs, JSON strings or {"url": ...} objects. Network
+probes run on asyncio; page parsing and keyword matching run in a process
+pool. Results are appended to the output as JSON lines, so re-running the same
+command after a crash resumes where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dotenv import load_dotenv
+import pathlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv(dotenv_path=pathlib.Path(__file__).parent / ".env")
+
+from services.url_analyzer import URLAnalyzer
+from services.ai_analyzer import AIAnalyzer, init_worker
+from services.html_parser import ParsePool
+from services.batch import BatchRunner, dedupe_urls, parse_url_lines
+from services.http_client import http_clients
+from services.rulepack import rule_packs
+from services.features import BatchFeatures
+from services.prefilter import prefilter
+from services.reputation import reputation
+from services.suffixes import suffixes
+from services.fingerprint import FingerprintIndex
+from services.pipeline import AnalysisPipeline
+from services.scoring import calculate_trust_score, risk_level_for
+from services.url_utils import normalize_url
+
+def load_completed(output_path: str) -> set:
+    """Normalized URLs already scored in a previous run.
+
+    A line cut short by a crash is truncated away so appending stays valid.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+            data = data[:data.rfind(b'\n') + 1]
+
+    for line in data.decode('utf-8', errors='replace').splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if 'trust_score' in record:
+            done.add(normalize_url(record['url']))
+    return done
+
+def read_urls(source: str) -> list:
+    if source == '-':
+        return parse_url_lines(sys.stdin.read())
+    with open(source, encoding='utf-8', errors='replace') as f:
+        return parse_url_lines(f.read())
+
+class Progress:
+    """Periodic progress and throughput report on stderr"""
+
+    def __init__(self, total: int, interval: float):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def record(self, ok: bool):
+        self.done += 1
+        if not ok:
+            self.errors += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval or self.done == self.total:
+            self._last_report = now
+            self.report()
+
+    def report(self, final: bool = False):
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 else float('inf')
+        label = 'done' if final else 'progress'
+        print(f"[{label}] {self.done}/{self.total} scored, {self.errors} errors, "
+              f"{rate:.1f} URLs/s, elapsed {elapsed:.0f}s, ETA {remaining:.0f}s",
+              file=sys.stderr, flush=True)
+
+async def scan(args):
+    urls = dedupe_urls(read_urls(args.input))
+    completed = load_completed(args.output)
+    todo = [url for url in urls if normalize_url(url) not in completed]
+    print(f"{len(urls)} unique URLs, {len(urls) - len(todo)} already scored, {len(todo)} to go",
+          file=sys.stderr)
+
+    pool = ParsePool('process', workers=args.workers, initializer=init_worker)
+    url_analyzer = URLAnalyzer()
+    # In-memory only: clones within this scan share verdicts
+    fingerprints = FingerprintIndex()
+    ai_analyzer = AIAnalyzer(parse_pool=pool, fingerprints=fingerprints)
+
+    suffixes.load()
+    pack = rule_packs.current
+    features = BatchFeatures(todo, pack)
+    prefilter.load()
+    reputation.refresh()
+    pipeline = AnalysisPipeline(url_analyzer, ai_analyzer, prefilter, reputation)
+
+    async def score(url: str) -> dict:
+        lexical = await features.record(url)
+        result = await pipeline.run(url, pack, lexical)
+        url_data, ai_analysis = result['url_data'], result['ai_analysis']
+        trust_score = calculate_trust_score(url_data, ai_analysis)
+        return {
+            'url': url,
+            'trust_score': trust_score,
+            'risk_level': risk_level_for(trust_score),
+            'rule_pack_version': pack.version,
+            'details': {
+                'domain_info': url_data,
+                'ai_analysis': ai_analysis,
+                'pipeline': result['pipeline']
+            }
+        }
+
+    progress = Progress(len(todo), args.progress_interval)
+    runner = BatchRunner(score, concurrency=args.concurrency, per_host=args.per_host)
+    try:
+        with open(args.output, 'a', encoding='utf-8') as out:
+            async for url, record, error in runner.run(todo):
+                if error is not None:
+                    record = {'url': url, 'error': str(error)}
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                out.flush()
+                progress.record(error is None)
+    finally:
+        await http_clients.close()
+        await ai_analyzer.llm.close()
+        pool.shutdown()
+        progress.report(final=True)
+        if prefilter.model is not None:
+            print(f"prefilter: {prefilter.stats()}", file=sys.stderr)
+        print(f"pipeline: {pipeline.stats()}", file=sys.stderr)
+        print(f"fingerprints: {fingerprints.stats()}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-score URLs into a JSONL file")
+    parser.add_argument('input', help="file of URLs, or - for stdin")
+    parser.add_argument('-o', '--output', required=True, help="JSONL output (appended to; enables resume)")
+    parser.add_argument('--concurrency', type=int, default=32, help="analyses in flight at once")
+    parser.add_argument('--per-host', type=int, default=2, help="analyses in flight per host")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="parser processes")
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(scan(args))
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume.", file=sys.stderr)
+        sys.exit(130)
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,38 @@
-import requests
-from bs4 import BeautifulSoup
-import openai
 import os
-import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import asyncio
+from services.http_client import http_clients
+from services.html_parser import ParsePool, StreamingExtractor, default_parser_mode, parse_html
+from services.fingerprint import FingerprintIndex
+from services.llm_client import LLMClient
+from services.metrics import instrument, record_error, timed
+from services.rulepack import RulePack, rule_packs
 
 class AIAnalyzer:
-    def __init__(self):
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
-        
-        self.phishing_keywords = [
-            'urgent', 'verify', 'suspend', 'confirm', 'update',
-            'click here', 'act now', 'limited time', 'expire',
-            'congratulations', 'winner', 'prize', 'free gift',
-            'security alert', 'account locked', 'payment failed'
-        ]
-        
-        self.form_indicators = [
-            'password', 'credit card', 'ssn', 'social security',
-            'bank account', 'login', 'signin', 'card number'
-        ]
+    def __init__(self, parse_pool: Optional[ParsePool] = None, llm: Optional[LLMClient] = None,
+                 fingerprints: Optional[FingerprintIndex] = None):
+        # Optional bounded executor for page parsing (see _process_page)
+        self.parse_pool = parse_pool
+        self.parser_mode = default_parser_mode()
+        # Downloads stop at this many bytes; the rest of the page is ignored
+        self.max_page_bytes = int(os.getenv("MAX_PAGE_BYTES", str(2 * 1024 * 1024)))
+        # Shared async LLM client (concurrency limit, retries, verdict cache)
+        self.llm = llm or LLMClient()
+        # Near-duplicate pages (phishing-kit clones) reuse a stored AI verdict
+        self.fingerprints = fingerprints
     
-    async def analyze_content(self, url: str) -> Dict:
+    async def analyze_content(self, url: str, pack: Optional[RulePack] = None) -> Dict:
         """Analyze webpage content for phishing indicators"""
+        pack = pack or rule_packs.current
         try:
-            # Fetch webpage content
-            content_data = await self._fetch_webpage_content(url)
-            
-            if not content_data.get('success'):
-                return {
-                    'error': content_data.get('error', 'Failed to fetch content'),
-                    'is_phishing': False,
-                    'confidence': 0
-                }
-            
-            # Basic pattern analysis
-            basic_analysis = self._analyze_basic_patterns(content_data)
+            page = await self.analyze_page(url, pack)
+            if 'error' in page:
+                return page
             
             # AI-powered analysis
-            ai_analysis = await self._ai_content_analysis(content_data)
-            
-            # Combine results
-            combined_analysis = {
-                'is_phishing': basic_analysis['is_phishing'] or ai_analysis['is_phishing'],
-                'confidence': max(basic_analysis['confidence'], ai_analysis['confidence']),
-                'urgency_detected': basic_analysis['urgency_detected'],
-                'form_analysis': basic_analysis['form_analysis'],
-                'keyword_matches': basic_analysis['keyword_matches'],
-                'ai_reasoning': ai_analysis.get('reasoning', ''),
-                'content_summary': content_data.get('text', '')[:500] + '...' if len(content_data.get('text', '')) > 500 else content_data.get('text', '')
-            }
+            ai_analysis = await self.ai_content_analysis(page['content_data'], url)
             
-            return combined_analysis
+            return self.combine(page, ai_analysis, pack)
             
         except Exception as e:
             return {
@@ -63,85 +41,150 @@ class AIAnalyzer:
                 'confidence': 0
             }
     
+    async def analyze_page(self, url: str, pack: RulePack) -> Dict:
+        """Fetch and parse the page and run the basic pattern analysis.
+
+        Returns ``{'content_data', 'basic_analysis'}``, or an error result
+        shaped like analyze_content's when the page could not be fetched.
+        """
+        # Fetch webpage content
+        download = await self._fetch_webpage_content(url)
+        
+        if not download.get('success'):
+            return {
+                'error': download.get('error', 'Failed to fetch content'),
+                'is_phishing': False,
+                'confidence': 0
+            }
+        
+        # Parsing and basic pattern analysis
+        if 'content_data' in download:
+            # Already extracted while streaming
+            content_data = download['content_data']
+            with timed('ai_analyzer', 'parse'):
+                basic_analysis = self._analyze_basic_patterns(content_data, pack)
+        else:
+            content_data, basic_analysis = await self._process_page(download['content'], pack,
+                                                                    download.get('encoding'))
+        content_data['truncated'] = download['truncated']
+        return {'content_data': content_data, 'basic_analysis': basic_analysis}
+    
+    def combine(self, page: Dict, ai_analysis: Dict, pack: RulePack) -> Dict:
+        """Merge the basic pattern analysis of ``page`` with the AI verdict"""
+        basic_analysis = page['basic_analysis']
+        text = page['content_data'].get('text', '')
+        combined = {
+            'is_phishing': basic_analysis['is_phishing'] or ai_analysis['is_phishing'],
+            'confidence': max(basic_analysis['confidence'], ai_analysis['confidence']),
+            'urgency_detected': basic_analysis['urgency_detected'],
+            'form_analysis': basic_analysis['form_analysis'],
+            'keyword_matches': basic_analysis['keyword_matches'],
+            'rule_pack_version': pack.version,
+            'ai_reasoning': ai_analysis.get('reasoning', ''),
+            'content_summary': text[:500] + '...' if len(text) > 500 else text
+        }
+        if 'fingerprint_match' in ai_analysis:
+            combined['fingerprint_match'] = ai_analysis['fingerprint_match']
+        return combined
+    
+    @instrument('ai_analyzer', 'fetch')
     async def _fetch_webpage_content(self, url: str) -> Dict:
-        """Fetch and parse webpage content"""
+        """Stream the webpage, stopping at max_page_bytes.
+
+        In 'stream' parser mode the chunks are fed to a StreamingExtractor
+        as they arrive and the download stops once it has seen enough text;
+        the result then carries ``content_data`` instead of raw ``content``
+        (and the 'fetch' stage timing includes the HTML extraction). The
+        extractor runs in the parse pool, off the event loop. A process pool
+        cannot keep an extractor between chunks, so with one the page is
+        downloaded as in the other modes and parsed by _process_page.
+        """
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10, verify=False)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract text content
-            text_content = soup.get_text(separator=' ', strip=True)
+            chunks = []
+            size = 0
+            truncated = False
+            extractor = None
             
-            # Extract forms
-            forms = []
-            for form in soup.find_all('form'):
-                form_data = {
-                    'action': form.get('action', ''),
-                    'method': form.get('method', 'get'),
-                    'inputs': []
-                }
+            async with http_clients.fetch.stream('GET', url) as response:
+                response.raise_for_status()
+                if self.parser_mode == 'stream' and self._can_stream:
+                    extractor = StreamingExtractor(encoding=response.charset_encoding)
                 
-                for input_tag in form.find_all(['input', 'textarea', 'select']):
-                    form_data['inputs'].append({
-                        'type': input_tag.get('type', 'text'),
-                        'name': input_tag.get('name', ''),
-                        'placeholder': input_tag.get('placeholder', ''),
-                        'required': input_tag.get('required', False)
-                    })
-                
-                forms.append(form_data)
-            
-            # Extract links
-            links = [a.get('href', '') for a in soup.find_all('a', href=True)]
+                async for chunk in response.aiter_bytes():
+                    chunk = chunk[:self.max_page_bytes - size]
+                    size += len(chunk)
+                    if extractor is not None:
+                        await self._run_parse(extractor.feed_bytes, chunk)
+                    else:
+                        chunks.append(chunk)
+                    
+                    if size >= self.max_page_bytes or (extractor is not None and extractor.done):
+                        truncated = True
+                        break
             
-            # Extract title
-            title = soup.find('title')
-            title_text = title.get_text(strip=True) if title else ''
+            if extractor is not None:
+                await self._run_parse(extractor.feed_bytes, b'', True)
+                content_data = extractor.result()
+                content_data.update(success=True, html_length=size)
+                return {
+                    'success': True,
+                    'content_data': content_data,
+                    'truncated': truncated
+                }
             
             return {
                 'success': True,
-                'text': text_content,
-                'title': title_text,
-                'forms': forms,
-                'links': links,
-                'html_length': len(response.content)
+                'content': b''.join(chunks),
+                'encoding': response.charset_encoding,
+                'truncated': truncated
             }
             
         except Exception as e:
+            record_error('ai_analyzer', 'fetch', type(e).__name__)
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def _analyze_basic_patterns(self, content_data: Dict) -> Dict:
+    @property
+    def _can_stream(self) -> bool:
+        # A StreamingExtractor lives across chunks, so it needs this process
+        return self.parse_pool is None or self.parse_pool.kind != 'process'
+    
+    async def _run_parse(self, fn, *args):
+        """Run parsing work in the parse pool, or inline when there is none"""
+        if self.parse_pool is None:
+            return fn(*args)
+        return await self.parse_pool.run(fn, *args)
+    
+    @instrument('ai_analyzer', 'parse')
+    async def _process_page(self, content: bytes, pack: RulePack,
+                            encoding: Optional[str] = None) -> Tuple[Dict, Dict]:
+        """Parse the page and run the basic pattern analysis.
+
+        This is the CPU-bound part of the analysis; when a parse pool is set
+        it runs there instead of on the event loop.
+        """
+        if self.parse_pool is None:
+            content_data = parse_html(content, self.parser_mode, encoding)
+            return content_data, self._analyze_basic_patterns(content_data, pack)
+        
+        return await self.parse_pool.run(process_page, content, self.parser_mode, pack, encoding)
+    
+    def _analyze_basic_patterns(self, content_data: Dict, pack: RulePack) -> Dict:
         """Analyze content for basic phishing patterns"""
         text = content_data.get('text', '').lower()
         title = content_data.get('title', '').lower()
         forms = content_data.get('forms', [])
         
-        # Check for phishing keywords
-        keyword_matches = []
-        for keyword in self.phishing_keywords:
-            if keyword in text or keyword in title:
-                keyword_matches.append(keyword)
-        
-        # Check for urgency indicators
-        urgency_patterns = [
-            r'urgent.*action',
-            r'expire.*soon',
-            r'immediate.*attention',
-            r'within.*\d+.*hours?',
-            r'act.*now',
-            r'limited.*time'
+        # Phishing keywords (text or title) and urgency indicators (text only)
+        text_hits = set(pack.content_rules.scan(text))
+        title_hits = set(pack.content_rules.scan(title)) if title else set()
+        keyword_matches = [
+            rule.id for rule in pack.content_rules.rules
+            if rule.group == 'keyword' and (rule in text_hits or rule in title_hits)
         ]
-        
-        urgency_detected = any(re.search(pattern, text) for pattern in urgency_patterns)
+        urgency_detected = any(rule.group == 'urgency' for rule in text_hits)
         
         # Analyze forms
         form_analysis = {
@@ -153,10 +196,7 @@ class AIAnalyzer:
         for form in forms:
             form_text = ' '.join([inp.get('name', '') + ' ' + inp.get('placeholder', '') for inp in form.get('inputs', [])])
             
-            suspicious_indicators = []
-            for indicator in self.form_indicators:
-                if indicator in form_text.lower():
-                    suspicious_indicators.append(indicator)
+            suspicious_indicators = pack.form_rules.matches(form_text.lower())
             
             if suspicious_indicators:
                 form_analysis['suspicious_forms'].append({
@@ -184,9 +224,18 @@ class AIAnalyzer:
             'keyword_matches': keyword_matches
         }
     
-    async def _ai_content_analysis(self, content_data: Dict) -> Dict:
-        """Use AI to analyze content for phishing"""
-        if not self.openai_api_key:
+    @property
+    def llm_available(self) -> bool:
+        return self.llm.enabled
+    
+    async def ai_content_analysis(self, content_data: Dict, url: Optional[str] = None) -> Dict:
+        """Use AI to analyze content for phishing
+
+        A page that is a near-duplicate of one already judged gets that
+        verdict back (marked ``cached``, with ``fingerprint_match``) without
+        an LLM call.
+        """
+        if not self.llm.enabled:
             return {
                 'is_phishing': False,
                 'confidence': 0,
@@ -200,60 +249,41 @@ class AIAnalyzer:
             # Limit text length for API efficiency
             analysis_text = (title + ' ' + text)[:2000]
             
-            prompt = f"""
-            Analyze the following webpage content for phishing/scam indicators:
-            
-            Title: {title}
-            Content: {analysis_text}
-            
-            Consider these factors:
-            1. Urgency language and pressure tactics
-            2. Requests for personal/financial information
-            3. Grammatical errors and poor writing quality
-            4. Suspicious offers or claims
-            5. Impersonation of legitimate organizations
-            6. Fear-based messaging
-            
-            Respond with a JSON object containing:
-            - is_phishing: boolean
-            - confidence: number (0-100)
-            - reasoning: string explaining the analysis
-            - risk_factors: array of identified risk factors
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a cybersecurity expert specializing in phishing detection."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.1
-            )
-            
-            ai_response = response.choices[0].message.content
+            fingerprint = None
+            if self.fingerprints is not None:
+                async with timed('ai_analyzer', 'fingerprint'):
+                    fingerprint = self.fingerprints.fingerprint(content_data)
+                    match = await self.fingerprints.lookup(fingerprint) if fingerprint is not None else None
+                if match is not None:
+                    return dict(match['verdict'], cached=True, fingerprint_match={
+                        'url': match['url'],
+                        'similarity': match['similarity']
+                    })
             
-            # Try to parse JSON response
-            try:
-                import json
-                result = json.loads(ai_response)
-                return {
-                    'is_phishing': result.get('is_phishing', False),
-                    'confidence': result.get('confidence', 0),
-                    'reasoning': result.get('reasoning', ''),
-                    'risk_factors': result.get('risk_factors', [])
-                }
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                return {
-                    'is_phishing': 'phishing' in ai_response.lower() or 'scam' in ai_response.lower(),
-                    'confidence': 50,
-                    'reasoning': ai_response
-                }
+            async with timed('ai_analyzer', 'llm'):
+                verdict = await self.llm.analyze(title, analysis_text)
+            if fingerprint is not None and not verdict.get('cached'):
+                await self.fingerprints.add(fingerprint, verdict, url)
+            return verdict
                 
         except Exception as e:
             return {
                 'is_phishing': False,
                 'confidence': 0,
                 'reasoning': f'AI analysis failed: {str(e)}'
-            }
\ No newline at end of file
+            }
+
+# Per-process analyzer used by process_page in executor workers
+_worker_analyzer = None
+
+def init_worker():
+    """Process-pool initializer: build the analyzer once per worker"""
+    global _worker_analyzer
+    _worker_analyzer = AIAnalyzer()
+
+def process_page(content: bytes, mode: Optional[str] = None, pack: Optional[RulePack] = None,
+                 encoding: Optional[str] = None) -> Tuple[Dict, Dict]:
+    """Executor entry point: parse a page and run the basic pattern analysis"""
+    analyzer = _worker_analyzer or AIAnalyzer()
+    content_data = parse_html(content, mode, encoding)
+    return content_data, analyzer._analyze_basic_patterns(content_data, pack or rule_packs.current)
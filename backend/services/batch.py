@@ -0,0 +1,96 @@
+import asyncio
+import json
+from collections import Counter, OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+from services.url_utils import normalize_url, url_host
+
+def parse_url_lines(text: str) -> List[str]:
+    """URLs from an NDJSON/plain-text upload.
+
+    Each non-empty line may be a JSON string, a JSON object with a ``url``
+    field, or a bare URL.
+    """
+    urls = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] in '{"':
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                item = line
+            if isinstance(item, dict):
+                item = item.get('url', '')
+            line = str(item).strip()
+        if line:
+            urls.append(line)
+    return urls
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    """Drop URLs whose normalized form was already seen, keeping input order"""
+    seen = set()
+    unique = []
+    for url in urls:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+class BatchRunner:
+    """Run an async analysis over many URLs with bounded concurrency.
+
+    At most ``concurrency`` analyses run at once and at most ``per_host`` of
+    them target the same host. Hosts are served round-robin so one large
+    host cannot starve the rest. Results are yielded as
+    ``(url, result, error)`` in completion order.
+    """
+
+    def __init__(self, analyze: Callable[[str], Awaitable[Any]], concurrency: int = 8, per_host: int = 2):
+        self.analyze = analyze
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+
+    async def run(self, urls: Iterable[str]) -> AsyncIterator[Tuple[str, Any, Optional[BaseException]]]:
+        queues = OrderedDict()
+        for url in dedupe_urls(urls):
+            queues.setdefault(url_host(url), deque()).append(url)
+
+        hosts = deque(queues)
+        active = Counter()
+        running = {}
+
+        try:
+            while queues or running:
+                self._launch(queues, hosts, active, running)
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url, host = running.pop(task)
+                    active[host] -= 1
+                    if task.exception() is not None:
+                        yield url, None, task.exception()
+                    else:
+                        yield url, task.result(), None
+        finally:
+            # Client went away or the caller stopped iterating
+            for task in running:
+                task.cancel()
+
+    def _launch(self, queues, hosts, active, running):
+        while len(running) < self.concurrency and hosts:
+            for _ in range(len(hosts)):
+                host = hosts[0]
+                hosts.rotate(-1)
+                if active[host] < self.per_host:
+                    break
+            else:
+                return  # every remaining host is at its politeness limit
+
+            url = queues[host].popleft()
+            if not queues[host]:
+                del queues[host]
+                hosts.pop()  # the host just rotated to the end
+            task = asyncio.ensure_future(self.analyze(url))
+            running[task] = (url, host)
+            active[host] += 1
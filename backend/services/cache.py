@@ -0,0 +1,204 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from services.logs import get_logger
+from services.metrics import timed
+from services.url_utils import url_host
+
+log = get_logger('cache')
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+def is_page_cacheable(url_data: Dict, ai_analysis: Dict) -> bool:
+    """Whether an analysis has page facts worth reusing: the VirusTotal
+    probe succeeded and the content stage ran (not skipped, failed or cut
+    short by an early exit, which leaves ``ai_analysis`` empty). A verdict
+    whose LLM stage was skipped because the risk level was already decided
+    is not reused either: that decision rested on facts that may change."""
+    return (url_data.get('probes', {}).get('virustotal', {}).get('status') == 'ok'
+            and bool(ai_analysis) and 'error' not in ai_analysis and 'skipped' not in ai_analysis
+            and ai_analysis.get('llm_skipped') != 'decided')
+
+class VerdictCache:
+    """Two-tier cache of analysis facts.
+
+    Page-level facts (AI content analysis and the VirusTotal report) are keyed
+    by the normalized URL; domain-level facts (the TLS probe) are keyed by
+    origin (scheme, host and port) and live longer. Only https origins are
+    cached: the probe of a plain-http URL costs nothing and says nothing
+    about the server's certificate. The first tier is an in-process TTLCache; the
+    optional shared tier reads recent documents back from the Mongo
+    ``analyses`` collection so a verdict computed on one worker is reused by
+    the others.
+    """
+
+    def __init__(self, collection=None):
+        self.page_ttl = float(os.getenv("CACHE_PAGE_TTL", "900"))
+        self.domain_ttl = float(os.getenv("CACHE_DOMAIN_TTL", "21600"))
+        maxsize = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+        self.pages = TTLCache(maxsize=maxsize, ttl=self.page_ttl)
+        self.domains = TTLCache(maxsize=maxsize, ttl=self.domain_ttl)
+        self.collection = collection
+        self.shared_hits = {'page': 0, 'domain': 0}
+        self.shared_misses = {'page': 0, 'domain': 0}
+
+    async def get_page(self, key_hash: str, rule_pack_version: Optional[str] = None) -> Optional[Dict]:
+        """Cached {'ai_analysis', 'virustotal'} for a URL hash
+
+        With ``rule_pack_version``, facts produced under another rule pack
+        count as a miss.
+        """
+        facts = self.pages.get(key_hash)
+        if facts is not None and rule_pack_version and facts.get('rule_pack_version') != rule_pack_version:
+            facts = None
+        if facts is not None or self.collection is None:
+            return facts
+
+        # Only reuse documents whose VirusTotal probe succeeded and whose
+        # content analysis actually ran (an early exit stores {}) and succeeded
+        query = {
+            'url_hash': key_hash,
+            'details.domain_info.probes.virustotal.status': 'ok',
+            'details.ai_analysis.is_phishing': {'$exists': True},
+            'details.ai_analysis.error': {'$exists': False},
+            'details.ai_analysis.skipped': {'$exists': False},
+            'details.ai_analysis.llm_skipped': {'$ne': 'decided'}
+        }
+        if rule_pack_version:
+            query['rule_pack_version'] = rule_pack_version
+        doc = await self._find_shared('page', query, self.page_ttl, {
+            'details.ai_analysis': 1,
+            'details.domain_info.probes': 1,
+            'details.domain_info.virustotal_detections': 1,
+            'details.domain_info.virustotal_details': 1
+        })
+        if doc is None:
+            return None
+
+        details = doc.get('details', {})
+        url_data = details.get('domain_info', {})
+        if not is_page_cacheable(url_data, details.get('ai_analysis') or {}):
+            return None
+        facts = {
+            'rule_pack_version': rule_pack_version,
+            'ai_analysis': details.get('ai_analysis'),
+            'virustotal': {
+                'detections': url_data.get('virustotal_detections', 0),
+                'details': url_data.get('virustotal_details', {})
+            }
+        }
+        self.pages.set(key_hash, facts)
+        return facts
+
+    async def get_domain(self, origin: str) -> Optional[Dict]:
+        """Cached {'ssl_info'} for an https origin (see url_origin)"""
+        if not origin.startswith('https://'):
+            return None
+        facts = self.domains.get(origin)
+        if facts is not None or self.collection is None:
+            return facts
+
+        # host leads so the host_created index serves the query
+        query = {'host': url_host(origin), 'origin': origin, 'details.domain_info.probes.ssl.status': 'ok'}
+        doc = await self._find_shared('domain', query, self.domain_ttl, {
+            'details.domain_info.ssl_details': 1
+        })
+        if doc is None:
+            return None
+
+        ssl_info = doc.get('details', {}).get('domain_info', {}).get('ssl_details')
+        if ssl_info is None:
+            return None
+        facts = {'ssl_info': ssl_info}
+        self.domains.set(origin, facts)
+        return facts
+
+    def set_page(self, key_hash: str, facts: Dict):
+        self.pages.set(key_hash, facts)
+
+    def set_domain(self, origin: str, facts: Dict):
+        if origin.startswith('https://'):
+            self.domains.set(origin, facts)
+
+    def invalidate(self, key_hash: str, origin: str):
+        self.pages.pop(key_hash)
+        self.domains.pop(origin)
+
+    async def _find_shared(self, tier: str, query: Dict, ttl: float, projection: Dict) -> Optional[Dict]:
+        query = dict(query, created_at={'$gte': datetime.utcnow() - timedelta(seconds=ttl)})
+        try:
+            async with timed('db', f'cache_{tier}'):
+                doc = await self.collection.find_one(query, projection, sort=[('created_at', -1)])
+        except Exception as e:
+            log.warning("Shared cache lookup failed", extra={'tier': tier, 'error': str(e)})
+            doc = None
+
+        if doc is None:
+            self.shared_misses[tier] += 1
+        else:
+            self.shared_hits[tier] += 1
+        return doc
+
+    def stats(self) -> Dict:
+        return {
+            'page': dict(self.pages.stats(), ttl=self.page_ttl,
+                         shared_hits=self.shared_hits['page'],
+                         shared_misses=self.shared_misses['page']),
+            'domain': dict(self.domains.stats(), ttl=self.domain_ttl,
+                           shared_hits=self.shared_hits['domain'],
+                           shared_misses=self.shared_misses['domain']),
+            'shared_tier': self.collection is not None
+        }
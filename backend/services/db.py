@@ -1,17 +1,311 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
+import asyncio
+import base64
+import binascii
+import copy
 import os
-load_dotenv() 
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from services.rollups import RiskRollups, analysis_domain, analysis_time
+from services.url_utils import url_hash, url_host, url_origin
+from services.logs import get_logger
+from services.metrics import instrument
+load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 client = AsyncIOMotorClient(MONGO_URI)
 db = client["surakshak"]
 
+log = get_logger('db')
+
+def slim_analysis(doc: Dict) -> Dict:
+    """Copy of an analysis document without the bulky raw payloads.
+
+    The full VirusTotal report (one entry per engine) becomes a summary of
+    the engines that flagged the URL, and the page text excerpt is dropped.
+    Everything the verdict cache and the history views read is kept.
+    """
+    doc = copy.copy(doc)
+    details = doc.get('details')
+    if not details:
+        return doc
+    details = doc['details'] = dict(details)
+
+    url_data = details.get('domain_info')
+    if url_data and 'virustotal_details' in url_data:
+        report = url_data['virustotal_details'] or {}
+        url_data = details['domain_info'] = dict(url_data)
+        url_data['virustotal_details'] = {
+            'positives': report.get('positives', 0),
+            'total': report.get('total', 0),
+            'scan_date': report.get('scan_date', ''),
+            'permalink': report.get('permalink'),
+            'flagged_by': {engine: scan.get('result') for engine, scan in (report.get('scans') or {}).items()
+                           if isinstance(scan, dict) and scan.get('detected')}
+        }
+
+    ai_analysis = details.get('ai_analysis')
+    if ai_analysis and 'content_summary' in ai_analysis:
+        details['ai_analysis'] = {k: v for k, v in ai_analysis.items() if k != 'content_summary'}
+    return doc
+
+class AnalysisWriter:
+    """Write-behind buffer for the ``analyses`` collection.
+
+    ``save`` queues the document and returns; a background task writes the
+    queue with ``insert_many`` once ANALYSIS_BATCH_SIZE documents are waiting
+    or ANALYSIS_FLUSH_MS after the first one, whichever comes first. The
+    queue holds at most ANALYSIS_QUEUE_SIZE documents: when Mongo falls
+    behind, ``save`` waits for room instead of buffering without bound.
+    Failed batches are retried ANALYSIS_WRITE_RETRIES times with backoff,
+    then dropped and counted. ``close`` flushes what is left. Documents
+    that were written are added to ``rollups``, if given.
+
+    ANALYSIS_SCHEMA=slim stores documents through ``slim_analysis``.
+    ANALYSIS_WRITE_BEHIND=false (or a writer that was never started, as in
+    scripts) writes each document inline with ``insert_one``.
+    """
+
+    def __init__(self, collection, rollups: Optional[RiskRollups] = None):
+        self.collection = collection
+        self.rollups = rollups
+        self.batch_size = max(1, int(os.getenv("ANALYSIS_BATCH_SIZE", "100")))
+        self.flush_interval = float(os.getenv("ANALYSIS_FLUSH_MS", "200")) / 1000
+        self.queue_size = int(os.getenv("ANALYSIS_QUEUE_SIZE", "5000"))
+        self.retries = int(os.getenv("ANALYSIS_WRITE_RETRIES", "3"))
+        self.close_timeout = float(os.getenv("ANALYSIS_CLOSE_TIMEOUT", "10"))
+        self.schema = os.getenv("ANALYSIS_SCHEMA", "full").lower()
+        self.write_behind = os.getenv("ANALYSIS_WRITE_BEHIND", "true").lower() not in ("0", "false", "no")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counts = {'queued': 0, 'written': 0, 'batches': 0, 'inline': 0,
+                       'retries': 0, 'dropped': 0, 'backpressure_waits': 0}
+        self.max_depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.write_behind and not self.running:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    @instrument('db', 'save')
+    async def save(self, doc: Dict):
+        if self.schema == 'slim':
+            doc = slim_analysis(doc)
+        if not self.running:
+            await self.collection.insert_one(doc)
+            self.counts['inline'] += 1
+            if self.rollups is not None:
+                await self.rollups.record([doc])
+            return
+        if self._queue.full():
+            self.counts['backpressure_waits'] += 1
+        await self._queue.put(doc)
+        self.counts['queued'] += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    async def close(self):
+        """Flush the queue (bounded by ANALYSIS_CLOSE_TIMEOUT) and stop the writer"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), self.close_timeout)
+        except asyncio.TimeoutError:
+            log.error("Analysis writer closed with documents unwritten", extra={'unwritten': self._queue.qsize()})
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                written = await self._write(batch)
+                if self.rollups is not None:
+                    await self.rollups.record(written)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @instrument('db', 'insert_many')
+    async def _write(self, batch: List[Dict]) -> List[Dict]:
+        """insert_many with retries; returns the documents that were written"""
+        written = []
+        for attempt in range(self.retries + 1):
+            try:
+                await self.collection.insert_many(batch, ordered=False)
+                self.counts['written'] += len(batch)
+                self.counts['batches'] += 1
+                return written + batch
+            except Exception as e:
+                details = getattr(e, 'details', None)
+                if isinstance(details, dict) and 'writeErrors' in details:
+                    # Unordered bulk insert: only the listed documents failed, and a
+                    # duplicate key is a document an earlier attempt already wrote
+                    failed = {err['index'] for err in details['writeErrors'] if err.get('code') != 11000}
+                    self.counts['written'] += len(batch) - len(failed)
+                    written += [doc for i, doc in enumerate(batch) if i not in failed]
+                    batch = [doc for i, doc in enumerate(batch) if i in failed]
+                    if not batch:
+                        self.counts['batches'] += 1
+                        return written
+                if attempt == self.retries:
+                    self.counts['dropped'] += len(batch)
+                    log.error("Analysis batch dropped", extra={'documents': len(batch), 'error': repr(e)})
+                    return written
+                self.counts['retries'] += 1
+                await asyncio.sleep(min(0.2 * 2 ** attempt, 5))
+
+    def stats(self) -> Dict:
+        return dict(self.counts, write_behind=self.running, schema=self.schema,
+                    depth=self._queue.qsize() if self._queue is not None else 0,
+                    max_depth=self.max_depth, batch_size=self.batch_size,
+                    flush_ms=self.flush_interval * 1000, queue_size=self.queue_size)
+
+# Shared rollups and writer for the API process
+risk_rollups = RiskRollups(db["risk_rollups"])
+analysis_writer = AnalysisWriter(db["analyses"], rollups=risk_rollups)
+
 async def save_analysis(result: dict):
-    await db["analyses"].insert_one(result)
+    await analysis_writer.save(result)
+
+# (keys, name) of the analyses indexes, created at startup by ensure_indexes.
+# Every list query sorts newest first with _id as the tie-breaker, so the
+# sort is part of each index and keyset pages never scan skipped documents.
+ANALYSIS_INDEXES = [
+    ([('url_hash', 1), ('created_at', -1)], 'url_hash_created'),
+    ([('host', 1), ('created_at', -1)], 'host_created'),
+    ([('domain', 1), ('created_at', -1), ('_id', -1)], 'domain_created'),
+    ([('risk_level', 1), ('created_at', -1), ('_id', -1)], 'risk_level_created'),
+    ([('created_at', -1), ('_id', -1)], 'created')
+]
+
+# Fields of a history entry; the details blob is never read for listings
+HISTORY_PROJECTION = {
+    'url': 1, 'domain': 1, 'host': 1, 'trust_score': 1, 'risk_level': 1,
+    'created_at': 1, 'rule_pack_version': 1
+}
+
+async def ensure_indexes(collection=None):
+    """Create the analyses indexes (a no-op for the ones that exist)"""
+    collection = db["analyses"] if collection is None else collection
+    for keys, name in ANALYSIS_INDEXES:
+        try:
+            await collection.create_index(keys, name=name, background=True)
+        except Exception as e:
+            log.warning("Index not created", extra={'index': name, 'error': repr(e)})
+    await risk_rollups.ensure_indexes()
+
+def encode_cursor(doc: Dict) -> str:
+    """Opaque keyset cursor pointing just after ``doc``"""
+    created_at = doc.get('created_at')
+    raw = f"{created_at.isoformat() if created_at else ''}|{doc['_id']}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        created_at, _id = raw.split('|')
+        return datetime.fromisoformat(created_at) if created_at else None, ObjectId(_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, InvalidId):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def history_query(domain: Optional[str] = None, risk_level: Optional[str] = None,
+                  cursor: Optional[str] = None) -> Dict:
+    """Filter for one page of history, newest first, starting after ``cursor``
+
+    Documents saved before ``created_at`` was recorded (see
+    backfill_analyses) sort after all others, newest ``_id`` first.
+    """
+    query = {}
+    if domain:
+        query['domain'] = domain
+    if risk_level:
+        query['risk_level'] = risk_level
+    if cursor:
+        created_at, _id = decode_cursor(cursor)
+        if created_at is None:
+            query.update(created_at=None, _id={'$lt': _id})
+        else:
+            query['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': _id}},
+                {'created_at': None}
+            ]
+    return query
+
+HISTORY_SORT = [('created_at', -1), ('_id', -1)]
+
+@instrument('db', 'history')
+async def get_history(domain: Optional[str] = None, risk_level: Optional[str] = None,
+                      limit: int = 20, cursor: Optional[str] = None, collection=None) -> Dict:
+    """One page of analyses, newest first: {'items', 'next_cursor'}
+
+    Raises ValueError for a malformed cursor.
+    """
+    collection = db["analyses"] if collection is None else collection
+    query = history_query(domain, risk_level, cursor)
+    # One extra document tells whether there is a next page
+    docs = await collection.find(query, HISTORY_PROJECTION).sort(HISTORY_SORT).limit(limit + 1) \
+        .to_list(length=limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    items = []
+    for doc in docs[:limit]:
+        doc.setdefault('created_at', analysis_time(doc))
+        doc['id'] = str(doc.pop('_id'))
+        items.append(doc)
+    return {'items': items, 'next_cursor': next_cursor}
 
 async def get_recent_logs(limit=10):
+    """The ``limit`` most recent analyses, full documents, newest first"""
     cursor = db["analyses"].find().sort("_id", -1).limit(limit)
     return await cursor.to_list(length=limit)
 
+def backfill_fields(doc: Dict) -> Dict:
+    """Indexed fields missing from an analysis document saved before they existed"""
+    fields = {'created_at': analysis_time(doc)}
+    url = doc.get('url')
+    if url:
+        fields.update(url_hash=url_hash(url), host=url_host(url), origin=url_origin(url),
+                      domain=analysis_domain(doc))
+    return {key: value for key, value in fields.items() if key not in doc}
 
+@instrument('db', 'backfill')
+async def backfill_analyses(collection=None, chunk: int = 1000) -> int:
+    """Add created_at, url_hash, host, origin and domain to analyses saved
+    before those fields were recorded, so they sort, page and filter like
+    new ones. Returns the number of documents updated; safe to rerun."""
+    collection = db["analyses"] if collection is None else collection
+    projection = {'url': 1, 'created_at': 1, 'url_hash': 1, 'host': 1, 'origin': 1, 'domain': 1}
+    updated, requests = 0, []
+    async for doc in collection.find({'created_at': {'$exists': False}}, projection):
+        requests.append(UpdateOne({'_id': doc['_id']}, {'$set': backfill_fields(doc)}))
+        if len(requests) >= chunk:
+            updated += (await collection.bulk_write(requests, ordered=False)).modified_count
+            requests = []
+    if requests:
+        updated += (await collection.bulk_write(requests, ordered=False)).modified_count
+    return updated
@@ -0,0 +1,228 @@
+import asyncio
+import ipaddress
+import numpy as np
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, List, Optional, Sequence
+from services.rulepack import RulePack, rule_packs
+from services.suffixes import suffixes
+from services.url_utils import ensure_scheme
+
+# Columns of FeatureBatch.matrix, in order
+FEATURE_NAMES = (
+    'url_length',
+    'host_length',
+    'path_length',
+    'entropy',              # Shannon entropy of the URL bytes, bits per byte
+    'digit_ratio',
+    'special_ratio',        # non-alphanumeric bytes
+    'subdomain_depth',
+    'host_labels',
+    'is_https',
+    'has_port',
+    'is_ip_host',
+    'suspicious_tld',
+    'is_shortened',
+    'pattern_hits',         # len(suspicious_patterns), as used by the score
+    'suspicious_subdomain',
+    'typosquat_distance',   # closest brand, max_distance + 1 when none
+    'typosquat_score',
+)
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Rows per bincount when computing byte histograms (bounds the n x 256 array)
+ENTROPY_CHUNK = 4096
+
+class FeatureBatch:
+    """Lexical features for a list of URLs.
+
+    ``matrix`` is an (n, len(FEATURE_NAMES)) float32 array; ``records``
+    holds the per-URL details URLAnalyzer reports (domain_info,
+    suspicious_patterns, is_shortened).
+    """
+
+    def __init__(self, urls: List[str], records: List[Dict], matrix: np.ndarray, rule_pack_version: str):
+        self.urls = urls
+        self.records = records
+        self.matrix = matrix
+        self.rule_pack_version = rule_pack_version
+
+    def __len__(self):
+        return len(self.urls)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.matrix[:, FEATURE_INDEX[name]]
+
+    def row(self, i: int) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(FEATURE_NAMES, self.matrix[i])}
+
+    def record(self, i: int) -> Dict:
+        """Everything URLAnalyzer needs for URL ``i``, features included"""
+        return dict(self.records[i], lexical_features=self.row(i),
+                    rule_pack_version=self.rule_pack_version)
+
+def extract_features(urls: Sequence[str], pack: Optional[RulePack] = None) -> FeatureBatch:
+    """Parse each URL once and build its lexical checks and feature row.
+
+    Character statistics are computed for the whole batch at once with
+    NumPy; host-level checks (rule pack lookups, typosquatting) run per URL
+    on the single parse.
+    """
+    pack = pack or rule_packs.current
+    urls = [ensure_scheme(url) for url in urls]
+    matrix = np.zeros((len(urls), len(FEATURE_NAMES)), dtype=np.float32)
+    if not urls:
+        return FeatureBatch(urls, [], matrix, pack.version)
+
+    _string_stats(urls, matrix)
+    records = []
+    typosquat_memo: Dict[str, List] = {}  # batches often repeat a domain
+    for i, url in enumerate(urls):
+        try:
+            record, values = _analyze_one(url, pack, typosquat_memo)
+        except ValueError as e:  # e.g. a malformed IPv6 host
+            record = {'domain_info': {'error': str(e)}, 'suspicious_patterns': [], 'is_shortened': False}
+            values = {}
+        records.append(record)
+        for name, value in values.items():
+            matrix[i, FEATURE_INDEX[name]] = value
+    return FeatureBatch(urls, records, matrix, pack.version)
+
+def _string_stats(urls: List[str], matrix: np.ndarray):
+    encoded = [url.encode('utf-8', errors='replace') for url in urls]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    flat = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(encoded)), lengths)
+    safe_lengths = np.maximum(lengths, 1)
+
+    is_digit = (flat >= ord('0')) & (flat <= ord('9'))
+    is_alpha = ((flat | 0x20) >= ord('a')) & ((flat | 0x20) <= ord('z'))
+    digits = np.bincount(rows, weights=is_digit, minlength=len(encoded))
+    alnum = np.bincount(rows, weights=is_digit | is_alpha, minlength=len(encoded))
+
+    matrix[:, FEATURE_INDEX['url_length']] = lengths
+    matrix[:, FEATURE_INDEX['digit_ratio']] = digits / safe_lengths
+    matrix[:, FEATURE_INDEX['special_ratio']] = (lengths - alnum) / safe_lengths
+
+    # Per-row byte histograms, a chunk of rows at a time
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    entropy = matrix[:, FEATURE_INDEX['entropy']]
+    for start in range(0, len(encoded), ENTROPY_CHUNK):
+        stop = min(start + ENTROPY_CHUNK, len(encoded))
+        chunk = slice(offsets[start], offsets[stop])
+        counts = np.bincount((rows[chunk] - start) * 256 + flat[chunk],
+                             minlength=(stop - start) * 256).reshape(stop - start, 256)
+        p = counts / safe_lengths[start:stop, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            entropy[start:stop] = -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1)
+
+def _analyze_one(url: str, pack: RulePack, typosquat_memo: Dict[str, List]):
+    parsed = urlparse(url)
+    hostname = parsed.hostname or ''
+    extracted = suffixes.extract(parsed.netloc)
+    labels = hostname.split('.') if hostname else []
+
+    # Suspicious patterns in the URL, excessive subdomains, suspicious TLD
+    suspicious_patterns = pack.url_rules.matches(url.lower())
+    tld = pack.suspicious_tld(hostname) if hostname else None
+    if hostname:
+        if len(labels) - 2 > 3:
+            suspicious_patterns.append('excessive_subdomains')
+        if tld:
+            suspicious_patterns.append(f'suspicious_tld_.{tld}')
+
+    is_shortened = bool(hostname) and pack.is_shortener(hostname)
+    values = {
+        'host_length': len(hostname),
+        'path_length': len(parsed.path) + len(parsed.query),
+        'subdomain_depth': len(extracted.subdomain.split('.')) if extracted.subdomain else 0,
+        'host_labels': len(labels),
+        'is_https': parsed.scheme == 'https',
+        'is_ip_host': _is_ip(hostname),
+        'suspicious_tld': tld is not None,
+        'is_shortened': is_shortened,
+        'pattern_hits': len(suspicious_patterns),
+        'typosquat_distance': pack.typosquat.max_distance + 1
+    }
+
+    try:
+        typosquat_matches = typosquat_memo.get(extracted.domain)
+        if typosquat_matches is None:
+            typosquat_matches = typosquat_memo[extracted.domain] = pack.typosquat.lookup(extracted.domain)
+        typosquat_score = min(len(typosquat_matches) * 50, 100)
+        suspicious_subdomain = _suspicious_subdomain(extracted.subdomain, pack)
+        domain_info = {
+            'domain': extracted.domain,
+            'suffix': extracted.suffix,
+            'subdomain': extracted.subdomain,
+            'full_domain': f"{extracted.domain}.{extracted.suffix}",
+            'path': parsed.path,
+            'query_params': parse_qs(parsed.query),
+            'scheme': parsed.scheme,
+            'port': parsed.port,
+            'suspicious_subdomain': suspicious_subdomain,
+            'typosquatting_score': typosquat_score,
+            'typosquatting_matches': [match._asdict() for match in typosquat_matches[:5]]
+        }
+        values.update(
+            has_port=parsed.port is not None,
+            suspicious_subdomain=suspicious_subdomain,
+            typosquat_score=typosquat_score
+        )
+        if typosquat_matches:
+            values['typosquat_distance'] = typosquat_matches[0].distance
+    except Exception as e:
+        domain_info = {'error': str(e)}
+
+    record = {
+        'domain_info': domain_info,
+        'suspicious_patterns': suspicious_patterns,
+        'is_shortened': is_shortened
+    }
+    return record, values
+
+def _suspicious_subdomain(subdomain: str, pack: RulePack) -> bool:
+    """Random-looking subdomain or one containing a security term"""
+    if not subdomain:
+        return False
+    if len(subdomain) > 8 and subdomain.isalnum():
+        return True
+    return bool(pack.security_rules.scan(subdomain.lower()))
+
+def _is_ip(hostname: str) -> bool:
+    if not hostname or not (hostname[0].isdigit() or ':' in hostname):
+        return False  # skip the (slow) parse for ordinary names
+    try:
+        ipaddress.ip_address(hostname)
+        return True
+    except ValueError:
+        return False
+
+class BatchFeatures:
+    """Lexical records for a batch of URLs, extracted a chunk at a time.
+
+    The batch endpoints look URLs up as their analyses start; the chunk a
+    URL belongs to is extracted in a worker thread on first use, so the
+    first results stream out without waiting for the whole batch.
+    """
+
+    def __init__(self, urls: Sequence[str], pack: Optional[RulePack] = None, chunk_size: int = 512):
+        self.urls = list(dict.fromkeys(urls))
+        self.pack = pack or rule_packs.current
+        self.chunk_size = chunk_size
+        self._index = {url: i for i, url in enumerate(self.urls)}
+        self._chunks: Dict[int, asyncio.Future] = {}
+
+    async def record(self, url: str) -> Optional[Dict]:
+        i = self._index.get(url)
+        if i is None:
+            return None
+        chunk = i // self.chunk_size
+        future = self._chunks.get(chunk)
+        if future is None:
+            start = chunk * self.chunk_size
+            future = asyncio.ensure_future(asyncio.to_thread(
+                extract_features, self.urls[start:start + self.chunk_size], self.pack
+            ))
+            self._chunks[chunk] = future
+        batch = await future
+        return batch.record(i - chunk * self.chunk_size)
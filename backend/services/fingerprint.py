@@ -0,0 +1,234 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+import numpy as np
+from services.logs import get_logger
+
+log = get_logger('fingerprint')
+
+PERMUTATIONS = 64
+BANDS = 16  # 16 bands of 4 rows: pages above ~0.5 similarity almost always share a band
+ROWS = PERMUTATIONS // BANDS
+MAX_TEXT_TOKENS = 3000
+
+# Fixed seed: signatures are stored in Mongo and must match across processes
+_rng = np.random.default_rng(20240601)
+_MULTIPLIERS = _rng.integers(1, 2 ** 63, size=PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_OFFSETS = _rng.integers(0, 2 ** 63, size=PERMUTATIONS, dtype=np.uint64)
+
+_TOKEN = re.compile(r'\w+')
+
+def page_features(content_data: Dict) -> Set[str]:
+    """Features of a parsed page: text shingles, form structure and links.
+
+    Everything that changes between clones of a phishing kit (the host it
+    is served from, query strings, per-victim tokens) is left out or kept
+    to a single feature, so two copies of the same kit produce nearly the
+    same set.
+    """
+    features = set()
+    tokens = _TOKEN.findall(content_data.get('text', '').lower())[:MAX_TEXT_TOKENS]
+    for i in range(max(len(tokens) - 2, 0)):
+        features.add('t:' + ' '.join(tokens[i:i + 3]))
+
+    title = ' '.join(_TOKEN.findall(content_data.get('title', '').lower()))
+    if title:
+        features.add('title:' + title)
+
+    for form in content_data.get('forms', []):
+        action = urlsplit(form.get('action') or '').path
+        features.add(f"form:{(form.get('method') or 'get').lower()}:{action}")
+        for field in form.get('inputs', []):
+            features.add(f"input:{field.get('type', 'text')}:{field.get('name', '')}")
+
+    for href in content_data.get('links', []):
+        try:
+            parts = urlsplit(href or '')
+        except ValueError:
+            continue
+        features.add('link:' + parts.path)
+        if parts.hostname:
+            features.add('linkhost:' + parts.hostname)
+    return features
+
+def minhash(features: Set[str]) -> np.ndarray:
+    """MinHash signature: per permutation, the smallest hash over the features"""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+         for feature in features),
+        dtype=np.uint64, count=len(features)
+    )
+    # Multiply-shift hashing; uint64 arithmetic wraps, the top 32 bits are the permuted value
+    permuted = (hashes[:, None] * _MULTIPLIERS + _OFFSETS) >> np.uint64(32)
+    return permuted.min(axis=0).astype(np.uint32)
+
+def bands(signature: np.ndarray) -> List[str]:
+    """LSH keys: one hash per band of ROWS signature values"""
+    return [f"{i}:{hashlib.blake2b(signature[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+            for i in range(BANDS)]
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two pages' feature sets"""
+    return float(np.count_nonzero(a == b)) / PERMUTATIONS
+
+class FingerprintIndex:
+    """Near-duplicate page index that lets clones reuse an AI verdict.
+
+    Pages are reduced to a 64-value MinHash signature over their text
+    shingles, form structure and link set. The signature is split into 16
+    bands (an LSH table per band), so a stored page only becomes a
+    candidate when a whole band matches - likely above about 0.5 similarity
+    and vanishingly rare for unrelated pages - and candidates are then
+    checked against FINGERPRINT_MIN_SIMILARITY. The in-process tables hold
+    the most recent FINGERPRINT_MAX_ENTRIES pages; with a collection,
+    entries are also written to Mongo, loaded back at startup and looked up
+    there on a local miss, so other workers and restarts benefit.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.min_similarity = float(os.getenv("FINGERPRINT_MIN_SIMILARITY", "0.7"))
+        self.min_features = int(os.getenv("FINGERPRINT_MIN_FEATURES", "20"))
+        self.max_entries = int(os.getenv("FINGERPRINT_MAX_ENTRIES", "100000"))
+        self.enabled = os.getenv("FINGERPRINT_ENABLED", "true").lower() not in ("0", "false", "no")
+        self._entries: OrderedDict = OrderedDict()  # signature bytes -> {'signature', 'bands', 'verdict', 'url'}
+        self._tables: Dict[str, set] = {}  # band key -> signature bytes
+        self._latencies = deque(maxlen=1000)
+        self.counts = {'lookups': 0, 'hits': 0, 'shared_hits': 0, 'misses': 0,
+                       'too_short': 0, 'added': 0, 'errors': 0}
+
+    def fingerprint(self, content_data: Dict) -> Optional[np.ndarray]:
+        """MinHash signature of a parsed page, or None when it has too little content to judge"""
+        if not self.enabled:
+            return None
+        features = page_features(content_data)
+        if len(features) < self.min_features:
+            self.counts['too_short'] += 1
+            return None
+        return minhash(features)
+
+    async def lookup(self, signature: np.ndarray) -> Optional[Dict]:
+        """Most similar stored page above min_similarity: {'verdict', 'url', 'similarity'}"""
+        started = time.perf_counter()
+        self.counts['lookups'] += 1
+        keys = bands(signature)
+        match = self._lookup_local(signature, keys)
+        if match is None and self.collection is not None:
+            match = await self._lookup_shared(signature, keys)
+            if match is not None:
+                self.counts['shared_hits'] += 1
+        self.counts['hits' if match else 'misses'] += 1
+        self._latencies.append(time.perf_counter() - started)
+        return match
+
+    def _lookup_local(self, signature: np.ndarray, keys: List[str]) -> Optional[Dict]:
+        candidates = set()
+        for key in keys:
+            candidates |= self._tables.get(key, set())
+        best = None
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            score = similarity(signature, entry['signature'])
+            if score >= self.min_similarity and (best is None or score > best[0]):
+                best = (score, entry)
+        if best is None:
+            return None
+        score, entry = best
+        return {'verdict': entry['verdict'], 'url': entry['url'], 'similarity': score}
+
+    async def _lookup_shared(self, signature: np.ndarray, keys: List[str]) -> Optional[Dict]:
+        try:
+            cursor = self.collection.find({'bands': {'$in': keys}},
+                                          {'signature': 1, 'bands': 1, 'verdict': 1, 'url': 1}).limit(50)
+            docs = await cursor.to_list(length=50)
+        except Exception as e:
+            self.counts['errors'] += 1
+            log.warning("Fingerprint lookup failed", extra={'error': repr(e)})
+            return None
+        best = None
+        for doc in docs:
+            stored = np.frombuffer(doc['signature'], dtype=np.uint32)
+            score = similarity(signature, stored)
+            if score >= self.min_similarity and (best is None or score > best[0]):
+                best = (score, stored, doc)
+        if best is None:
+            return None
+        score, stored, doc = best
+        self._remember(stored, doc['bands'], doc['verdict'], doc.get('url'))
+        return {'verdict': doc['verdict'], 'url': doc.get('url'), 'similarity': score}
+
+    async def add(self, signature: np.ndarray, verdict: Dict, url: Optional[str] = None):
+        """Store the AI verdict for a page, locally and in the collection"""
+        if signature.tobytes() in self._entries:
+            return
+        keys = bands(signature)
+        self._remember(signature, keys, verdict, url)
+        self.counts['added'] += 1
+        if self.collection is None:
+            return
+        try:
+            await self.collection.insert_one({
+                'signature': signature.tobytes(),
+                'bands': keys,
+                'verdict': verdict,
+                'url': url,
+                'created_at': datetime.utcnow()
+            })
+        except Exception as e:
+            self.counts['errors'] += 1
+            log.warning("Fingerprint save failed", extra={'error': repr(e)})
+
+    async def load(self):
+        """Index the collection's most recent pages (run at startup)"""
+        if self.collection is None or not self.enabled:
+            return
+        try:
+            await self.collection.create_index('bands')
+            cursor = self.collection.find({}, {'signature': 1, 'bands': 1, 'verdict': 1, 'url': 1}) \
+                .sort('created_at', -1).limit(self.max_entries)
+            docs = await cursor.to_list(length=self.max_entries)
+        except Exception as e:
+            self.counts['errors'] += 1
+            log.warning("Fingerprint index not loaded", extra={'error': repr(e)})
+            return
+        for doc in reversed(docs):  # oldest first, so the newest are evicted last
+            self._remember(np.frombuffer(doc['signature'], dtype=np.uint32), doc['bands'],
+                           doc['verdict'], doc.get('url'))
+        log.info("Fingerprint index loaded", extra={'pages': len(self._entries)})
+
+    def _remember(self, signature: np.ndarray, keys: List[str], verdict: Dict, url: Optional[str]):
+        value = signature.tobytes()
+        if value in self._entries:
+            self._entries.move_to_end(value)
+            return
+        self._entries[value] = {'signature': signature, 'bands': keys, 'verdict': verdict, 'url': url}
+        for key in keys:
+            self._tables.setdefault(key, set()).add(value)
+        while len(self._entries) > self.max_entries:
+            old, entry = self._entries.popitem(last=False)
+            for key in entry['bands']:
+                members = self._tables.get(key)
+                if members is not None:
+                    members.discard(old)
+                    if not members:
+                        del self._tables[key]
+
+    def stats(self) -> Dict:
+        latencies = sorted(self._latencies)
+        lookups = self.counts['lookups']
+        return dict(
+            self.counts,
+            enabled=self.enabled,
+            entries=len(self._entries),
+            hit_rate=self.counts['hits'] / lookups if lookups else 0.0,
+            latency_ms={
+                'p50': round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+                'p99': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3) if latencies else None,
+                'max': round(latencies[-1] * 1000, 3) if latencies else None
+            }
+        )
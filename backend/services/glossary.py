@@ -0,0 +1,91 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN = re.compile(r'\w+|\W+')
+_WORD = re.compile(r'\w+')
+
+def _separator(text: str) -> str:
+    """What must sit between two words of a phrase: any whitespace counts as one space"""
+    stripped = text.strip()
+    return stripped if stripped else ' '
+
+class _Node:
+    __slots__ = ('children', 'replacement')
+
+    def __init__(self):
+        self.children: Dict[Tuple[str, str], '_Node'] = {}
+        self.replacement: Optional[str] = None
+
+class Glossary:
+    """Whole-word, longest-match-first phrase replacement.
+
+    Entries are stored in a trie over words (case-insensitive), built once.
+    ``translate`` walks the text a word at a time and, at each word, follows
+    the trie as far as the text allows, replacing the longest phrase that
+    ends on a word boundary: "unsafe" never matches "safe", and "do not
+    click" wins over "do not" when both are entries. Between the words of
+    a phrase the text must have the same separator as the entry (any run
+    of whitespace counts as one space, and whitespace around punctuation
+    is ignored). The cost is linear in the text and
+    independent of the number of entries; unmatched text is kept as is.
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self._root = _Node()
+        self.size = 0
+        for phrase, replacement in entries.items():
+            self.add(phrase, replacement)
+
+    def add(self, phrase: str, replacement: str):
+        node = self._root
+        separator = ''
+        for token in _TOKEN.findall(phrase.strip()):
+            if _WORD.fullmatch(token):
+                node = node.children.setdefault((separator, token.casefold()), _Node())
+                separator = ''
+            else:
+                separator = _separator(token)
+        if node is self._root:
+            return
+        if node.replacement is None:
+            self.size += 1
+        node.replacement = replacement
+
+    def translate(self, text: str) -> str:
+        spans = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+        words = [text[start:end].casefold() for start, end in spans]
+        children = self._root.children
+        output: List[str] = []
+        last, i = 0, 0
+        while i < len(words):
+            node = children.get(('', words[i]))
+            if node is None:
+                i += 1
+                continue
+            match, end = self._longest(text, spans, words, i, node)
+            if match is None:
+                i += 1
+                continue
+            output.append(text[last:spans[i][0]])
+            output.append(match)
+            last = spans[end][1]
+            i = end + 1
+        output.append(text[last:])
+        return ''.join(output)
+
+    @staticmethod
+    def _longest(text: str, spans: List[Tuple[int, int]], words: List[str], i: int,
+                 node: _Node) -> Tuple[Optional[str], int]:
+        """Replacement of the longest entry starting at word ``i``, and the index of its last word"""
+        best, best_end = None, i
+        while True:
+            if node.replacement is not None:
+                best, best_end = node.replacement, i
+            if not node.children or i + 1 >= len(words):
+                break
+            separator = _separator(text[spans[i][1]:spans[i + 1][0]])
+            node = node.children.get((separator, words[i + 1]))
+            if node is None:
+                break
+            i += 1
+        return best, best_end
@@ -0,0 +1,436 @@
+import asyncio
+import codecs
+import os
+import re
+from bs4 import BeautifulSoup
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+from services.logs import get_logger
+
+logger = get_logger('html_parser')
+
+# Faster backends pinned in requirements.txt; html.parser is used (with a
+# warning) when PARSER_MODE asks for one that is not installed
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+PARSER_MODES = ('stream', 'html.parser', 'lxml', 'selectolax')
+
+# Elements whose text BeautifulSoup's get_text() leaves out
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+FORM_TAG = re.compile(rb'<(/?)form[\s/>]', re.IGNORECASE)
+TITLE_SOURCE = re.compile(rb'<title\b[^>]*>(.*?)(?:</title\s*>|$)', re.IGNORECASE | re.DOTALL)
+
+_missing_warned = set()
+
+def default_parser_mode() -> str:
+    """Parser backend chosen through PARSER_MODE (falls back if not installed)"""
+    mode = os.getenv("PARSER_MODE", "stream")
+    if (mode == 'lxml' and lxml is None) or (mode == 'selectolax' and SelectolaxParser is None):
+        if mode not in _missing_warned:
+            _missing_warned.add(mode)
+            logger.warning("PARSER_MODE backend is not installed, using html.parser; "
+                           "pip install -r requirements.txt", extra={'mode': mode})
+        return 'html.parser'
+    return mode if mode in PARSER_MODES else 'stream'
+
+# <meta charset=...> or <meta http-equiv=... content="...; charset=..."> near the top of the page
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+def _known_encoding(name) -> Optional[str]:
+    if isinstance(name, bytes):
+        name = name.decode('ascii', 'ignore')
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+def _incremental_decoder(encoding) -> codecs.IncrementalDecoder:
+    return codecs.getincrementaldecoder(_known_encoding(encoding) or 'utf-8')(errors='replace')
+
+def document_encoding(content: bytes, encoding: Optional[str] = None) -> Optional[str]:
+    """Charset to decode a page with: the Content-Type header's if known,
+    else UTF-8 when the bytes are valid UTF-8, else a meta charset within
+    the first 1024 bytes (as browsers prescan), else None"""
+    known = _known_encoding(encoding)
+    if known:
+        return known
+    try:
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # A truncated download can end inside a multi-byte sequence
+        if e.start >= len(content) - 3 and e.reason == 'unexpected end of data':
+            return 'utf-8'
+    match = META_CHARSET.search(content[:1024])
+    return _known_encoding(match.group(1)) if match else None
+
+def parse_html(content: bytes, mode: Optional[str] = None, encoding: Optional[str] = None) -> Dict:
+    """Extract text, title, forms and links from a downloaded page.
+
+    All modes return the same structure; ``stream``, ``lxml`` and
+    ``selectolax`` are several times faster than BeautifulSoup's
+    ``html.parser``. ``stream`` stops once it has seen enough text.
+    ``encoding`` is the charset from the response headers, if any.
+    """
+    mode = mode or default_parser_mode()
+    if mode == 'stream':
+        extractor = StreamingExtractor(encoding=document_encoding(content, encoding))
+        # Fed in slices so the early stop also applies to a whole page
+        for start in range(0, len(content), STREAM_CHUNK_BYTES):
+            extractor.feed_bytes(content[start:start + STREAM_CHUNK_BYTES])
+            if extractor.done:
+                break
+        extractor.feed_bytes(b'', final=True)
+        result = extractor.result()
+    elif mode == 'lxml':
+        result = _parse_lxml(content, document_encoding(content, encoding))
+    elif mode == 'selectolax':
+        result = _parse_selectolax(content, document_encoding(content, encoding))
+    else:
+        result = _parse_soup(content, encoding)
+
+    result['success'] = True
+    result['html_length'] = len(content)
+    return result
+
+def _parse_soup(content: bytes, encoding: Optional[str] = None) -> Dict:
+    # Without a header charset BeautifulSoup detects the encoding itself
+    soup = BeautifulSoup(content, 'html.parser', from_encoding=encoding)
+
+    # Extract text content
+    text_content = soup.get_text(separator=' ', strip=True)
+
+    # Extract forms
+    forms = []
+    for form in soup.find_all('form'):
+        form_data = {
+            'action': form.get('action', ''),
+            'method': form.get('method', 'get'),
+            'inputs': []
+        }
+
+        for input_tag in form.find_all(['input', 'textarea', 'select']):
+            form_data['inputs'].append({
+                'type': input_tag.get('type', 'text'),
+                'name': input_tag.get('name', ''),
+                'placeholder': input_tag.get('placeholder', ''),
+                'required': input_tag.get('required', False)
+            })
+
+        forms.append(form_data)
+
+    # Extract links
+    links = [a.get('href', '') for a in soup.find_all('a', href=True)]
+
+    # Extract title
+    title = soup.find('title')
+    title_text = title.get_text(strip=True) if title else ''
+
+    return {
+        'text': text_content,
+        'title': title_text,
+        'forms': forms,
+        'links': links
+    }
+
+def _parse_lxml(content: bytes, encoding: Optional[str] = None) -> Dict:
+    # Left to itself libxml2 reads bytes without a meta charset as latin-1
+    parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+    try:
+        root = lxml.html.document_fromstring(content, parser=parser)
+    except (lxml.etree.ParserError, ValueError):
+        return {'text': '', 'title': '', 'forms': [], 'links': []}
+
+    # Walk the tree iteratively (pages can be nested arbitrarily deep);
+    # an element's tail is emitted after its subtree, as in document order
+    parts = []
+    stack = [(root, False)]
+    while stack:
+        element, closing = stack.pop()
+        if closing:
+            if element.tail:
+                parts.append(element.tail)
+            continue
+        stack.append((element, True))
+        if isinstance(element.tag, str) and element.tag not in NON_TEXT_TAGS:
+            if element.text:
+                parts.append(element.text)
+            stack.extend((child, False) for child in reversed(element))
+
+    # html.parser keeps nested forms as written; HTML5 tree builders do not
+    if _has_nested_forms(content):
+        forms = _stream_forms(content, encoding)
+    else:
+        forms = []
+        for form in root.iter('form'):
+            forms.append({
+                'action': form.get('action', ''),
+                'method': form.get('method', 'get'),
+                'inputs': [{
+                    'type': tag.get('type', 'text'),
+                    'name': tag.get('name', ''),
+                    'placeholder': tag.get('placeholder', ''),
+                    'required': tag.get('required', False)
+                } for tag in form.iter('input', 'textarea', 'select')]
+            })
+
+    title = next(root.iter('title'), None)
+
+    return {
+        'text': _join_stripped(parts),
+        'title': _title_text(title.text_content(), content, encoding) if title is not None else '',
+        'forms': forms,
+        'links': [a.get('href') for a in root.iter('a') if a.get('href') is not None]
+    }
+
+def _parse_selectolax(content: bytes, encoding: Optional[str] = None) -> Dict:
+    markup = content
+    if encoding and encoding != 'utf-8':
+        markup = content.decode(encoding, errors='replace')
+    tree = SelectolaxParser(markup)
+
+    def attr(node, name, default):
+        value = node.attributes.get(name, default)
+        # Bare attributes (e.g. <input required>) come back as None
+        return '' if value is None else value
+
+    # html.parser keeps nested forms as written; HTML5 tree builders do not
+    if _has_nested_forms(content):
+        forms = _stream_forms(content, encoding)
+    else:
+        forms = []
+        for form in tree.css('form'):
+            forms.append({
+                'action': attr(form, 'action', ''),
+                'method': attr(form, 'method', 'get'),
+                'inputs': [{
+                    'type': attr(tag, 'type', 'text'),
+                    'name': attr(tag, 'name', ''),
+                    'placeholder': attr(tag, 'placeholder', ''),
+                    'required': attr(tag, 'required', False)
+                } for tag in form.css('input, textarea, select')]
+            })
+
+    links = [attr(a, 'href', '') for a in tree.css('a[href]')]
+    title = tree.css_first('title')
+    title_text = _title_text(title.text(strip=False), content, encoding) if title is not None else ''
+
+    tree.strip_tags(list(NON_TEXT_TAGS))
+    root = tree.root
+    parts = [node.text_content for node in root.traverse(include_text=True)
+             if node.tag == '-text'] if root is not None else []
+
+    return {
+        'text': _join_stripped(parts),
+        'title': title_text,
+        'forms': forms,
+        'links': links
+    }
+
+def _title_text(text: str, content: bytes, encoding: Optional[str] = None) -> str:
+    """Title as BeautifulSoup reports it. HTML5 parsers keep markup inside
+    <title> as text where html.parser parses it, so a title that contains
+    any is read again from its source and its strings joined the way
+    get_text(strip=True) does"""
+    match = TITLE_SOURCE.search(content) if '<' in text else None
+    if match is None:
+        return text.strip()
+    extractor = StreamingExtractor(encoding=document_encoding(content, encoding))
+    extractor.feed_bytes(match.group(1), final=True)
+    return ''.join(extractor.text_parts)
+
+def _has_nested_forms(content: bytes) -> bool:
+    depth = 0
+    for match in FORM_TAG.finditer(content):
+        depth = max(0, depth - 1) if match.group(1) else depth + 1
+        if depth > 1:
+            return True
+    return False
+
+def _stream_forms(content: bytes, encoding: Optional[str] = None) -> List[Dict]:
+    """Forms as BeautifulSoup finds them when forms are nested: HTML5 parsers
+    drop or close the inner <form>, html.parser keeps it, and the outer form
+    also lists the inner form's inputs"""
+    extractor = StreamingExtractor(encoding=document_encoding(content, encoding),
+                                   max_forms=len(FORM_TAG.findall(content)))
+    extractor.feed_bytes(content, final=True)
+    return extractor.forms
+
+def _join_stripped(parts) -> str:
+    return ' '.join(stripped for stripped in (part.strip() for part in parts) if stripped)
+
+class StreamingExtractor(HTMLParser):
+    """Single-pass extractor for the features the analyzers use.
+
+    Collects visible text, the title, form inputs and link hrefs from parser
+    events as chunks arrive, without building a DOM. Output matches
+    parse_html's BeautifulSoup mode. Text, link and form counts are capped to
+    keep memory bounded. ``done`` turns true once ``max_text_chars`` of text
+    has been seen, so the caller can stop downloading. Without an
+    ``encoding`` the first 1024 bytes are held back and searched for a meta
+    charset, else the page is read as UTF-8.
+    """
+
+    def __init__(self, encoding: Optional[str] = None, max_text_chars: Optional[int] = None,
+                 max_links: int = 5000, max_forms: int = 100):
+        super().__init__(convert_charrefs=True)
+        self._decoder = _incremental_decoder(encoding) if encoding else None
+        self._head = b''
+        self.max_text_chars = max_text_chars or int(os.getenv("STREAM_MAX_TEXT_CHARS", "50000"))
+        self.max_links = max_links
+        self.max_forms = max_forms
+
+        self.text_parts: List[str] = []
+        self.text_chars = 0
+        self.title: Optional[str] = None
+        self.forms: List[Dict] = []
+        self.links: List[str] = []
+        self.done = False
+
+        self._skip_depth = 0     # inside script/style/template
+        self._title_parts: Optional[List[str]] = None
+        self._open_forms: List[Dict] = []
+        self._pending: List[str] = []  # current text node, possibly split
+
+    def feed_bytes(self, chunk: bytes, final: bool = False):
+        if self._decoder is None:
+            self._head += chunk
+            if len(self._head) < 1024 and not final:
+                return
+            match = META_CHARSET.search(self._head[:1024])
+            self._decoder = _incremental_decoder(match.group(1) if match else None)
+            chunk, self._head = self._head, b''
+        if not self.done:
+            self.feed(self._decoder.decode(chunk, final))
+        if final:
+            self.close()
+
+    def result(self) -> Dict:
+        self._flush_text()
+        return {
+            'text': ' '.join(self.text_parts),
+            'title': self.title or '',
+            'forms': self.forms,
+            'links': self.links
+        }
+
+    def _flush_text(self):
+        if not self._pending:
+            return
+        data = ''.join(self._pending).strip()
+        self._pending = []
+        if not data:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self.text_chars < self.max_text_chars:
+            self.text_parts.append(data)
+            self.text_chars += len(data) + 1
+            if self.text_chars >= self.max_text_chars:
+                self.done = True
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._pending.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in NON_TEXT_TAGS:
+            self._skip_depth += 1
+            return
+
+        # BeautifulSoup turns valueless attributes into ''
+        attributes = {name: '' if value is None else value for name, value in attrs}
+        if tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'a' and 'href' in attributes and len(self.links) < self.max_links:
+            self.links.append(attributes['href'])
+        elif tag == 'form':
+            form = {
+                'action': attributes.get('action', ''),
+                'method': attributes.get('method', 'get'),
+                'inputs': []
+            }
+            self._open_forms.append(form)
+            if len(self.forms) < self.max_forms:
+                self.forms.append(form)
+        elif tag in ('input', 'textarea', 'select') and self._open_forms:
+            field = {
+                'type': attributes.get('type', 'text'),
+                'name': attributes.get('name', ''),
+                'placeholder': attributes.get('placeholder', ''),
+                'required': attributes.get('required', False)
+            }
+            for form in self._open_forms:
+                form['inputs'].append(field)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag in NON_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+        elif tag == 'form' and self._open_forms:
+            self._open_forms.pop()
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        if self._title_parts is not None:
+            # Unclosed <title>: BeautifulSoup still reports its text
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+
+class ParsePool:
+    """Bounded executor for page parsing.
+
+    ``kind`` is 'thread' or 'process' (PARSE_EXECUTOR); at most
+    ``max_pending`` jobs are queued or running, further callers wait, so a
+    burst of large pages cannot pile up unbounded work.
+    """
+
+    def __init__(self, kind: Optional[str] = None, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, initializer: Optional[Callable] = None):
+        self.kind = kind or os.getenv("PARSE_EXECUTOR", "thread")
+        self.workers = workers or int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_pending = max_pending or int(os.getenv("PARSE_MAX_PENDING", str(self.workers * 4)))
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='parse',
+                                                    initializer=self.initializer)
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
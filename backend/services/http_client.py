@@ -0,0 +1,66 @@
+import httpx
+import os
+from typing import Optional
+
+# Browser-like UA used when fetching suspect pages
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+class HTTPClientPool:
+    """Shared async HTTP clients with pooled connections.
+
+    ``api`` is used for trusted third-party APIs (certificate verification on),
+    ``fetch`` for suspect pages and keeps the old ``verify=False`` behaviour.
+    """
+
+    def __init__(self):
+        self._api: Optional[httpx.AsyncClient] = None
+        self._fetch: Optional[httpx.AsyncClient] = None
+
+    def _new_client(self, **kwargs) -> httpx.AsyncClient:
+        # Read settings here rather than at import so .env values apply
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "200")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "50"))
+        )
+        timeout = float(os.getenv("HTTP_TIMEOUT", "10"))
+        return httpx.AsyncClient(timeout=timeout, limits=limits, **kwargs)
+
+    async def open(self):
+        """Create the pooled clients (called from the app lifespan)"""
+        if self._api is None:
+            self._api = self._new_client()
+        if self._fetch is None:
+            self._fetch = self._new_client(
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                verify=False
+            )
+
+    async def close(self):
+        """Close the pooled clients and release their connections"""
+        for client in (self._api, self._fetch):
+            if client is not None:
+                await client.aclose()
+        self._api = None
+        self._fetch = None
+
+    @property
+    def api(self) -> httpx.AsyncClient:
+        if self._api is None:
+            # Scripts running outside the FastAPI lifespan open lazily
+            self._api = self._new_client()
+        return self._api
+
+    @property
+    def fetch(self) -> httpx.AsyncClient:
+        if self._fetch is None:
+            self._fetch = self._new_client(
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                verify=False
+            )
+        return self._fetch
+
+http_clients = HTTPClientPool()
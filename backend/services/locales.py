@@ -0,0 +1,134 @@
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional
+from services.glossary import Glossary
+from services.logs import get_logger
+
+log = get_logger('locales')
+
+DEFAULT_LOCALES_DIR = pathlib.Path(__file__).parent.parent / "data" / "locales"
+SOURCE_LANGUAGE = 'en'
+
+class LocaleError(ValueError):
+    pass
+
+class Locale:
+    """One data/locales/<code>.json file.
+
+    ``key`` is the field the language's text appears under in localized
+    responses ('english', 'kannada', ...); ``glossary`` (compiled once into
+    ``fallback``) and ``auto_translation_note`` feed the offline fallback
+    translator.
+    """
+
+    def __init__(self, code: str, name: str, key: str, messages: Dict[str, str],
+                 glossary: Optional[Dict[str, str]] = None, auto_translation_note: str = ''):
+        self.code = code
+        self.name = name
+        self.key = key
+        self.messages = messages
+        self.glossary = glossary or {}
+        self.fallback = Glossary(self.glossary)
+        self.auto_translation_note = auto_translation_note
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path) -> 'Locale':
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            locale = cls(data['code'], data['name'], data['key'], data['messages'],
+                         data.get('glossary'), data.get('auto_translation_note', ''))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise LocaleError(f"{path.name}: {e!r}") from e
+        if locale.code != path.stem:
+            raise LocaleError(f"{path.name}: code {locale.code!r} does not match the file name")
+        return locale
+
+class LocaleCatalog:
+    """Localized response messages, keyed by message id and language.
+
+    Every JSON file in LOCALES_DIR (default data/locales) is a language;
+    adding one is a data change. ``load`` checks the files and prebuilds
+    the response dict for every (message id, language) pair, so a lookup
+    on the request path is a single dict access. en.json is the source
+    catalog: messages another locale lacks are reported by ``info`` and
+    left to TranslationService, which translates the English text.
+    English responses also carry the LOCALE_DEFAULT (Kannada) text, as they
+    always have, so a client can switch languages without asking again.
+    """
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path or os.getenv("LOCALES_DIR", str(DEFAULT_LOCALES_DIR)))
+        self.default_language = os.getenv("LOCALE_DEFAULT", "kn")
+        self.locales: Dict[str, Locale] = {}
+        self._compiled: Dict[tuple, Dict[str, str]] = {}
+        self._by_text: Dict[str, str] = {}
+        self.missing: Dict[str, List[str]] = {}
+
+    def load(self) -> 'LocaleCatalog':
+        locales = {path.stem: Locale.from_file(path) for path in sorted(self.path.glob('*.json'))}
+        if SOURCE_LANGUAGE not in locales:
+            raise LocaleError(f"{self.path} has no {SOURCE_LANGUAGE}.json source catalog")
+        source = locales[SOURCE_LANGUAGE]
+
+        compiled, missing = {}, {}
+        for code, locale in locales.items():
+            missing[code] = sorted(set(source.messages) - set(locale.messages))
+            companion = locales.get(self.default_language) if code == SOURCE_LANGUAGE else locale
+            for message_id, english in source.messages.items():
+                response = {source.key: english}
+                if companion is not None and companion is not source and message_id in companion.messages:
+                    response[companion.key] = companion.messages[message_id]
+                compiled[(message_id, code)] = response
+        self.locales, self._compiled, self.missing = locales, compiled, missing
+        self._by_text = {english: message_id for message_id, english in source.messages.items()}
+        log.info("Locales loaded", extra={'languages': ', '.join(locales)})
+        return self
+
+    def _ensure_loaded(self):
+        if not self.locales:
+            self.load()
+
+    def supports(self, language: str) -> bool:
+        self._ensure_loaded()
+        return language in self.locales
+
+    def locale(self, language: str) -> Locale:
+        self._ensure_loaded()
+        return self.locales[language]
+
+    def source_text(self, message_id: str) -> str:
+        self._ensure_loaded()
+        return self.locales[SOURCE_LANGUAGE].messages[message_id]
+
+    def lookup(self, message_id: str, language: str) -> Optional[Dict[str, str]]:
+        """Prebuilt {'english': ..., '<language key>': ...}, or None when the
+        locale has no text for the message yet"""
+        self._ensure_loaded()
+        response = self._compiled.get((message_id, language))
+        if response is None:
+            raise KeyError(f"Unknown message {message_id!r} or language {language!r}")
+        if language != SOURCE_LANGUAGE and self.locales[language].key not in response:
+            return None
+        return dict(response)
+
+    def translation(self, text: str, language: str) -> Optional[str]:
+        """The locale's text for an English catalog message, if ``text`` is one"""
+        self._ensure_loaded()
+        message_id = self._by_text.get(text)
+        if message_id is None:
+            return None
+        return self.locales[language].messages.get(message_id)
+
+    def info(self) -> Dict:
+        self._ensure_loaded()
+        return {
+            'path': str(self.path),
+            'languages': {code: locale.name for code, locale in self.locales.items()},
+            'messages': len(self.locales[SOURCE_LANGUAGE].messages),
+            'missing': {code: ids for code, ids in self.missing.items() if ids}
+        }
+
+# Shared instance for the app
+locales = LocaleCatalog()
@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+ROOT_LOGGER = 'scam_detector'
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS and not k.startswith('_')}
+
+class StructuredFormatter(logging.Formatter):
+    """One line per record: the message plus its ``extra`` fields.
+
+    LOG_FORMAT=text (the default) gives ``time level logger: message
+    key=value ...``; LOG_FORMAT=json gives one JSON object per line for log
+    shippers.
+    """
+
+    def __init__(self, fmt: str = 'text'):
+        super().__init__()
+        self.json = fmt == 'json'
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+        fields = _fields(record)
+        if record.exc_info:
+            fields['exception'] = self.formatException(record.exc_info)
+        logger = record.name[len(ROOT_LOGGER) + 1:] or record.name
+        if self.json:
+            return json.dumps(dict(time=timestamp, level=record.levelname, logger=logger,
+                                   message=record.getMessage(), **fields), ensure_ascii=False, default=str)
+        pairs = ' '.join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}"
+                         for key, value in fields.items())
+        return f"{timestamp} {record.levelname} {logger}: {record.getMessage()}" + (f" {pairs}" if pairs else '')
+
+_handler = None
+
+def configure_logging():
+    """Apply LOG_LEVEL (INFO) and LOG_FORMAT (text) to the app's loggers.
+
+    Safe to call again, e.g. once a .env file has been loaded.
+    """
+    global _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    if _handler is None:
+        _handler = logging.StreamHandler(sys.stderr)
+        root.addHandler(_handler)
+        root.propagate = False
+    _handler.setFormatter(StructuredFormatter(os.getenv("LOG_FORMAT", "text").lower()))
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    # getLevelName maps a known name to its number (and anything else to a string)
+    root.setLevel(level if isinstance(logging.getLevelName(level), int) else logging.INFO)
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for one module, e.g. get_logger('db') -> 'scam_detector.db'"""
+    if _handler is None:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,301 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; the LLM and the page fetch need the long tail, lexical checks the short end
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _buckets() -> Tuple[float, ...]:
+    configured = os.getenv("METRICS_BUCKETS")
+    if not configured:
+        return DEFAULT_BUCKETS
+    return tuple(sorted(float(b) for b in configured.split(',') if b.strip()))
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Tuple) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+        return labels
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    def _samples(self, labels: Tuple, value) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"]
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Optional[Iterable[float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) if buckets is not None else _buckets()
+
+    def observe(self, *labels, value: float):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (not cumulative) counts, then count and sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def _samples(self, labels: Tuple, series) -> List[str]:
+        counts, count, total = series
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            le = 'le="%s"' % _number(bound)
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {repr(round(total, 6))}")
+        return lines
+
+class _Callback(_Metric):
+    """Gauge or counter read from a function at scrape time: ``fn()`` returns
+    ``{label values tuple: value}``, or a number when there are no labels"""
+
+    def __init__(self, name: str, documentation: str, kind: str, fn: Callable, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(values.items()):
+            if value is not None:
+                lines.extend(self._samples(labels if isinstance(labels, tuple) else (labels,), value))
+        return lines
+
+class Registry:
+    """Process-wide metrics in the Prometheus text exposition format (``/metrics``)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Optional[Iterable[float]] = None) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, fn: Callable, labelnames: Iterable[str] = (),
+                 kind: str = 'gauge') -> _Metric:
+        """Expose a value the application already keeps (a stats() counter, a queue depth)"""
+        return self._register(_Callback(name, documentation, kind, fn, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} not collected: {e!r}")
+        return '\n'.join(lines) + '\n'
+
+# Shared registry for the app
+metrics = Registry()
+
+ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+STAGE_SECONDS = metrics.histogram(
+    'scam_detector_stage_seconds', 'Time spent in one stage of the analysis', ('component', 'stage'))
+STAGE_ERRORS = metrics.counter(
+    'scam_detector_stage_errors_total', 'Stage runs that failed, timed out or were cancelled',
+    ('component', 'stage', 'error'))
+STAGE_IN_FLIGHT = metrics.gauge(
+    'scam_detector_stage_in_flight', 'Stage runs currently in progress', ('component', 'stage'))
+
+# Stage timings of the request being served, when it asked for them
+_breakdown: contextvars.ContextVar[Optional[List]] = contextvars.ContextVar('timing_breakdown', default=None)
+
+def record_error(component: str, stage: str, error: str):
+    """Count a failure that the stage handled itself (and so never raised)"""
+    if ENABLED:
+        STAGE_ERRORS.inc(component, stage, error)
+
+class timed:
+    """Time a block as one run of ``component``/``stage``.
+
+    Usable as ``with`` or ``async with``. Records the stage histogram and
+    in-flight gauge; an exception leaving the block is counted as an error
+    (by exception type or its ``kind``, 'timeout' and 'cancelled' for the
+    deadline cases)
+    and re-raised. When the current request collects a timing breakdown
+    the run is added to it too.
+    """
+    __slots__ = ('component', 'stage', 'started')
+
+    def __init__(self, component: str, stage: str):
+        self.component = component
+        self.stage = stage
+
+    def __enter__(self):
+        if ENABLED:
+            STAGE_IN_FLIGHT.inc(self.component, self.stage)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        if ENABLED:
+            STAGE_IN_FLIGHT.dec(self.component, self.stage)
+            STAGE_SECONDS.observe(self.component, self.stage, value=elapsed)
+            if exc_type is not None:
+                STAGE_ERRORS.inc(self.component, self.stage, _error_label(exc_type, exc))
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            breakdown.append((self.component, self.stage, self.started, elapsed, exc_type is not None))
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+def instrument(component: str, stage: str):
+    """Decorator: every call of the (sync or async) function is a ``timed`` stage run"""
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with timed(component, stage):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with timed(component, stage):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def _error_label(exc_type, exc=None) -> str:
+    # Errors such as ProbeError name their own kind (e.g. 'http_429')
+    kind = getattr(exc, 'kind', None)
+    if isinstance(kind, str) and kind:
+        return kind
+    if issubclass(exc_type, asyncio.TimeoutError):
+        return 'timeout'
+    if issubclass(exc_type, asyncio.CancelledError):
+        return 'cancelled'
+    return exc_type.__name__
+
+class TimingBreakdown:
+    """Collect the stage runs of the current task (and the tasks it starts).
+
+    Context variables are copied into new tasks, so probes and other work
+    fanned out with ``asyncio.ensure_future`` report into the same list.
+    Work shared through SingleFlight is reported only to the request that
+    started it.
+    """
+
+    def __init__(self):
+        self.runs: List[Tuple] = []
+        self.started = time.perf_counter()
+        self._token = None
+
+    def __enter__(self) -> 'TimingBreakdown':
+        self._token = _breakdown.set(self.runs)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _breakdown.reset(self._token)
+        self.total = time.perf_counter() - self.started
+        return False
+
+    def report(self) -> Dict:
+        """{'total_ms', 'stages': [{component, stage, calls, ms, start_ms, errors}]}
+
+        Stages are listed in the order they first started; ``start_ms`` is
+        the offset from the start of the request. Stages that ran
+        concurrently overlap, so their ``ms`` do not add up to the total.
+        """
+        stages: Dict[Tuple[str, str], Dict] = {}
+        for component, stage, started, elapsed, failed in sorted(self.runs, key=lambda run: run[2]):
+            entry = stages.get((component, stage))
+            if entry is None:
+                entry = stages[(component, stage)] = {
+                    'component': component, 'stage': stage, 'calls': 0, 'ms': 0.0,
+                    'start_ms': round((started - self.started) * 1000, 1), 'errors': 0
+                }
+            entry['calls'] += 1
+            entry['ms'] += elapsed * 1000
+            entry['errors'] += failed
+        for entry in stages.values():
+            entry['ms'] = round(entry['ms'], 1)
+        total = getattr(self, 'total', time.perf_counter() - self.started)
+        return {'total_ms': round(total * 1000, 1), 'stages': list(stages.values())}
@@ -0,0 +1,212 @@
+import os
+import time
+from typing import Dict, NamedTuple, Optional
+from services.probes import Probe, run_probes, probe_timeout, analysis_budget
+from services.rulepack import RulePack
+from services.metrics import instrument
+from services.scoring import risk_level_for, score_bounds
+
+class Stage(NamedTuple):
+    name: str
+    cost: float     # typical cost in milliseconds, used for the accounting
+    external: bool  # calls a third-party service (quota or money)
+
+# Cheapest first; the stages of one tier run concurrently
+TIERS = (
+    (Stage('lexical', 0.1, False),),
+    (Stage('reputation', 1.0, False),),
+    (Stage('ssl', 150.0, False), Stage('virustotal', 400.0, True)),
+    (Stage('content', 800.0, False),),
+    (Stage('llm', 2500.0, True),),
+)
+STAGES = {stage.name: stage for tier in TIERS for stage in tier}
+
+# ai_reasoning when the LLM stage did not run
+LLM_SKIPPED_REASONING = {
+    'decided': 'AI analysis skipped - risk level already decided',
+    'unavailable': 'AI analysis unavailable - no API key',
+}
+
+class AnalysisPipeline:
+    """Runs the analysis stages in order of cost and stops once the verdict is settled.
+
+    After each tier the remaining stages' largest possible penalties give the
+    lowest and highest trust score still reachable; when both fall in the
+    same risk level the rest is skipped. Cached facts stand in for their
+    stages, and a confident pre-filter verdict for the page fetch and LLM;
+    an allow- or denylisted domain is decided before any network stage.
+    PIPELINE_EARLY_EXIT=false runs every stage regardless.
+    """
+
+    def __init__(self, url_analyzer, ai_analyzer, prefilter=None, reputation=None):
+        self.url_analyzer = url_analyzer
+        self.ai_analyzer = ai_analyzer
+        self.prefilter = prefilter
+        self.reputation = reputation
+        self.early_exit = os.getenv("PIPELINE_EARLY_EXIT", "true").lower() not in ("0", "false", "no")
+        self.counts = {name: {'ran': 0, 'cached': 0, 'skipped': 0} for name in STAGES}
+        self.runs = 0
+        self.early_exits = 0
+        self.cost_spent = 0.0
+        self.cost_saved = 0.0
+
+    @instrument('pipeline', 'run')
+    async def run(self, url: str, pack: RulePack, lexical: Optional[Dict] = None,
+                  page_facts: Optional[Dict] = None, domain_facts: Optional[Dict] = None) -> Dict:
+        """Analyze one URL.
+
+        Returns ``{'url_data', 'ai_analysis', 'probes', 'pipeline'}``; the
+        ``pipeline`` entry records what each stage did and what it cost.
+        """
+        deadline = time.perf_counter() + analysis_budget()
+        stages: Dict[str, Dict] = {}
+        probes: Dict[str, Dict] = {}
+        pending = set(STAGES) - {'lexical', 'reputation'}
+        decided_after = 'reputation'
+
+        def remaining() -> float:
+            return max(deadline - time.perf_counter(), 0)
+
+        def settle(names, status: str, reason: Optional[str] = None):
+            for name in names:
+                stages[name] = {'status': status, 'reason': reason} if reason else {'status': status}
+                pending.discard(name)
+
+        # Lexical checks and the local pre-filter
+        started = time.perf_counter()
+        url_data = self.url_analyzer.lexical_analysis(url, pack, lexical)
+        ai_analysis: Dict = {}
+        stages['lexical'] = {'status': 'ran', 'elapsed_ms': _ms_since(started)}
+        if page_facts is None and self.prefilter is not None:
+            prefiltered = self.prefilter.assess(url_data['lexical_features'])
+            if prefiltered is not None:
+                ai_analysis = prefiltered
+                settle(('content', 'llm'), 'skipped', 'prefilter')
+        if 'llm' in pending and not self.ai_analyzer.llm_available:
+            settle(('llm',), 'skipped', 'unavailable')
+
+        # Reputation: the local allow/deny lists, then facts cached from
+        # earlier analyses
+        started = time.perf_counter()
+        listed = self.reputation.lookup(url) if self.reputation is not None else None
+        if listed:
+            url_data['reputation'] = listed
+        if page_facts:
+            self.url_analyzer.apply_probe(url_data, 'virustotal', page_facts['virustotal'])
+            ai_analysis = page_facts['ai_analysis']
+            settle(('virustotal', 'content'), 'cached')
+            if 'llm_skipped' in ai_analysis:
+                settle(('llm',), 'skipped', ai_analysis['llm_skipped'])
+            else:
+                settle(('llm',), 'cached')
+        if domain_facts:
+            self.url_analyzer.apply_probe(url_data, 'ssl', domain_facts['ssl_info'])
+            settle(('ssl',), 'cached')
+        stages['reputation'] = {'status': 'ran', 'elapsed_ms': _ms_since(started)}
+
+        page = None
+        for tier in TIERS[2:]:
+            bounds = score_bounds(url_data, ai_analysis, pending)
+            if not pending or self.early_exit and risk_level_for(bounds[0]) == risk_level_for(bounds[1]):
+                break
+            names = [stage.name for stage in tier if stage.name in pending]
+            if not names:
+                continue
+            decided_after = names[-1]
+
+            if tier[0].name == 'ssl':
+                # Network reputation probes
+                outcome = await run_probes(
+                    {name: self.url_analyzer.probe(name, url) for name in names}, budget=remaining()
+                )
+                for name, result in outcome.items():
+                    self.url_analyzer.apply_probe(url_data, name, result['result'])
+
+            elif tier[0].name == 'content':
+                outcome = await run_probes({'content': Probe(
+                    self.ai_analyzer.analyze_page(url, pack),
+                    timeout=probe_timeout('content'),
+                    default={'error': 'Content analysis timed out', 'is_phishing': False, 'confidence': 0}
+                )}, budget=remaining())
+                page = outcome['content']['result']
+                if 'error' in page:
+                    ai_analysis, page = page, None
+                    if 'llm' in pending:
+                        settle(('llm',), 'skipped', 'no content')
+                else:
+                    reason = stages.get('llm', {}).get('reason', 'decided')
+                    ai_analysis = self.ai_analyzer.combine(page, {
+                        'is_phishing': False, 'confidence': 0, 'reasoning': LLM_SKIPPED_REASONING[reason]
+                    }, pack)
+                    # No LLM judgment behind this verdict (see is_page_cacheable)
+                    ai_analysis['llm_skipped'] = reason
+
+            else:
+                outcome = await run_probes({'llm': Probe(
+                    self.ai_analyzer.ai_content_analysis(page['content_data'], url),
+                    timeout=probe_timeout('llm'),
+                    default={'is_phishing': False, 'confidence': 0, 'reasoning': 'AI analysis timed out'}
+                )}, budget=remaining())
+                ai_analysis = self.ai_analyzer.combine(page, outcome['llm']['result'], pack)
+
+            for name, result in outcome.items():
+                probes[name] = {'status': result['status'], 'elapsed_ms': result['elapsed_ms']}
+                # An LLM verdict served from a cache or a near-duplicate page cost nothing
+                stages[name] = {'status': 'ran', 'elapsed_ms': result['elapsed_ms']}
+                if name == 'llm' and result['result'].get('cached'):
+                    stages[name].update(status='cached', reason='fingerprint'
+                                        if 'fingerprint_match' in result['result'] else 'llm cache')
+                pending.discard(name)
+        else:
+            bounds = score_bounds(url_data, ai_analysis, pending)
+
+        early_exit = bool(pending)
+        if early_exit:
+            reason = f'{listed}list' if listed else 'decided'
+            settle(sorted(pending, key=list(STAGES).index), 'skipped', reason)
+        else:
+            decided_after = None
+        url_data['probes'] = {name: p for name, p in probes.items() if name in ('ssl', 'virustotal')}
+        return {
+            'url_data': url_data,
+            'ai_analysis': ai_analysis,
+            'probes': probes,
+            'pipeline': self._account(stages, bounds, decided_after, early_exit)
+        }
+
+    def _account(self, stages: Dict[str, Dict], bounds, decided_after, early_exit: bool) -> Dict:
+        spent = saved = 0.0
+        ordered = []
+        for name, stage in STAGES.items():
+            entry = dict(stages[name], name=name, cost=stage.cost)
+            self.counts[name][entry['status']] += 1
+            if entry['status'] == 'ran':
+                spent += stage.cost
+            else:
+                saved += stage.cost
+            ordered.append(entry)
+
+        self.runs += 1
+        self.early_exits += early_exit
+        self.cost_spent += spent
+        self.cost_saved += saved
+        return {
+            'stages': ordered,
+            'executed': [entry['name'] for entry in ordered if entry['status'] == 'ran'],
+            'skipped': [entry['name'] for entry in ordered if entry['status'] == 'skipped'],
+            'decided_after': decided_after,
+            'score_bounds': list(bounds),
+            'cost': {'spent_ms': round(spent, 1), 'saved_ms': round(saved, 1)}
+        }
+
+    def stats(self) -> Dict:
+        return {
+            'early_exit': self.early_exit,
+            'runs': self.runs,
+            'early_exits': self.early_exits,
+            'stages': self.counts,
+            'cost': {'spent_ms': round(self.cost_spent, 1), 'saved_ms': round(self.cost_saved, 1)}
+        }
+
+def _ms_since(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
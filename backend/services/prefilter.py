@@ -0,0 +1,132 @@
+import json
+import os
+import pathlib
+import numpy as np
+from typing import Dict, Optional
+from services.features import FEATURE_NAMES
+from services.logs import get_logger
+
+log = get_logger('prefilter')
+
+DEFAULT_MODEL_PATH = pathlib.Path(__file__).parent.parent / "models" / "prefilter.json"
+
+class PrefilterModel:
+    """Logistic regression over the lexical URL features.
+
+    The model file (written by train_prefilter.py) is JSON with the feature
+    names, standardization ``mean``/``scale``, ``weights``, ``bias`` and the
+    two probability thresholds: below ``low`` a URL is treated as benign,
+    at or above ``high`` as a scam, and in between the full analysis runs.
+    """
+
+    def __init__(self, spec: Dict):
+        self.feature_names = list(spec['feature_names'])
+        unknown = set(self.feature_names) - set(FEATURE_NAMES)
+        if unknown:
+            raise ValueError(f"Model uses unknown features: {sorted(unknown)}")
+        self.columns = np.array([FEATURE_NAMES.index(name) for name in self.feature_names])
+        self.mean = np.asarray(spec['mean'], dtype=np.float64)
+        self.scale = np.asarray(spec['scale'], dtype=np.float64)
+        self.weights = np.asarray(spec['weights'], dtype=np.float64)
+        self.bias = float(spec['bias'])
+        self.low = float(spec['low'])
+        self.high = float(spec['high'])
+        self.version = str(spec.get('version', 'unversioned'))
+        self.spec = spec
+
+    @classmethod
+    def load(cls, path) -> 'PrefilterModel':
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.spec, f, indent=2)
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        """Scam probability for each row of a FeatureBatch matrix"""
+        x = (matrix[:, self.columns] - self.mean) / self.scale
+        return 1.0 / (1.0 + np.exp(-(x @ self.weights + self.bias)))
+
+    def score(self, features: Dict[str, float]) -> float:
+        """Scam probability for one URL's ``lexical_features``"""
+        x = (np.array([features[name] for name in self.feature_names]) - self.mean) / self.scale
+        return float(1.0 / (1.0 + np.exp(-(x @ self.weights + self.bias))))
+
+    def decision(self, probability: float) -> str:
+        if probability < self.low:
+            return 'benign'
+        if probability >= self.high:
+            return 'scam'
+        return 'uncertain'
+
+class Prefilter:
+    """Decides whether a URL needs the page fetch and LLM stages.
+
+    Loads the model once (PREFILTER_MODEL, default models/prefilter.json);
+    without a model file, or with PREFILTER_ENABLED=false, every URL goes
+    through the full analysis. Counts how many fetches and LLM calls the
+    confident decisions saved.
+    """
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path or os.getenv("PREFILTER_MODEL", str(DEFAULT_MODEL_PATH)))
+        self.enabled = os.getenv("PREFILTER_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.model: Optional[PrefilterModel] = None
+        self.error: Optional[str] = None
+        self.counts = {'scored': 0, 'benign': 0, 'scam': 0, 'uncertain': 0}
+        self.llm_enabled = bool(os.getenv("OPENAI_API_KEY"))
+
+    def load(self):
+        if not self.enabled or not self.path.exists():
+            return
+        try:
+            self.model = PrefilterModel.load(self.path)
+            log.info("Prefilter model loaded", extra={'version': self.model.version, 'path': str(self.path)})
+        except (OSError, ValueError, KeyError) as e:
+            self.error = str(e)
+            log.warning("Prefilter model not loaded", extra={'error': str(e)})
+
+    def assess(self, lexical_features: Dict[str, float]) -> Optional[Dict]:
+        """Content-analysis stand-in when the model is confident, else None"""
+        if self.model is None:
+            return None
+
+        probability = self.model.score(lexical_features)
+        decision = self.model.decision(probability)
+        self.counts['scored'] += 1
+        self.counts[decision] += 1
+        if decision == 'uncertain':
+            return None
+
+        return {
+            'is_phishing': decision == 'scam',
+            'confidence': round(probability * 100) if decision == 'scam' else round((1 - probability) * 100),
+            'urgency_detected': False,
+            'skipped': 'prefilter',
+            'prefilter': {
+                'decision': decision,
+                'probability': round(probability, 4),
+                'model_version': self.model.version
+            }
+        }
+
+    def stats(self) -> Dict:
+        decided = self.counts['benign'] + self.counts['scam']
+        scored = self.counts['scored']
+        return {
+            'enabled': self.model is not None,
+            'model_version': self.model.version if self.model else None,
+            'thresholds': {'low': self.model.low, 'high': self.model.high} if self.model else None,
+            'error': self.error,
+            **self.counts,
+            'decided_ratio': decided / scored if scored else 0.0,
+            'saved': {
+                'page_fetches': decided,
+                'llm_calls': decided if self.llm_enabled else 0
+            }
+        }
+
+# Shared instance for the app
+prefilter = Prefilter()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+# Per-probe deadlines in seconds, overridable through the environment
+DEFAULT_PROBE_TIMEOUTS = {
+    'ssl': 5.0,
+    'virustotal': 8.0,
+    'content': 10.0,
+    'llm': 10.0,
+}
+
+def probe_timeout(name: str) -> float:
+    """Deadline for a probe, e.g. PROBE_TIMEOUT_SSL=3"""
+    return float(os.getenv(f"PROBE_TIMEOUT_{name.upper()}", DEFAULT_PROBE_TIMEOUTS.get(name, 10.0)))
+
+def analysis_budget() -> float:
+    """Overall wall-clock budget for one analysis"""
+    return float(os.getenv("ANALYSIS_BUDGET", "12"))
+
+class ProbeError(Exception):
+    """A probe that could not get an answer (DNS, connection, HTTP or quota failure).
+
+    run_probes reports it as an error, so the result is never cached;
+    ``result`` (if given) stands in for the probe's default in the analysis
+    and ``kind`` labels the failure in the metrics.
+    """
+
+    def __init__(self, message: str, kind: Optional[str] = None, result: Any = None):
+        super().__init__(message)
+        self.kind = kind
+        self.result = result
+
+class Probe:
+    """An independent network check with its own deadline and fallback result"""
+
+    def __init__(self, coro: Awaitable, timeout: float, default: Any):
+        self.coro = coro
+        self.timeout = timeout
+        self.default = default
+
+async def run_probes(probes: Dict[str, Probe], budget: Optional[float] = None) -> Dict[str, Dict]:
+    """Start all probes together and collect their results.
+
+    Each probe is cut off at its own deadline and the whole fan-out at
+    ``budget`` seconds; a probe that times out or raises yields its default
+    (or the ProbeError's ``result``) with a non-'ok' status.
+    Returns ``{name: {'result', 'status', 'elapsed_ms'}}``.
+    """
+    started = time.perf_counter()
+    deadline = started + budget if budget is not None else None
+    finished = {}
+
+    async def _run(name: str, probe: Probe):
+        timeout = probe.timeout
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - time.perf_counter(), 0))
+        try:
+            return await asyncio.wait_for(probe.coro, timeout=timeout)
+        finally:
+            finished[name] = time.perf_counter()
+
+    tasks = {name: asyncio.ensure_future(_run(name, probe)) for name, probe in probes.items()}
+    try:
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+    except asyncio.CancelledError:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    outcome = {}
+    for name, task in tasks.items():
+        probe = probes[name]
+        error = task.exception()
+        if error is None:
+            outcome[name] = {'result': task.result(), 'status': 'ok'}
+        elif isinstance(error, asyncio.TimeoutError):
+            outcome[name] = {'result': probe.default, 'status': 'timeout'}
+        else:
+            result = getattr(error, 'result', None)
+            outcome[name] = {'result': result if result is not None else probe.default,
+                             'status': f'error: {error}'}
+        outcome[name]['elapsed_ms'] = round((finished[name] - started) * 1000, 1)
+
+    return outcome
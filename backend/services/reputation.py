@@ -0,0 +1,240 @@
+import asyncio
+import bisect
+import hashlib
+import math
+import os
+import pathlib
+import time
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+from services.url_utils import registrable_domain
+from services.logs import get_logger
+
+log = get_logger('reputation')
+
+DATA_DIR = pathlib.Path(__file__).parent.parent / "data"
+
+def fingerprint(domain: str) -> int:
+    """64-bit hash of a registrable domain; the key both structures store"""
+    return int.from_bytes(hashlib.blake2b(domain.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def domain_key(entry: str) -> Optional[str]:
+    """Registrable domain of a list line: a domain, a URL or a 'rank,domain' row"""
+    entry = entry.split('#', 1)[0].strip().lower()
+    if ',' in entry:
+        entry = entry.rsplit(',', 1)[1].strip()  # Tranco / Alexa CSV
+    if not entry:
+        return None
+    return registrable_domain(entry) or None
+
+class DomainSet:
+    """Immutable set of registrable domains with a Bloom filter in front.
+
+    Members are stored as a sorted array of 64-bit fingerprints (8 bytes
+    each); the Bloom filter, built from the same fingerprints, answers most
+    misses with ``hash_count`` bit tests and no search. Lookups that pass
+    the filter are confirmed against the array, so a Bloom false positive
+    never turns into a match.
+    """
+
+    def __init__(self, fingerprints: np.ndarray, error_rate: float = 0.01):
+        self.fingerprints = fingerprints
+        # bisect over a memoryview compares plain ints, far cheaper per lookup
+        # than a NumPy call
+        self._sorted = memoryview(np.ascontiguousarray(fingerprints)).cast('B').cast('Q')
+        self.error_rate = error_rate
+        n = max(len(fingerprints), 1)
+        self.bit_count = max(64, math.ceil(-n * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / n * math.log(2)))
+
+        bits = np.zeros(self.bit_count, dtype=bool)
+        h1, h2 = fingerprints & 0xFFFFFFFF, (fingerprints >> np.uint64(32)) | np.uint64(1)
+        for i in range(self.hash_count):
+            bits[(h1 + np.uint64(i) * h2) % np.uint64(self.bit_count)] = True
+        self.bits = np.packbits(bits, bitorder='little').tobytes()
+
+    @classmethod
+    def from_domains(cls, domains: Iterable[str], error_rate: float = 0.01) -> 'DomainSet':
+        return cls(_fingerprints(domains), error_rate)
+
+    def union(self, fingerprints: np.ndarray) -> 'DomainSet':
+        return DomainSet(np.union1d(self.fingerprints, fingerprints), self.error_rate)
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def __contains__(self, domain: str) -> bool:
+        return self.contains_fingerprint(fingerprint(domain))
+
+    def might_contain(self, fp: int) -> bool:
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        bits, m = self.bits, self.bit_count
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % m
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def contains_fingerprint(self, fp: int) -> bool:
+        if not self.might_contain(fp):
+            return False
+        i = bisect.bisect_left(self._sorted, fp)
+        return i < len(self._sorted) and self._sorted[i] == fp
+
+    def memory_bytes(self) -> int:
+        return len(self.bits) + self.fingerprints.nbytes
+
+def _fingerprints(domains: Iterable[str]) -> np.ndarray:
+    return np.unique(np.fromiter((fingerprint(domain) for domain in domains), dtype=np.uint64))
+
+class DomainList:
+    """A domain list file loaded into a DomainSet.
+
+    The file is expected to grow by appends (feeds, top-N dumps); when it
+    does, ``refresh`` reads only the bytes after the last complete line it
+    saw. A file that shrank or was replaced is read again from the start.
+    """
+
+    def __init__(self, name: str, path, error_rate: float = 0.01):
+        self.name = name
+        self.path = pathlib.Path(path)
+        self.error_rate = error_rate
+        self._reset()
+        self.loaded_at: Optional[float] = None
+        self.full_loads = 0
+        self.incremental_loads = 0
+
+    def _reset(self):
+        self.domains = DomainSet(np.zeros(0, dtype=np.uint64), self.error_rate)
+        self._offset = 0  # end of the last complete line read
+        self._stat = None
+
+    def _file_stat(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime, stat.st_size
+
+    def changed(self) -> bool:
+        return self._file_stat() != self._stat
+
+    def refresh(self) -> bool:
+        """Pick up file changes; returns True if the set changed"""
+        stat = self._file_stat()
+        if stat == self._stat:
+            return False
+        if stat is None:  # file removed
+            self._reset()
+            return True
+
+        inode, _, size = stat
+        incremental = self._stat is not None and inode == self._stat[0] and size >= self._offset
+
+        start = self._offset if incremental else 0
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        complete = data.rfind(b'\n') + 1  # a partly written last line waits for the next refresh
+        lines = data[:complete].decode('utf-8', errors='replace').splitlines()
+        new = _fingerprints(key for key in map(domain_key, lines) if key)
+
+        self.domains = self.domains.union(new) if incremental else DomainSet(new, self.error_rate)
+        self._offset = start + complete
+        self._stat = stat
+        self.loaded_at = time.time()
+        if incremental:
+            self.incremental_loads += 1
+        else:
+            self.full_loads += 1
+        return True
+
+    def info(self) -> Dict:
+        entries = len(self.domains)
+        memory = self.domains.memory_bytes()
+        return {
+            'path': str(self.path),
+            'entries': entries,
+            'memory_bytes': memory,
+            'memory_mb_per_million': round(memory / entries * 1e6 / 1024 / 1024, 2) if entries else None,
+            'bloom': {
+                'bits': self.domains.bit_count,
+                'hashes': self.domains.hash_count,
+                'error_rate': self.error_rate
+            },
+            'full_loads': self.full_loads,
+            'incremental_loads': self.incremental_loads,
+            'loaded_at': self.loaded_at
+        }
+
+class ReputationIndex:
+    """Local allowlist (popular domains) and denylist (phishing feeds).
+
+    Lookups are keyed by the registrable domain. A domain on both lists
+    gets no verdict, so a phishing page on a shared host does not condemn
+    the host and the allowlist does not hide it either. The files come
+    from REPUTATION_ALLOWLIST and REPUTATION_DENYLIST (defaults in data/)
+    and are polled every REPUTATION_POLL_SECONDS (0 disables).
+    """
+
+    def __init__(self, allowlist=None, denylist=None):
+        error_rate = float(os.getenv("REPUTATION_BLOOM_ERROR_RATE", "0.01"))
+        self.lists = {
+            'allow': DomainList('allow', allowlist or os.getenv(
+                "REPUTATION_ALLOWLIST", str(DATA_DIR / "allowlist.txt")), error_rate),
+            'deny': DomainList('deny', denylist or os.getenv(
+                "REPUTATION_DENYLIST", str(DATA_DIR / "denylist.txt")), error_rate),
+        }
+        self.counts = {'lookups': 0, 'allow': 0, 'deny': 0, 'conflict': 0}
+        self.last_error: Optional[str] = None
+
+    def refresh(self) -> List[str]:
+        """Reload changed list files; returns the names of the lists that changed"""
+        changed = []
+        for name, domain_list in self.lists.items():
+            try:
+                if domain_list.refresh():
+                    changed.append(name)
+            except OSError as e:
+                self.last_error = f"{domain_list.path}: {e}"
+                log.warning("Reputation list not reloaded", extra={'list': name, 'error': str(e)})
+        if changed:
+            log.info("Reputation lists reloaded", extra={
+                f"{name}_domains": len(self.lists[name].domains) for name in changed})
+        return changed
+
+    def lookup(self, url: str) -> Optional[str]:
+        """'allow', 'deny' or None for the URL's registrable domain"""
+        self.counts['lookups'] += 1
+        domain = registrable_domain(url)
+        if not domain:
+            return None
+        fp = fingerprint(domain)
+        allowed = self.lists['allow'].domains.contains_fingerprint(fp)
+        denied = self.lists['deny'].domains.contains_fingerprint(fp)
+        if allowed and denied:
+            self.counts['conflict'] += 1
+            return None
+        verdict = 'allow' if allowed else 'deny' if denied else None
+        if verdict:
+            self.counts[verdict] += 1
+        return verdict
+
+    async def watch(self, interval: Optional[float] = None):
+        interval = interval if interval is not None else float(os.getenv("REPUTATION_POLL_SECONDS", "60"))
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            if any(domain_list.changed() for domain_list in self.lists.values()):
+                await asyncio.to_thread(self.refresh)
+
+    def info(self) -> Dict:
+        return {
+            'lists': {name: domain_list.info() for name, domain_list in self.lists.items()},
+            **self.counts,
+            'last_error': self.last_error
+        }
+
+# Shared instance for the app
+reputation = ReputationIndex()
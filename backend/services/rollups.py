@@ -0,0 +1,185 @@
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from services.suffixes import suffixes
+from services.url_utils import registrable_domain
+from services.logs import get_logger
+from services.metrics import instrument
+
+log = get_logger('rollups')
+
+RISK_LEVELS = ('HIGH', 'MEDIUM', 'LOW')
+
+# Bucket width and how long buckets of that width are kept (None: forever)
+GRANULARITIES = {
+    'minute': (timedelta(minutes=1), timedelta(days=int(os.getenv("ROLLUP_MINUTE_RETENTION_DAYS", "7")))),
+    'hour': (timedelta(hours=1), timedelta(days=int(os.getenv("ROLLUP_HOUR_RETENTION_DAYS", "180")))),
+    'day': (timedelta(days=1), None)
+}
+
+# Per-domain minute buckets would be one document per domain per minute; domains
+# are rolled up by hour and day only
+DIMENSION_GRANULARITIES = {
+    'all': ('minute', 'hour', 'day'),
+    'tld': ('minute', 'hour', 'day'),
+    'domain': ('hour', 'day')
+}
+
+def bucket_start(when: datetime, granularity: str) -> datetime:
+    if granularity == 'minute':
+        return when.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return when.replace(minute=0, second=0, microsecond=0)
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def bucket_id(granularity: str, dimension: str, bucket: datetime) -> str:
+    return f"{granularity}|{dimension}|{bucket.isoformat()}"
+
+def analysis_tld(doc: Dict) -> str:
+    """Public suffix of an analysis document's URL ('-' for IPs and bare hosts)"""
+    return suffixes.extract(doc.get('host') or doc.get('url', '')).suffix or '-'
+
+def analysis_time(doc: Dict) -> Optional[datetime]:
+    """When an analysis was saved (naive UTC): ``created_at``, or for
+    documents written before that field existed the time in their ObjectId"""
+    created_at = doc.get('created_at')
+    if created_at is None and isinstance(doc.get('_id'), ObjectId):
+        created_at = doc['_id'].generation_time.replace(tzinfo=None)
+    return created_at
+
+def analysis_domain(doc: Dict) -> str:
+    """Registrable domain of an analysis document, derived from its URL
+    for documents written before ``domain`` was stored"""
+    return doc.get('domain') or (registrable_domain(doc['url']) if doc.get('url') else '')
+
+def increments(docs: Iterable[Dict], now: Optional[datetime] = None) -> Dict[str, Dict]:
+    """Counter increments for a batch of analysis documents, one entry per bucket.
+
+    Buckets whose retention has already passed are left out.
+    """
+    now = now or datetime.utcnow()
+    buckets: Dict[str, Dict] = {}
+    for doc in docs:
+        created_at = analysis_time(doc)
+        risk_level = doc.get('risk_level')
+        if created_at is None or risk_level not in RISK_LEVELS:
+            continue
+        dimensions = {'all': 'all', 'tld': f"tld:{analysis_tld(doc)}"}
+        domain = analysis_domain(doc)
+        if domain:
+            dimensions['domain'] = f"domain:{domain}"
+        for kind, dimension in dimensions.items():
+            for granularity in DIMENSION_GRANULARITIES[kind]:
+                width, retention = GRANULARITIES[granularity]
+                start = bucket_start(created_at, granularity)
+                if retention is not None and start + width + retention < now:
+                    continue
+                key = bucket_id(granularity, dimension, start)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = {
+                        'granularity': granularity, 'dimension': dimension, 'bucket': start,
+                        'expires_at': start + width + retention if retention is not None else None,
+                        'counts': defaultdict(int), 'total': 0, 'score_sum': 0
+                    }
+                bucket['counts'][risk_level] += 1
+                bucket['total'] += 1
+                bucket['score_sum'] += doc.get('trust_score') or 0
+    return buckets
+
+class RiskRollups:
+    """Pre-aggregated verdict counts for dashboards (the ``risk_rollups`` collection).
+
+    Every saved analysis increments a counter document per time bucket
+    (minute, hour, day) for the whole service, its TLD and its registrable
+    domain; ``record`` folds a batch into one ``$inc`` upsert per bucket.
+    Bucket ids are computable, so ``series`` reads a window with a single
+    ``_id`` lookup whatever the size of the history. Minute and hour
+    buckets expire through a TTL index (ROLLUP_MINUTE_RETENTION_DAYS,
+    ROLLUP_HOUR_RETENTION_DAYS). rebuild_stats.py recomputes the collection
+    from the analyses.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.enabled = os.getenv("ROLLUP_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.max_window = int(os.getenv("ROLLUP_MAX_WINDOW", "1440"))
+        self.counts = {'recorded': 0, 'upserts': 0, 'errors': 0}
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index('expires_at', name='expires', expireAfterSeconds=0)
+        except Exception as e:
+            log.warning("Rollup TTL index not created", extra={'error': repr(e)})
+
+    async def record(self, docs: List[Dict]):
+        """Add a batch of saved analyses to the rollups"""
+        if not self.enabled or not docs:
+            return
+        await self.apply(increments(docs))
+        self.counts['recorded'] += len(docs)
+
+    @instrument('db', 'rollups')
+    async def apply(self, buckets: Dict[str, Dict]):
+        if not buckets:
+            return
+        requests = []
+        for key, bucket in buckets.items():
+            inc = {f"counts.{level}": count for level, count in bucket['counts'].items()}
+            inc.update(total=bucket['total'], score_sum=bucket['score_sum'])
+            requests.append(UpdateOne({'_id': key}, {
+                '$inc': inc,
+                '$setOnInsert': {k: bucket[k] for k in ('granularity', 'dimension', 'bucket', 'expires_at')}
+            }, upsert=True))
+        try:
+            await self.collection.bulk_write(requests, ordered=False)
+            self.counts['upserts'] += len(requests)
+        except Exception as e:
+            self.counts['errors'] += 1
+            log.warning("Rollup update failed", extra={'buckets': len(requests), 'error': repr(e)})
+
+    async def series(self, granularity: str = 'hour', window: int = 24, domain: Optional[str] = None,
+                     tld: Optional[str] = None, now: Optional[datetime] = None) -> Dict:
+        """Counts for the last ``window`` buckets, oldest first, plus their totals
+
+        Raises ValueError for an unknown granularity or a granularity the
+        dimension is not rolled up by.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity {granularity!r}; use one of {', '.join(GRANULARITIES)}")
+        kind, dimension = ('domain', f"domain:{domain}") if domain else \
+            ('tld', f"tld:{tld.lstrip('.')}") if tld else ('all', 'all')
+        if granularity not in DIMENSION_GRANULARITIES[kind]:
+            raise ValueError(f"{kind} statistics are kept by {' and '.join(DIMENSION_GRANULARITIES[kind])} only")
+        window = max(1, min(window, self.max_window))
+
+        width = GRANULARITIES[granularity][0]
+        last = bucket_start(now or datetime.utcnow(), granularity)
+        starts = [last - i * width for i in range(window)][::-1]
+        ids = [bucket_id(granularity, dimension, start) for start in starts]
+        docs = await self.collection.find({'_id': {'$in': ids}}).to_list(length=len(ids))
+        found = {doc['_id']: doc for doc in docs}
+
+        buckets, totals = [], {level: 0 for level in RISK_LEVELS}
+        total, score_sum = 0, 0
+        for key, start in zip(ids, starts):
+            doc = found.get(key, {})
+            counts = {level: doc.get('counts', {}).get(level, 0) for level in RISK_LEVELS}
+            buckets.append(dict(counts, bucket=start, total=doc.get('total', 0),
+                                avg_trust_score=round(doc['score_sum'] / doc['total'], 1) if doc.get('total') else None))
+            for level in RISK_LEVELS:
+                totals[level] += counts[level]
+            total += doc.get('total', 0)
+            score_sum += doc.get('score_sum', 0)
+        return {
+            'granularity': granularity,
+            'dimension': dimension,
+            'buckets': buckets,
+            'totals': dict(totals, total=total, avg_trust_score=round(score_sum / total, 1) if total else None)
+        }
+
+    def stats(self) -> Dict:
+        return dict(self.counts, enabled=self.enabled)
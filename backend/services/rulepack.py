@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional
+from services.rules import Rule, RuleSet
+from services.typosquat import TyposquatIndex, load_brands
+from services.logs import get_logger
+
+log = get_logger('rulepack')
+
+DEFAULT_RULEPACK_PATH = pathlib.Path(__file__).parent.parent / "data" / "rulepack.json"
+
+class RulePackError(ValueError):
+    """The rule-pack file is missing, malformed or does not compile"""
+
+class RulePack:
+    """One immutable, compiled version of the detection lists.
+
+    Built from the rule-pack JSON: regexes and keywords become RuleSets,
+    shorteners and TLDs become sets, brands a TyposquatIndex. An analysis
+    takes one pack at its start and uses it throughout, so a reload never
+    mixes versions inside a verdict.
+    """
+
+    def __init__(self, source: Dict, base_dir=None):
+        self.base_dir = pathlib.Path(base_dir) if base_dir else DEFAULT_RULEPACK_PATH.parent
+        try:
+            url = source['url']
+            content = source['content']
+            self.suspicious_patterns: List[str] = list(url['suspicious_patterns'])
+            self.shorteners = frozenset(host.lower() for host in url['shorteners'])
+            self.suspicious_tlds = frozenset(tld.lower().lstrip('.') for tld in url['suspicious_tlds'])
+            self.security_terms: List[str] = list(url['security_terms'])
+            self.brands: List[str] = list(url.get('brands', []))
+            self.brands_file: Optional[str] = url.get('brands_file')
+            self.phishing_keywords: List[str] = list(content['phishing_keywords'])
+            self.urgency_patterns: List[str] = list(content['urgency_patterns'])
+            self.form_indicators: List[str] = list(content['form_indicators'])
+
+            self.url_rules = RuleSet(Rule(pattern, regex=True) for pattern in self.suspicious_patterns)
+            self.security_rules = RuleSet(Rule(term) for term in self.security_terms)
+            self.content_rules = RuleSet(
+                [Rule(keyword, group='keyword') for keyword in self.phishing_keywords] +
+                [Rule(pattern, regex=True, group='urgency') for pattern in self.urgency_patterns]
+            )
+            self.form_rules = RuleSet(Rule(indicator) for indicator in self.form_indicators)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise RulePackError(f"Invalid rule pack: {e!r}") from e
+        except Exception as e:  # re.error and friends
+            raise RulePackError(f"Rule pack does not compile: {e}") from e
+
+        self.source = source
+        canonical = json.dumps(source, sort_keys=True).encode('utf-8')
+        self.digest = hashlib.sha256(canonical).hexdigest()[:12]
+        self.version = str(source.get('version') or self.digest)
+        self._typosquat: Optional[TyposquatIndex] = None
+
+    @property
+    def typosquat(self) -> TyposquatIndex:
+        """Index over ``brands`` plus ``brands_file``, built on first use"""
+        if self._typosquat is None:
+            brands = list(self.brands)
+            if self.brands_file:
+                try:
+                    brands.extend(load_brands(self.base_dir / self.brands_file))
+                except OSError as e:
+                    raise RulePackError(f"Cannot read brands file {self.brands_file}: {e}") from e
+            self._typosquat = TyposquatIndex(brands)
+        return self._typosquat
+
+    @classmethod
+    def from_file(cls, path) -> 'RulePack':
+        try:
+            with open(path, encoding='utf-8') as f:
+                source = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise RulePackError(f"Cannot read rule pack {path}: {e}") from e
+        return cls(source, base_dir=pathlib.Path(path).parent)
+
+    def __reduce__(self):
+        # Sent to process-pool workers as its source; each worker compiles a
+        # given version once
+        return (_compiled_pack, (self.source,))
+
+    def is_shortener(self, host: str) -> bool:
+        """Exact match of the host or one of its parent domains"""
+        labels = host.lower().rstrip('.').split('.')
+        return any('.'.join(labels[i:]) in self.shorteners for i in range(len(labels) - 1))
+
+    def suspicious_tld(self, host: str) -> Optional[str]:
+        tld = host.lower().rstrip('.').rsplit('.', 1)[-1]
+        return tld if tld in self.suspicious_tlds else None
+
+    def info(self) -> Dict:
+        return {
+            'version': self.version,
+            'digest': self.digest,
+            'rules': {
+                'suspicious_patterns': len(self.suspicious_patterns),
+                'shorteners': len(self.shorteners),
+                'suspicious_tlds': len(self.suspicious_tlds),
+                'security_terms': len(self.security_terms),
+                'brands': len(self.typosquat),
+                'phishing_keywords': len(self.phishing_keywords),
+                'urgency_patterns': len(self.urgency_patterns),
+                'form_indicators': len(self.form_indicators)
+            }
+        }
+
+_worker_packs: Dict[str, RulePack] = {}
+
+def _compiled_pack(source: Dict) -> RulePack:
+    key = json.dumps(source, sort_keys=True)
+    pack = _worker_packs.get(key)
+    if pack is None:
+        _worker_packs.clear()  # only the newest version is needed
+        pack = _worker_packs[key] = RulePack(source)
+    return pack
+
+class RulePackManager:
+    """Holds the active RulePack and swaps in new versions.
+
+    ``reload`` compiles the file completely before replacing ``current`` in
+    a single assignment; analyses already running keep the pack they
+    started with. A file that fails to load leaves the active pack in place.
+    ``watch`` polls the file's mtime (RULEPACK_POLL_SECONDS, 0 disables).
+    """
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path or os.getenv("RULEPACK_PATH", str(DEFAULT_RULEPACK_PATH)))
+        self._current: Optional[RulePack] = None
+        self._mtime: Optional[float] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def current(self) -> RulePack:
+        if self._current is None:
+            self.reload()
+        return self._current
+
+    def reload(self) -> RulePack:
+        mtime = self._file_mtime()
+        try:
+            pack = RulePack.from_file(self.path)
+            pack.typosquat  # build the brand index before the swap
+        except RulePackError as e:
+            self.last_error = str(e)
+            if self._current is None:
+                raise
+            self._mtime = mtime  # retry once the file changes again
+            log.warning("Rule pack reload failed", extra={'keeping': self._current.version, 'error': str(e)})
+            return self._current
+
+        previous = self._current
+        self._current = pack
+        self._mtime = mtime
+        self.last_error = None
+        if previous is not None:
+            self.reloads += 1
+            log.info("Rule pack reloaded", extra={'previous': previous.version, 'version': pack.version})
+        return pack
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except OSError:
+            return None
+
+    def changed(self) -> bool:
+        return self._file_mtime() != self._mtime
+
+    async def watch(self, interval: Optional[float] = None):
+        interval = interval if interval is not None else float(os.getenv("RULEPACK_POLL_SECONDS", "30"))
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            if self.changed():
+                self.reload()
+
+    def info(self) -> Dict:
+        return dict(self.current.info(), path=str(self.path), reloads=self.reloads,
+                    last_error=self.last_error)
+
+# Shared instance for the app
+rule_packs = RulePackManager()
@@ -0,0 +1,141 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Pinned in requirements.txt; without it anchors are located with str.find
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Characters that end the literal prefix of a regex
+_REGEX_META = set('.^$*+?{}[]|()\\')
+
+class Rule:
+    """One detection rule: a literal substring or a regex.
+
+    ``id`` is what gets reported on a hit (the analyzers use the pattern
+    itself); ``group`` lets one RuleSet hold several rule lists.
+    """
+
+    __slots__ = ('id', 'pattern', 'regex', 'group', 'compiled', 'anchor')
+
+    def __init__(self, id: str, pattern: Optional[str] = None, regex: bool = False, group: str = ''):
+        self.id = id
+        self.pattern = pattern if pattern is not None else id
+        self.regex = regex
+        self.group = group
+        self.compiled = re.compile(self.pattern) if regex else None
+        self.anchor = literal_prefix(self.pattern) if regex else self.pattern
+
+    def __repr__(self):
+        kind = 'regex' if self.regex else 'literal'
+        return f"Rule({self.id!r}, {kind}, group={self.group!r})"
+
+def literal_prefix(pattern: str) -> str:
+    """Literal text every match of ``pattern`` must start with ('' if none)"""
+    if '|' in pattern:
+        return ''  # top-level alternation has no common prefix to rely on
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                prefix.append(pattern[i + 1])  # escaped punctuation, e.g. \.
+                i += 2
+                continue
+            break  # class such as \d or \w
+        if char in _REGEX_META:
+            if char in '?*{' and prefix:
+                prefix.pop()  # the previous character is optional
+            break
+        prefix.append(char)
+        i += 1
+    return ''.join(prefix)
+
+def combined_pattern(rules: List[Rule]) -> Optional[re.Pattern]:
+    """One regex that tries every rule at each position of the text.
+
+    Each rule is an optional lookahead in its own group ``r<index>``, so
+    rules matching at the same position are all reported; the trailing
+    conditionals fail the position unless at least one of them matched.
+    """
+    if not rules:
+        return None
+    attempts = ''.join(f'(?:(?=(?P<r{index}>{rule.pattern}))|)' for index, rule in enumerate(rules))
+    any_matched = ''.join(f'(?(r{index})|' for index in range(len(rules))) + '(?!)' + ')' * len(rules)
+    return re.compile(attempts + any_matched)
+
+class RuleSet:
+    """All rules compiled into one matcher.
+
+    Literals, and the literal prefixes of regex rules, go into a single
+    Aho-Corasick automaton, so the text is walked once no matter how many
+    rules there are. All regex rules are then checked in one more pass of a
+    combined pattern, which only runs when a regex could match, starts at
+    the first anchor found and stops once every possible rule has hit.
+    ``scan`` reports every rule that matches, in declaration order.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: List[Rule] = list(rules)
+        self.anchors = sorted({rule.anchor for rule in self.rules if rule.anchor})
+        self.regexes = [rule for rule in self.rules if rule.regex]
+        self.unanchored = [rule for rule in self.regexes if not rule.anchor]
+        self._combined = combined_pattern(self.regexes)
+
+        self._automaton = None
+        if ahocorasick is not None and self.anchors:
+            self._automaton = ahocorasick.Automaton()
+            for anchor in self.anchors:
+                self._automaton.add_word(anchor, anchor)
+            self._automaton.make_automaton()
+
+    def _first_positions(self, text: str) -> Dict[str, int]:
+        """Start of the first occurrence of each anchor present in ``text``"""
+        positions = {}
+        if self._automaton is None:
+            for anchor in self.anchors:
+                index = text.find(anchor)
+                if index >= 0:
+                    positions[anchor] = index
+            return positions
+
+        # Matches arrive in order of end position; stop once every anchor is placed
+        remaining = len(self.anchors)
+        for end, anchor in self._automaton.iter(text):
+            if anchor not in positions:
+                positions[anchor] = end - len(anchor) + 1
+                remaining -= 1
+                if not remaining:
+                    break
+        return positions
+
+    def _regex_hits(self, text: str, positions: Dict[str, int]) -> set:
+        """Indexes (into ``regexes``) of the regex rules matching ``text``"""
+        # A match of an anchored regex starts at an occurrence of its anchor
+        candidates = {index for index, rule in enumerate(self.regexes)
+                      if not rule.anchor or rule.anchor in positions}
+        if not candidates:
+            return set()
+        start = 0 if self.unanchored else min(positions[self.regexes[index].anchor] for index in candidates)
+
+        hits = set()
+        for match in self._combined.finditer(text, start):
+            hits.update(int(name[1:]) for name, value in match.groupdict().items() if value is not None)
+            if hits >= candidates:
+                break
+        return hits
+
+    def scan(self, text: str) -> List[Rule]:
+        """Every rule matching ``text``, in declaration order"""
+        positions = self._first_positions(text) if self.anchors else {}
+        regex_hits = set()
+        if self._combined is not None:
+            regex_hits = {self.regexes[index] for index in self._regex_hits(text, positions)}
+        return [rule for rule in self.rules
+                if (rule in regex_hits if rule.regex else rule.anchor in positions)]
+
+    def matches(self, text: str, group: Optional[str] = None) -> List[str]:
+        """IDs of the matching rules, optionally limited to one group"""
+        return [rule.id for rule in self.scan(text) if group is None or rule.group == group]
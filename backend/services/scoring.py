@@ -0,0 +1,65 @@
+def calculate_trust_score(url_data: dict, ai_analysis: dict) -> int:
+    """Calculate trust score based on various factors"""
+    score = 100
+    
+    # VirusTotal detections
+    if url_data.get("virustotal_detections", 0) > 0:
+        score -= url_data["virustotal_detections"] * 15
+    
+    # Domain age
+    if url_data.get("domain_age_days", 365) < 30:
+        score -= 20
+    
+    # SSL certificate
+    if not url_data.get("has_ssl", False):
+        score -= 15
+    
+    # Suspicious patterns
+    score -= len(url_data.get("suspicious_patterns", [])) * 10
+    
+    # AI analysis
+    if ai_analysis.get("is_phishing", False):
+        score -= 30
+    
+    if ai_analysis.get("urgency_detected", False):
+        score -= 15
+    
+    # Local reputation lists: denylisted is a scam, allowlisted at least low risk
+    if url_data.get("reputation") == "deny":
+        return 0
+    if url_data.get("reputation") == "allow":
+        score = max(score, 70)
+    
+    return max(0, min(100, score))
+
+def risk_level_for(trust_score: int) -> str:
+    """Map a trust score to LOW / MEDIUM / HIGH risk"""
+    return "LOW" if trust_score >= 70 else "MEDIUM" if trust_score >= 40 else "HIGH"
+
+
+# The most a signal that has not been collected yet can take off the score
+# (mirrors calculate_trust_score; VirusTotal is unbounded, so the whole range)
+MAX_PENALTY = {
+    "ssl": 15,
+    "virustotal": 100,
+    "content": 45,  # phishing verdict + urgency
+    "llm": 30,      # can only add the phishing verdict
+}
+
+def score_bounds(url_data: dict, ai_analysis: dict, pending) -> tuple:
+    """(lowest, highest) trust score still reachable once the ``pending`` stages run.
+
+    ``url_data`` and ``ai_analysis`` hold what is known so far, with
+    uncollected signals at their harmless defaults, so the current score is
+    the best case and every pending stage can only lower it.
+    """
+    highest = calculate_trust_score(url_data, ai_analysis)
+    drop = 0
+    for stage in pending:
+        if stage == "llm" and ("content" in pending or ai_analysis.get("is_phishing", False)):
+            continue  # the phishing verdict is counted once
+        drop += MAX_PENALTY.get(stage, 0)
+    lowest = max(0, highest - drop)
+    if url_data.get("reputation") == "allow":
+        lowest = max(lowest, 70)
+    return lowest, highest
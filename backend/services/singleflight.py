@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from services.logs import get_logger
+
+log = get_logger('singleflight')
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight task.
+
+    The first caller for a key starts ``fn``; everyone arriving while it runs
+    awaits the same task and receives its result, or its exception. The task
+    is shielded, so one waiter disconnecting does not cancel it for the rest.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, Dict] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = {'task': asyncio.ensure_future(fn()), 'waiters': 0}
+            self._calls[key] = call
+            self.started += 1
+            call['task'].add_done_callback(lambda _: self._finish(key, call))
+        else:
+            self.coalesced += 1
+
+        call['waiters'] += 1
+        return await asyncio.shield(call['task'])
+
+    def _finish(self, key: str, call: Dict):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        task = call['task']
+        outcome = 'cancelled' if task.cancelled() else 'failed' if task.exception() else 'ok'
+        if call['waiters'] > 1 or outcome != 'ok':
+            log.log(logging.DEBUG if outcome == 'ok' else logging.INFO, "Shared call finished",
+                    extra={'flight': self.name, 'key': key, 'waiters': call['waiters'], 'outcome': outcome})
+
+    def stats(self) -> Dict:
+        return {
+            'in_flight': len(self._calls),
+            'started': self.started,
+            'coalesced': self.coalesced
+        }
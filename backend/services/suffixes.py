@@ -0,0 +1,70 @@
+import hashlib
+import os
+import pathlib
+import re
+import time
+import requests
+import tldextract
+from requests_file import FileAdapter
+from typing import Dict, Optional
+
+DEFAULT_SUFFIX_LIST_PATH = pathlib.Path(__file__).parent.parent / "data" / "public_suffix_list.dat"
+
+def snapshot_version(text: str) -> str:
+    """The '// VERSION:' header of a suffix list, else a content hash"""
+    match = re.search(r'^// VERSION: (\S+)', text[:4096], re.MULTILINE)
+    if match:
+        return match.group(1)
+    return 'sha256:' + hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+class _UTF8FileAdapter(FileAdapter):
+    """file:// adapter that declares UTF-8, so requests does not run charset
+    detection over the whole list (most of the load time otherwise)"""
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        response.encoding = 'utf-8'
+        return response
+
+class SuffixList:
+    """Public Suffix List extractor backed by the bundled snapshot.
+
+    The module-level ``tldextract.extract`` fetches the list over the
+    network and writes a disk cache the first time it is used. This
+    extractor reads only the snapshot file (PUBLIC_SUFFIX_LIST, default
+    data/public_suffix_list.dat) and keeps nothing on disk; ``load`` builds
+    its suffix trie up front so no request pays for it.
+    """
+
+    def __init__(self, path=None):
+        self.path = pathlib.Path(path or os.getenv("PUBLIC_SUFFIX_LIST", str(DEFAULT_SUFFIX_LIST_PATH)))
+        self._extractor: Optional[tldextract.TLDExtract] = None
+        self.version: Optional[str] = None
+        self.load_ms: Optional[float] = None
+
+    def load(self) -> tldextract.TLDExtract:
+        started = time.perf_counter()
+        extractor = tldextract.TLDExtract(
+            cache_dir=None,
+            suffix_list_urls=(self.path.resolve().as_uri(),),
+            fallback_to_snapshot=False
+        )
+        with requests.Session() as session:
+            session.mount('file://', _UTF8FileAdapter())
+            extractor('example.com', session=session)  # parse the list into the trie now
+        with open(self.path, encoding='utf-8') as f:
+            self.version = snapshot_version(f.read(4096))
+        self._extractor = extractor
+        self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+        return extractor
+
+    def extract(self, url: str):
+        """tldextract.extract, against the bundled snapshot"""
+        extractor = self._extractor or self.load()
+        return extractor(url)
+
+    def info(self) -> Dict:
+        return {'path': str(self.path), 'version': self.version, 'load_ms': self.load_ms}
+
+# Shared instance for the app
+suffixes = SuffixList()
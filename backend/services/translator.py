@@ -1,142 +1,215 @@
-import openai
+import asyncio
+import hashlib
 import os
-from typing import Dict
-from deep_translator import GoogleTranslator
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from pymongo.errors import DuplicateKeyError
+from services.cache import TTLCache
+from services.llm_client import LLMClient, normalize_text
+from services.locales import SOURCE_LANGUAGE, LocaleCatalog, Locale, locales as default_locales
+from services.singleflight import SingleFlight
+from services.logs import get_logger
+from services.metrics import instrument
+
+log = get_logger('translator')
+
+TRANSLATION_SYSTEM_PROMPT = ("You are a professional translator specializing in English to {language} "
+                             "translation, particularly for cybersecurity content.")
+
+TRANSLATION_PROMPT = """
+Translate the following cybersecurity-related text from English to {language}.
+The translation should be accurate and appropriate for elderly users who may not be tech-savvy.
+Keep technical terms like "URL", "phishing", "scam" in English with {language} explanations where needed.
+
+Text to translate: {text}
+
+Provide only the {language} translation.
+"""
+
+class TranslationMemo:
+    """Translations of strings the locale catalog does not cover.
+
+    An in-process LRU (TRANSLATION_MEMO_SIZE, TRANSLATION_MEMO_TTL) sits in
+    front of the optional Mongo ``translations`` collection, keyed by
+    language and a hash of the normalized text. Concurrent misses in one
+    process share a single translation; across processes the first worker
+    inserts a claim document and the others poll it for the result (for
+    up to TRANSLATION_CLAIM_SECONDS, after which a claim counts as
+    abandoned), so each distinct string is translated once for the fleet.
+    Failed translations are not memoized.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self.cache = TTLCache(maxsize=int(os.getenv("TRANSLATION_MEMO_SIZE", "10000")),
+                              ttl=float(os.getenv("TRANSLATION_MEMO_TTL", str(30 * 86400))))
+        self.claim_timeout = float(os.getenv("TRANSLATION_CLAIM_SECONDS", "30"))
+        self.poll_interval = 0.25
+        self.flight = SingleFlight("translate")
+        self.counts = {'translated': 0, 'shared_hits': 0, 'peer_waits': 0, 'failures': 0, 'errors': 0}
+
+    @staticmethod
+    def key(text: str, language: str) -> str:
+        return f"{language}:{hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()}"
+
+    async def get(self, text: str, language: str, translate: Callable[[], Awaitable[str]]) -> Optional[str]:
+        """Memoized ``translate()`` of ``text``, or None if it failed"""
+        key = self.key(text, language)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return await self.flight.do(key, lambda: self._resolve(key, text, language, translate))
+
+    async def _resolve(self, key: str, text: str, language: str, translate) -> Optional[str]:
+        if self.collection is None:
+            return await self._translate(key, translate)
+        try:
+            deadline = time.monotonic() + self.claim_timeout
+            waited = False
+            while True:
+                doc = await self.collection.find_one({'_id': key})
+                if doc is not None and doc.get('text') is not None:
+                    self.counts['shared_hits'] += 1
+                    self.cache.set(key, doc['text'])
+                    return doc['text']
+                if await self._claim(key, text, language, doc):
+                    break
+                # Another worker is translating this string; wait for its result
+                if time.monotonic() >= deadline:
+                    return None
+                if not waited:
+                    self.counts['peer_waits'] += 1
+                    waited = True
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            self.counts['errors'] += 1
+            log.warning("Translation memo lookup failed", extra={'error': repr(e)})
+            return await self._translate(key, translate)
+
+        result = await self._translate(key, translate)
+        try:
+            if result is None:
+                await self.collection.delete_one({'_id': key, 'text': None})
+            else:
+                await self.collection.update_one({'_id': key}, {
+                    '$set': {'text': result, 'translated_at': datetime.utcnow()}
+                })
+        except Exception as e:
+            self.counts['errors'] += 1
+            log.warning("Translation memo save failed", extra={'error': repr(e)})
+        return result
+
+    async def _claim(self, key: str, text: str, language: str, doc: Optional[Dict]) -> bool:
+        now = datetime.utcnow()
+        if doc is None:
+            try:
+                await self.collection.insert_one({'_id': key, 'language': language, 'source': text,
+                                                  'text': None, 'claimed_at': now})
+                return True
+            except DuplicateKeyError:
+                return False
+        if doc['claimed_at'] < now - timedelta(seconds=self.claim_timeout):
+            # The claiming worker died or gave up; take the claim over
+            result = await self.collection.update_one(
+                {'_id': key, 'text': None, 'claimed_at': doc['claimed_at']},
+                {'$set': {'claimed_at': now}}
+            )
+            return result.modified_count == 1
+        return False
+
+    async def _translate(self, key: str, translate) -> Optional[str]:
+        try:
+            result = await translate()
+        except Exception as e:
+            self.counts['failures'] += 1
+            log.warning("AI translation failed", extra={'error': repr(e)})
+            return None
+        if not result:
+            self.counts['failures'] += 1
+            return None
+        self.counts['translated'] += 1
+        self.cache.set(key, result)
+        return result
+
+    def stats(self) -> Dict:
+        return dict(self.counts, shared_tier=self.collection is not None,
+                    cache=self.cache.stats(), singleflight=self.flight.stats())
 
 class TranslationService:
-    def __init__(self):
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        if self.openai_api_key:
-            openai.api_key = self.openai_api_key
-        
-        # Pre-defined translations for common phrases
-        self.predefined_translations = {
-            "This URL appears to be safe to visit. No significant threats detected.": 
-                "ಈ ಲಿಂಕ್ ಸುರಕ್ಷಿತವಾಗಿ ಕಾಣುತ್ತದೆ. ಯಾವುದೇ ಗಮನಾರ್ಹ ಅಪಾಯಗಳು ಪತ್ತೆಯಾಗಿಲ್ಲ.",
-            "This URL shows some suspicious characteristics. Exercise caution before visiting.":
-                "ಈ ಲಿಂಕ್ ಕೆಲವು ಅನುಮಾನಾಸ್ಪದ ಲಕ್ಷಣಗಳನ್ನು ತೋರಿಸುತ್ತದೆ. ಭೇಟಿ ನೀಡುವ ಮೊದಲು ಎಚ್ಚರಿಕೆ ವಹಿಸಿ.",
-            "⚠️ WARNING: This URL appears to be a scam or phishing site. Do not visit or enter any personal information.":
-                "⚠️ ಎಚ್ಚರಿಕೆ: ಈ ಲಿಂಕ್ ಮೋಸ ಅಥವಾ ಫಿಶಿಂಗ್ ಸೈಟ್ ಆಗಿ ಕಾಣುತ್ತದೆ. ಭೇಟಿ ನೀಡಬೇಡಿ ಅಥವಾ ಯಾವುದೇ ವೈಯಕ್ತಿಕ ಮಾಹಿತಿಯನ್ನು ನಮೂದಿಸಬೇಡಿ.",
-            "The site appears safe, but always verify the URL before entering sensitive information.":
-                "ಸೈಟ್ ಸುರಕ್ಷಿತವಾಗಿ ಕಾಣುತ್ತದೆ, ಆದರೆ ಸೂಕ್ಷ್ಮ ಮಾಹಿತಿಯನ್ನು ನಮೂದಿಸುವ ಮೊದಲು ಯಾವಾಗಲೂ URL ಅನ್ನು ಪರಿಶೀಲಿಸಿ.",
-            "Proceed with caution. Verify the sender and avoid entering personal information.":
-                "ಎಚ್ಚರಿಕೆಯಿಂದ ಮುಂದುವರಿಯಿರಿ. ಕಳುಹಿಸಿದವರನ್ನು ಪರಿಶೀಲಿಸಿ ಮತ್ತು ವೈಯಕ್ತಿಕ ಮಾಹಿತಿಯನ್ನು ನಮೂದಿಸುವುದನ್ನು ತಪ್ಪಿಸಿ.",
-            "DO NOT visit this site. Block the sender and report as spam/phishing.":
-                "ಈ ಸೈಟ್‌ಗೆ ಭೇಟಿ ನೀಡಬೇಡಿ. ಕಳುಹಿಸಿದವರನ್ನು ನಿರ್ಬಂಧಿಸಿ ಮತ್ತು ಸ್ಪ್ಯಾಮ್/ಫಿಶಿಂಗ್ ಆಗಿ ವರದಿ ಮಾಡಿ."
-        }
-    
+    """Localized response text.
+
+    Catalog messages come straight from the precompiled LocaleCatalog.
+    Other text - and catalog messages a locale does not have yet - is
+    translated from English by the LLM through the TranslationMemo, with a
+    glossary substitution from the locale file as the offline fallback.
+    """
+
+    def __init__(self, catalog: Optional[LocaleCatalog] = None, memo: Optional[TranslationMemo] = None,
+                 llm: Optional[LLMClient] = None):
+        self.catalog = catalog or default_locales
+        self.memo = memo or TranslationMemo()
+        self.llm = llm or LLMClient()
+        self.counts = {'catalog': 0, 'memo': 0, 'fallback': 0}
+
+    def language_for(self, language: str) -> str:
+        """``language`` if there is a locale for it, else English"""
+        return language if self.catalog.supports(language) else SOURCE_LANGUAGE
+
+    @instrument('translator', 'localize')
+    async def localize(self, message_id: str, language: str) -> Dict:
+        """Catalog message as {'english': ..., '<language key>': ...}"""
+        language = self.language_for(language)
+        response = self.catalog.lookup(message_id, language)
+        if response is not None:
+            self.counts['catalog'] += 1
+            return response
+        return await self.translate_texts({'english': self.catalog.source_text(message_id)}, language)
+
+    async def translate_texts(self, texts: Dict, language: str) -> Dict:
+        """Add the ``language`` translation of ``texts['english']``"""
+        language = self.language_for(language)
+        if not texts.get('english') or language == SOURCE_LANGUAGE:
+            return texts
+        locale = self.catalog.locale(language)
+        return {'english': texts['english'], locale.key: await self.translate(texts['english'], language)}
+
+    async def translate(self, text: str, language: str) -> str:
+        locale = self.catalog.locale(language)
+        known = self.catalog.translation(text, language)
+        if known is not None:
+            self.counts['catalog'] += 1
+            return known
+        if self.llm.enabled:
+            translated = await self.memo.get(text, language, lambda: self._ai_translate(text, locale))
+            if translated is not None:
+                self.counts['memo'] += 1
+                return translated
+        self.counts['fallback'] += 1
+        return self._basic_translate(text, locale)
+
     async def translate_to_kannada(self, summary: Dict) -> Dict:
         """Translate summary to Kannada"""
-        if not summary.get('english'):
-            return summary
-        
-        english_text = summary['english']
-        
-        # Check if we have a predefined translation
-        if english_text in self.predefined_translations:
-            return {
-                'english': english_text,
-                'kannada': self.predefined_translations[english_text]
-            }
-        
-        # Use AI translation if available
-        if self.openai_api_key:
-            try:
-                kannada_text = await self._ai_translate_to_kannada(english_text)
-                return {
-                    'english': english_text,
-                    'kannada': kannada_text
-                }
-            except Exception as e:
-                print(f"AI translation failed: {e}")
-        
-        # Fallback to basic translation
-        return {
-            'english': english_text,
-            'kannada': self._basic_translate_to_kannada(english_text)
-        }
-    
+        return await self.translate_texts(summary, 'kn')
+
     async def translate_recommendations(self, recommendations: Dict) -> Dict:
         """Translate recommendations to Kannada"""
-        if not recommendations.get('english'):
-            return recommendations
-        
-        english_text = recommendations['english']
-        
-        # Check predefined translations
-        if english_text in self.predefined_translations:
-            return {
-                'english': english_text,
-                'kannada': self.predefined_translations[english_text]
-            }
-        
-        # Use AI translation
-        if self.openai_api_key:
-            try:
-                kannada_text = await self._ai_translate_to_kannada(english_text)
-                return {
-                    'english': english_text,
-                    'kannada': kannada_text
-                }
-            except Exception as e:
-                print(f"AI translation failed: {e}")
-        
-        # Fallback
-        return {
-            'english': english_text,
-            'kannada': self._basic_translate_to_kannada(english_text)
-        }
-    
-    async def _ai_translate_to_kannada(self, text: str) -> str:
-        """Use AI to translate text to Kannada"""
-        try:
-            prompt = f"""
-            Translate the following cybersecurity-related text from English to Kannada. 
-            The translation should be accurate and appropriate for elderly users who may not be tech-savvy.
-            Keep technical terms like "URL", "phishing", "scam" in English with Kannada explanations where needed.
-            
-            Text to translate: {text}
-            
-            Provide only the Kannada translation.
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a professional translator specializing in English to Kannada translation, particularly for cybersecurity content."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.1
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            print(f"AI translation error: {e}")
-            return self._basic_translate_to_kannada(text)
-    
-    def _basic_translate_to_kannada(self, text: str) -> str:
-        """Basic fallback translation using keyword replacement"""
-        # Simple keyword-based translation as fallback
-        translations = {
-            "safe": "ಸುರಕ್ಷಿತ",
-            "unsafe": "ಅಸುರಕ್ಷಿತ",
-            "dangerous": "ಅಪಾಯಕಾರಿ",
-            "warning": "ಎಚ್ಚರಿಕೆ",
-            "caution": "ಎಚ್ಚರಿಕೆ",
-            "scam": "ಮೋಸ",
-            "phishing": "ಫಿಶಿಂಗ್",
-            "suspicious": "ಅನುಮಾನಾಸ್ಪದ",
-            "verify": "ಪರಿಶೀಲಿಸಿ",
-            "do not": "ಬೇಡಿ",
-            "click": "ಕ್ಲಿಕ್ ಮಾಡಿ",
-            "visit": "ಭೇಟಿ ನೀಡಿ",
-            "personal information": "ವೈಯಕ್ತಿಕ ಮಾಹಿತಿ"
-        }
-        
-        kannada_text = text.lower()
-        for english, kannada in translations.items():
-            kannada_text = kannada_text.replace(english, kannada)
-        
-        return kannada_text + " (ಆಟೋ ಅನುವಾದ)"
\ No newline at end of file
+        return await self.translate_texts(recommendations, 'kn')
+
+    @instrument('translator', 'llm')
+    async def _ai_translate(self, text: str, locale: Locale) -> str:
+        """Use AI to translate text from English to the locale's language"""
+        content = await self.llm.complete(
+            TRANSLATION_SYSTEM_PROMPT.format(language=locale.name),
+            TRANSLATION_PROMPT.format(language=locale.name, text=text),
+            max_tokens=200
+        )
+        return content.strip()
+
+    @instrument('translator', 'fallback')
+    def _basic_translate(self, text: str, locale: Locale) -> str:
+        """Basic fallback translation: whole-word glossary substitution"""
+        return locale.fallback.translate(text) + locale.auto_translation_note
+
+    def stats(self) -> Dict:
+        return dict(self.counts, memo=self.memo.stats())
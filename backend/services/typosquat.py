@@ -0,0 +1,209 @@
+import os
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+# Look-alike characters mapped to the ASCII letter they imitate. Covers the
+# Cyrillic/Greek letters seen in IDN phishing plus common digit swaps.
+HOMOGLYPHS = {
+    'а': 'a', 'ɑ': 'a', 'α': 'a', '@': 'a', '4': 'a',
+    'Ь': 'b', 'в': 'b', 'β': 'b', '8': 'b',
+    'с': 'c', 'ϲ': 'c', 'ç': 'c',
+    'ԁ': 'd', 'ɗ': 'd',
+    'е': 'e', 'ё': 'e', 'ε': 'e', '3': 'e',
+    'ɡ': 'g', '9': 'g',
+    'һ': 'h',
+    'і': 'i', 'ı': 'i', 'ι': 'i', '!': 'i',
+    'ј': 'j',
+    'κ': 'k', 'к': 'k',
+    'ӏ': 'l', '1': 'l', '|': 'l', 'ⅼ': 'l',
+    'м': 'm',
+    'п': 'n', 'η': 'n',
+    'о': 'o', 'ο': 'o', '0': 'o', 'σ': 'o',
+    'р': 'p', 'ρ': 'p',
+    'ԛ': 'q',
+    'г': 'r',
+    'ѕ': 's', '5': 's', '$': 's',
+    'т': 't', 'τ': 't', '7': 't',
+    'υ': 'u', 'ц': 'u',
+    'ν': 'v', 'ѵ': 'v',
+    'ԝ': 'w', 'ш': 'w',
+    'х': 'x', 'χ': 'x',
+    'у': 'y', 'γ': 'y',
+    'ᴢ': 'z', '2': 'z',
+}
+# Multi-letter look-alikes ("rn" reads as "m")
+HOMOGLYPH_SEQUENCES = (('rn', 'm'), ('vv', 'w'), ('cl', 'd'))
+
+QWERTY_ROWS = ('1234567890', 'qwertyuiop', 'asdfghjkl', 'zxcvbnm')
+
+def _keyboard_neighbours() -> Dict[str, Set[str]]:
+    positions = {}
+    for row, keys in enumerate(QWERTY_ROWS):
+        for col, key in enumerate(keys):
+            positions[key] = (row, col)
+    neighbours = {key: set() for key in positions}
+    for key, (row, col) in positions.items():
+        for other, (other_row, other_col) in positions.items():
+            if other != key and abs(row - other_row) <= 1 and abs(col - other_col) <= 1:
+                neighbours[key].add(other)
+    return neighbours
+
+KEYBOARD_NEIGHBOURS = _keyboard_neighbours()
+
+class TyposquatMatch(NamedTuple):
+    brand: str
+    distance: int
+    kind: str  # 'exact', 'homoglyph', 'keyboard' or 'edit'
+
+def decode_idn(label: str) -> str:
+    """Unicode form of a punycode label ('xn--pypal-4ve' -> 'pаypal')"""
+    if label.startswith('xn--'):
+        try:
+            return label.encode('ascii').decode('idna')
+        except UnicodeError:
+            return label
+    return label
+
+def skeleton(label: str) -> str:
+    """ASCII 'looks-like' form of a label, used to catch homoglyph spoofs"""
+    text = unicodedata.normalize('NFKC', decode_idn(label).lower())
+    chars = []
+    for char in text:
+        char = HOMOGLYPHS.get(char, char)
+        if not char.isascii():
+            # Accented Latin letters fall back to their base letter
+            char = unicodedata.normalize('NFKD', char)[:1]
+        chars.append(char)
+    text = ''.join(chars)
+    for sequence, replacement in HOMOGLYPH_SEQUENCES:
+        text = text.replace(sequence, replacement)
+    return text
+
+def levenshtein(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
+    """Edit distance; with ``max_distance``, anything larger returns max_distance + 1"""
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if max_distance is not None and len(s1) - len(s2) > max_distance:
+        return max_distance + 1
+    if not s2:
+        return len(s1)
+
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            current_row.append(min(previous_row[j + 1] + 1, current_row[j] + 1,
+                                   previous_row[j] + (c1 != c2)))
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+    return previous_row[-1]
+
+def is_keyboard_typo(candidate: str, brand: str) -> bool:
+    """Same length and every differing character is a neighbouring key"""
+    if len(candidate) != len(brand) or candidate == brand:
+        return False
+    return all(a == b or a in KEYBOARD_NEIGHBOURS.get(b, ()) for a, b in zip(candidate, brand))
+
+class TyposquatIndex:
+    """Brands within a small edit distance of a domain label, in sublinear time.
+
+    A SymSpell-style symmetric delete index: every string reachable from a
+    brand's first ``prefix_length`` characters by up to ``max_distance``
+    deletions maps back to the brand. A lookup generates the same deletes of
+    the query, collects the brands they hit and verifies only those with a
+    bounded Levenshtein distance, so the cost depends on the label length,
+    not on how many brands are indexed. Labels are also looked up by their
+    homoglyph skeleton, which catches IDN and digit-swap spoofs.
+    """
+
+    def __init__(self, brands: Iterable[str], max_distance: int = 2, prefix_length: Optional[int] = None):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length or int(os.getenv("TYPOSQUAT_PREFIX_LENGTH", "7"))
+        self.brands: List[str] = []
+        self._deletes: Dict[str, object] = {}  # delete -> brand id, or list of ids
+        self._skeletons: Dict[str, List[int]] = {}
+
+        seen = set()
+        for brand in brands:
+            brand = brand.strip().lower()
+            if not brand or brand in seen:
+                continue
+            seen.add(brand)
+            self._add(brand)
+
+    def __len__(self):
+        return len(self.brands)
+
+    def _add(self, brand: str):
+        brand_id = len(self.brands)
+        self.brands.append(brand)
+        for key in self._delete_variants(brand):
+            existing = self._deletes.get(key)
+            if existing is None:
+                self._deletes[key] = brand_id  # most keys belong to one brand
+            elif isinstance(existing, list):
+                existing.append(brand_id)
+            else:
+                self._deletes[key] = [existing, brand_id]
+        self._skeletons.setdefault(skeleton(brand), []).append(brand_id)
+
+    def _delete_variants(self, word: str) -> Set[str]:
+        variants = level = {word[:self.prefix_length]}
+        for _ in range(self.max_distance):
+            level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))}
+            variants = variants | level
+        return variants
+
+    def _candidates(self, label: str) -> Set[int]:
+        candidates = set()
+        for key in self._delete_variants(label):
+            hit = self._deletes.get(key)
+            if hit is None:
+                continue
+            if isinstance(hit, list):
+                candidates.update(hit)
+            else:
+                candidates.add(hit)
+        return candidates
+
+    def lookup(self, label: str) -> List[TyposquatMatch]:
+        """Brands the label imitates, closest first"""
+        label = label.strip().lower()
+        if not label:
+            return []
+
+        matches = {}
+        plain = decode_idn(label)
+        for brand_id in self._candidates(plain):
+            brand = self.brands[brand_id]
+            if abs(len(brand) - len(plain)) > self.max_distance:
+                continue
+            distance = levenshtein(plain, brand, self.max_distance)
+            if distance <= self.max_distance:
+                if distance == 0:
+                    kind = 'exact'
+                elif is_keyboard_typo(plain, brand):
+                    kind = 'keyboard'
+                else:
+                    kind = 'edit'
+                matches[brand] = TyposquatMatch(brand, distance, kind)
+
+        label_skeleton = skeleton(label)
+        if label_skeleton != plain:
+            for brand_id in self._skeletons.get(label_skeleton, ()):
+                brand = self.brands[brand_id]
+                if brand not in matches or matches[brand].kind != 'exact':
+                    matches[brand] = TyposquatMatch(brand, 0, 'homoglyph')
+
+        return sorted(matches.values(), key=lambda match: (match.distance, match.brand))
+
+def load_brands(path: str) -> List[str]:
+    """One brand or domain label per line; blank lines and # comments skipped"""
+    brands = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                brands.append(line)
+    return brands
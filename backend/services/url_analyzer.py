@@ -1,61 +1,59 @@
-import requests
-import tldextract
-from urllib.parse import urlparse, parse_qs
+import asyncio
+from urllib.parse import urlparse
 import ssl
-import socket
 from datetime import datetime
-import re
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
+from services.http_client import http_clients
+from services.probes import Probe, ProbeError, run_probes, probe_timeout
+from services.rulepack import RulePack, rule_packs
+from services.features import extract_features
+from services.url_utils import ensure_scheme
+from services.logs import get_logger
+from services.metrics import instrument
+
+log = get_logger('url_analyzer')
 
 class URLAnalyzer:
     def __init__(self):
         self.virustotal_api_key = os.getenv("VIRUSTOTAL_API_KEY")
-        self.url_shorteners = [
-            'bit.ly', 'tinyurl.com', 'goo.gl', 't.co', 'short.link',
-            'ow.ly', 'buff.ly', 'is.gd', 'tiny.cc', 'rebrand.ly'
-        ]
-        self.suspicious_patterns = [
-            r'urgent',
-            r'click.*now',
-            r'limited.*time',
-            r'verify.*account',
-            r'suspend.*account',
-            r'confirm.*identity',
-            r'update.*payment',
-            r'free.*gift',
-            r'congratulations',
-            r'winner',
-            r'claim.*prize'
-        ]
-    
-    async def analyze_url(self, url: str) -> Dict:
-        """Comprehensive URL analysis"""
+        # Loading the CA bundle is slow, so build the context once
+        self.ssl_context = ssl.create_default_context()
+
+    async def analyze_url(self, url: str, ssl_info: Optional[Dict] = None,
+                          vt_result: Optional[Dict] = None, pack: Optional[RulePack] = None,
+                          lexical: Optional[Dict] = None) -> Dict:
+        """Comprehensive URL analysis
+
+        ``ssl_info`` and ``vt_result`` may be passed in from the verdict cache,
+        in which case the corresponding network probe is skipped. ``pack`` is
+        the rule pack to apply (the active one by default). ``lexical`` is a
+        FeatureBatch record the batch endpoints extracted beforehand.
+        """
+        pack = pack or rule_packs.current
         try:
             # Ensure URL has scheme
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-            
-            analysis = {
-                'original_url': url,
-                'domain_info': self._analyze_domain(url),
-                'ssl_info': self._check_ssl(url),
-                'suspicious_patterns': self._check_suspicious_patterns(url),
-                'is_shortened': self._is_shortened_url(url),
-                'virustotal_detections': 0,
-                'domain_age_days': 365,  # Default
-                'has_ssl': True  # Default
-            }
+            url = ensure_scheme(url)
+            analysis = self.lexical_analysis(url, pack, lexical)
             
-            # VirusTotal analysis
-            vt_result = await self._check_virustotal(url)
-            analysis['virustotal_detections'] = vt_result.get('detections', 0)
-            analysis['virustotal_details'] = vt_result.get('details', {})
+            # VirusTotal and SSL checks run concurrently
+            pending = {}
+            if vt_result is None:
+                pending['virustotal'] = self.probe('virustotal', url)
+            if ssl_info is None:
+                pending['ssl'] = self.probe('ssl', url)
+            probes = await run_probes(pending)
             
-            # SSL check
-            ssl_info = self._check_ssl(url)
-            analysis['has_ssl'] = ssl_info.get('valid', False)
-            analysis['ssl_details'] = ssl_info
+            if vt_result is None:
+                vt_result = probes['virustotal']['result']
+            self.apply_probe(analysis, 'virustotal', vt_result)
+            if ssl_info is None:
+                ssl_info = probes['ssl']['result']
+            self.apply_probe(analysis, 'ssl', ssl_info)
+            analysis['probes'] = {
+                name: {'status': p['status'], 'elapsed_ms': p['elapsed_ms']}
+                for name, p in probes.items()
+            }
             
             return analysis
             
@@ -69,29 +67,63 @@ class URLAnalyzer:
                 'has_ssl': False
             }
     
-    def _analyze_domain(self, url: str) -> Dict:
-        """Analyze domain characteristics"""
-        try:
-            parsed = urlparse(url)
-            extracted = tldextract.extract(url)
-            
-            return {
-                'domain': extracted.domain,
-                'suffix': extracted.suffix,
-                'subdomain': extracted.subdomain,
-                'full_domain': f"{extracted.domain}.{extracted.suffix}",
-                'path': parsed.path,
-                'query_params': parse_qs(parsed.query),
-                'scheme': parsed.scheme,
-                'port': parsed.port,
-                'suspicious_subdomain': self._check_suspicious_subdomain(extracted.subdomain),
-                'typosquatting_score': self._calculate_typosquatting_score(extracted.domain)
-            }
-        except Exception as e:
-            return {'error': str(e)}
+    @instrument('url_analyzer', 'lexical')
+    def lexical_analysis(self, url: str, pack: RulePack, lexical: Optional[Dict] = None) -> Dict:
+        """URL analysis from the lexical checks alone, network fields at their defaults"""
+        # Lexical checks and features: a batch of one unless precomputed
+        if lexical is None or lexical.get('rule_pack_version') != pack.version:
+            lexical = extract_features([url], pack).record(0)
+        
+        return {
+            'original_url': url,
+            'domain_info': lexical['domain_info'],
+            'suspicious_patterns': lexical['suspicious_patterns'],
+            'is_shortened': lexical['is_shortened'],
+            'virustotal_detections': 0,
+            'domain_age_days': 365,  # Default
+            'has_ssl': True,  # Default
+            'lexical_features': lexical['lexical_features'],
+            'rule_pack_version': pack.version
+        }
+    
+    def probe(self, name: str, url: str) -> Probe:
+        """The 'ssl' or 'virustotal' network check for ``url``"""
+        if name == 'virustotal':
+            return Probe(
+                self._check_virustotal(url),
+                timeout=probe_timeout('virustotal'),
+                default={'detections': 0, 'details': {}}
+            )
+        if name == 'ssl':
+            return Probe(
+                self._check_ssl(url),
+                timeout=probe_timeout('ssl'),
+                default={'valid': False, 'error': 'SSL check timed out'}
+            )
+        raise ValueError(f"Unknown probe: {name}")
     
-    def _check_ssl(self, url: str) -> Dict:
-        """Check SSL certificate validity"""
+    @staticmethod
+    def apply_probe(analysis: Dict, name: str, result: Dict):
+        """Copy a probe result (fresh or cached) into the analysis fields"""
+        if name == 'virustotal':
+            analysis['virustotal_detections'] = result.get('detections', 0)
+            analysis['virustotal_details'] = result.get('details', {})
+        elif name == 'ssl':
+            # One handshake feeds both fields
+            analysis['ssl_info'] = result
+            analysis['has_ssl'] = result.get('valid', False)
+            analysis['ssl_details'] = result
+    
+    @instrument('url_analyzer', 'tls_probe')
+    async def _check_ssl(self, url: str) -> Dict:
+        """Check SSL certificate validity with a single async TLS handshake
+
+        A handshake the server completes but whose certificate does not
+        verify is an answer ({'valid': False}); not reaching the server at
+        all (DNS, refused connection) raises ProbeError. The deadline is the
+        probe's (PROBE_TIMEOUT_SSL).
+        """
+        writer = None
         try:
             parsed = urlparse(url)
             hostname = parsed.hostname
@@ -100,12 +132,13 @@ class URLAnalyzer:
             if parsed.scheme != 'https':
                 return {'valid': False, 'reason': 'Not HTTPS'}
             
-            context = ssl.create_default_context()
-            sock = socket.create_connection((hostname, port), timeout=10)
-            ssock = context.wrap_socket(sock, server_hostname=hostname)
+            _, writer = await asyncio.open_connection(
+                hostname, port,
+                ssl=self.ssl_context,
+                server_hostname=hostname
+            )
             
-            cert = ssock.getpeercert()
-            ssock.close()
+            cert = writer.get_extra_info('peercert')
             
             return {
                 'valid': True,
@@ -115,87 +148,23 @@ class URLAnalyzer:
                 'not_before': cert['notBefore']
             }
             
-        except Exception as e:
+        except ssl.SSLError as e:
+            # Certificate or protocol rejected during the handshake
             return {'valid': False, 'error': str(e)}
+        except (OSError, ValueError) as e:
+            raise ProbeError(str(e), kind=type(e).__name__, result={'valid': False, 'error': str(e)}) from e
+        finally:
+            if writer is not None:
+                writer.close()
     
-    def _check_suspicious_patterns(self, url: str) -> List[str]:
-        """Check for suspicious patterns in URL"""
-        suspicious_found = []
-        url_lower = url.lower()
-        
-        for pattern in self.suspicious_patterns:
-            if re.search(pattern, url_lower):
-                suspicious_found.append(pattern)
-        
-        # Check for excessive subdomains
-        parsed = urlparse(url)
-        if parsed.hostname:
-            subdomain_count = len(parsed.hostname.split('.')) - 2
-            if subdomain_count > 3:
-                suspicious_found.append('excessive_subdomains')
-        
-        # Check for suspicious TLDs
-        suspicious_tlds = ['.tk', '.ml', '.ga', '.cf', '.cc']
-        for tld in suspicious_tlds:
-            if url_lower.endswith(tld):
-                suspicious_found.append(f'suspicious_tld_{tld}')
-        
-        return suspicious_found
-    
-    def _is_shortened_url(self, url: str) -> bool:
-        """Check if URL is shortened"""
-        parsed = urlparse(url)
-        return any(shortener in parsed.netloc for shortener in self.url_shorteners)
-    
-    def _check_suspicious_subdomain(self, subdomain: str) -> bool:
-        """Check if subdomain looks suspicious"""
-        if not subdomain:
-            return False
-        
-        # Check for random-looking subdomains
-        if len(subdomain) > 8 and subdomain.isalnum():
-            return True
-        
-        # Check for security-related terms
-        security_terms = ['secure', 'login', 'account', 'verify', 'update']
-        return any(term in subdomain.lower() for term in security_terms)
-    
-    def _calculate_typosquatting_score(self, domain: str) -> int:
-        """Calculate likelihood of typosquatting"""
-        popular_domains = [
-            'google', 'facebook', 'amazon', 'microsoft', 'apple',
-            'paypal', 'ebay', 'twitter', 'instagram', 'linkedin'
-        ]
-        
-        score = 0
-        for popular in popular_domains:
-            if self._levenshtein_distance(domain.lower(), popular) <= 2:
-                score += 50
-        
-        return min(score, 100)
-    
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """Calculate Levenshtein distance between two strings"""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
-    
+    @instrument('url_analyzer', 'virustotal')
     async def _check_virustotal(self, url: str) -> Dict:
-        """Check URL with VirusTotal API"""
+        """Check URL with VirusTotal API
+
+        Anything but a 200 report (204 and 429 are VirusTotal's quota
+        responses) raises ProbeError, so a failed lookup is never taken, or
+        cached, as a clean URL.
+        """
         if not self.virustotal_api_key:
             return {'detections': 0, 'details': {}}
         
@@ -207,7 +176,7 @@ class URLAnalyzer:
                 'resource': url
             }
             
-            response = requests.get(vt_url, params=params, timeout=10)
+            response = await http_clients.api.get(vt_url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -217,6 +186,8 @@ class URLAnalyzer:
                     'details': data
                 }
         except Exception as e:
-            print(f"VirusTotal API error: {e}")
+            log.warning("VirusTotal API error", extra={'error': str(e)})
+            raise ProbeError(f"VirusTotal API error: {e}", kind=type(e).__name__) from e
         
-        return {'detections': 0, 'details': {}}
\ No newline at end of file
+        log.warning("VirusTotal API error", extra={'status': response.status_code})
+        raise ProbeError(f"VirusTotal returned HTTP {response.status_code}", kind=f"http_{response.status_code}")
\ No newline at end of file
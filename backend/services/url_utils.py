@@ -0,0 +1,69 @@
+import hashlib
+import re
+from urllib.parse import urlsplit, urlunsplit
+from services.suffixes import suffixes
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def ensure_scheme(url: str) -> str:
+    """Add https:// to bare hosts, as URLAnalyzer does"""
+    url = url.strip()
+    if not re.match(r'^https?://', url, re.IGNORECASE):
+        url = 'https://' + url
+    return url
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL used as a cache/coalescing key.
+
+    Lowercases scheme and host, drops default ports, trailing dots on the
+    host and the fragment, and gives an empty path a single '/'.
+    """
+    url = ensure_scheme(url)
+    try:
+        parsed = urlsplit(url)
+        scheme = parsed.scheme.lower()
+        host = (parsed.hostname or '').rstrip('.')
+        port = parsed.port
+    except ValueError:
+        return url
+
+    # hostname strips the brackets of an IPv6 literal; the netloc needs them
+    netloc = f"[{host}]" if ':' in host else host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    if '@' in parsed.netloc:
+        netloc = parsed.netloc.rsplit('@', 1)[0] + '@' + netloc
+
+    return urlunsplit((scheme, netloc, parsed.path or '/', parsed.query, ''))
+
+def url_hash(url: str) -> str:
+    """Stable hash of the normalized URL (used as the Mongo lookup key)"""
+    return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+
+def url_host(url: str) -> str:
+    """Lowercased hostname of a URL ('' if it has none)"""
+    try:
+        return (urlsplit(ensure_scheme(url)).hostname or '').rstrip('.')
+    except ValueError:
+        return ''
+
+def url_origin(url: str) -> str:
+    """``scheme://host:port`` of a URL with the port always spelled out
+    ('' if it has no host); the TLS facts of a server are per origin"""
+    try:
+        parsed = urlsplit(ensure_scheme(url))
+        scheme = parsed.scheme.lower()
+        host = (parsed.hostname or '').rstrip('.')
+        port = parsed.port or DEFAULT_PORTS.get(scheme)
+    except ValueError:
+        return ''
+    if not host:
+        return ''
+    return f"{scheme}://{f'[{host}]' if ':' in host else host}:{port}"
+
+def registrable_domain(url: str) -> str:
+    """Registrable domain (e.g. example.co.uk) of a URL"""
+    extracted = suffixes.extract(ensure_scheme(url))
+    if not extracted.suffix:
+        return extracted.domain
+    return f"{extracted.domain}.{extracted.suffix}"
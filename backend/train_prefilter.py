@@ -0,0 +1,200 @@
+"""Train the lexical pre-filter from stored analyses.
+
+    python train_prefilter.py                      # from the Mongo analyses collection
+    python train_prefilter.py --jsonl results.jsonl  # from scan.py output
+    python train_prefilter.py --max-error 0.005 -o models/prefilter.json
+
+Labels come from full-pipeline verdicts: HIGH risk is a scam, LOW risk is
+benign, MEDIUM is left out unless --medium says otherwise. Analyses the
+pre-filter itself decided are skipped so the model never learns from its own
+output. Features are recomputed from each URL with the current rule pack.
+The two thresholds are picked on a held-out split so that at most
+--max-error of the URLs decided on either side are wrong; the report shows
+what fraction of page fetches and LLM calls that would have saved.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+from dotenv import load_dotenv
+import pathlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv(dotenv_path=pathlib.Path(__file__).parent / ".env")
+
+from services.features import FEATURE_NAMES, extract_features
+from services.prefilter import DEFAULT_MODEL_PATH, PrefilterModel
+from services.rulepack import rule_packs
+
+LABELS = {'HIGH': 1, 'LOW': 0}
+
+def label_for(record: dict, medium: str):
+    if ((record.get('details') or {}).get('ai_analysis') or {}).get('skipped'):
+        return None  # decided by the pre-filter, not by the full analysis
+    risk = record.get('risk_level')
+    if risk == 'MEDIUM':
+        return {'scam': 1, 'benign': 0}.get(medium)
+    return LABELS.get(risk)
+
+def load_jsonl(path: str, medium: str):
+    urls, labels = [], []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            label = label_for(record, medium)
+            if label is not None and record.get('url'):
+                urls.append(record['url'])
+                labels.append(label)
+    return urls, labels
+
+async def load_mongo(medium: str, limit: int):
+    from services.db import db
+    projection = {'url': 1, 'risk_level': 1, 'details.ai_analysis.skipped': 1}
+    cursor = db['analyses'].find({'risk_level': {'$in': ['HIGH', 'LOW', 'MEDIUM']}}, projection)
+    if limit:
+        cursor = cursor.limit(limit)
+    urls, labels, seen = [], [], set()
+    async for record in cursor:
+        label = label_for(record, medium)
+        if label is not None and record.get('url') and record['url'] not in seen:
+            seen.add(record['url'])
+            urls.append(record['url'])
+            labels.append(label)
+    return urls, labels
+
+def fit_logistic(x: np.ndarray, y: np.ndarray, l2: float, iterations: int = 25):
+    """L2-regularized logistic regression by Newton's method, classes balanced"""
+    weights_per_class = len(y) / (2.0 * np.bincount(y, minlength=2).clip(min=1))
+    sample_weight = weights_per_class[y]
+    design = np.hstack([x, np.ones((len(x), 1))])
+    beta = np.zeros(design.shape[1])
+    penalty = np.full(design.shape[1], l2)
+    penalty[-1] = 0.0  # no penalty on the bias
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-design @ beta))
+        gradient = design.T @ (sample_weight * (p - y)) + penalty * beta
+        hessian = (design * (sample_weight * p * (1 - p))[:, None]).T @ design + np.diag(penalty)
+        step = np.linalg.solve(hessian + 1e-9 * np.eye(len(beta)), gradient)
+        beta -= step
+        if np.abs(step).max() < 1e-8:
+            break
+    return beta[:-1], beta[-1]
+
+def pick_thresholds(p: np.ndarray, y: np.ndarray, max_error: float):
+    """Widest (low, high) band edges whose decided sides stay within max_error"""
+    order = np.argsort(p)
+    p_sorted, y_sorted = p[order], y[order]
+    n = len(p)
+
+    # Benign side: the first k URLs by probability, scams among them <= max_error
+    scams_below = np.cumsum(y_sorted)
+    k_ok = [k for k in range(1, n + 1) if scams_below[k - 1] <= max_error * k]
+    low = 0.0
+    if k_ok:
+        k = max(k_ok)
+        low = float(p_sorted[k]) if k < n else float(p_sorted[-1]) + 1e-9
+
+    # Scam side: the last k URLs, benign among them <= max_error
+    benign_above = np.cumsum((1 - y_sorted)[::-1])
+    k_ok = [k for k in range(1, n + 1) if benign_above[k - 1] <= max_error * k]
+    high = 1.0 + 1e-9
+    if k_ok:
+        high = float(p_sorted[n - max(k_ok)])
+
+    # A decision never goes against the model's own 0.5 boundary
+    return min(low, 0.5), max(high, 0.5)
+
+def auc(p: np.ndarray, y: np.ndarray) -> float:
+    ranks = np.empty(len(p))
+    ranks[np.argsort(p)] = np.arange(1, len(p) + 1)
+    positives = y.sum()
+    negatives = len(y) - positives
+    if not positives or not negatives:
+        return float('nan')
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+def report(model: PrefilterModel, matrix: np.ndarray, y: np.ndarray) -> dict:
+    p = model.predict_proba(matrix)
+    benign = p < model.low
+    scam = p >= model.high
+    decided = benign | scam
+    return {
+        'samples': int(len(y)),
+        'auc': round(auc(p, y), 4),
+        'accuracy_at_0.5': round(float(((p >= 0.5) == y).mean()), 4),
+        'decided_ratio': round(float(decided.mean()), 4),
+        'decided_benign': int(benign.sum()),
+        'decided_scam': int(scam.sum()),
+        'errors_among_decided': int((benign & (y == 1)).sum() + (scam & (y == 0)).sum())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the lexical pre-filter")
+    parser.add_argument('--jsonl', help="train from a scan.py output file instead of Mongo")
+    parser.add_argument('-o', '--output', default=str(DEFAULT_MODEL_PATH))
+    parser.add_argument('--medium', choices=['skip', 'scam', 'benign'], default='skip',
+                        help="how to label MEDIUM-risk verdicts")
+    parser.add_argument('--max-error', type=float, default=0.01,
+                        help="allowed error rate on each decided side")
+    parser.add_argument('--l2', type=float, default=1.0)
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--limit', type=int, default=0, help="max Mongo documents (0 = all)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.jsonl:
+        urls, labels = load_jsonl(args.jsonl, args.medium)
+    else:
+        urls, labels = asyncio.run(load_mongo(args.medium, args.limit))
+    y = np.asarray(labels, dtype=np.int64)
+    if len(y) < 20 or y.min() == y.max():
+        sys.exit(f"Need at least 20 labelled analyses of both classes, got {len(y)} "
+                 f"({int(y.sum()) if len(y) else 0} scam)")
+
+    pack = rule_packs.current
+    started = time.perf_counter()
+    matrix = extract_features(urls, pack).matrix.astype(np.float64)
+    print(f"Extracted features for {len(urls)} URLs in {time.perf_counter() - started:.1f}s")
+
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(y))
+    split = int(len(y) * (1 - args.holdout))
+    train, test = order[:split], order[split:]
+
+    mean = matrix[train].mean(axis=0)
+    scale = matrix[train].std(axis=0)
+    scale[scale == 0] = 1.0
+    weights, bias = fit_logistic((matrix[train] - mean) / scale, y[train], args.l2)
+
+    model = PrefilterModel({
+        'version': time.strftime('%Y%m%d%H%M%S'),
+        'feature_names': list(FEATURE_NAMES),
+        'mean': mean.tolist(),
+        'scale': scale.tolist(),
+        'weights': weights.tolist(),
+        'bias': float(bias),
+        'low': 0.0,
+        'high': 1.0,
+        'rule_pack_version': pack.version
+    })
+    model.low, model.high = pick_thresholds(model.predict_proba(matrix[test]), y[test], args.max_error)
+    metrics = {'train': report(model, matrix[train], y[train]), 'holdout': report(model, matrix[test], y[test])}
+    model.spec.update(low=model.low, high=model.high, trained_on=len(y), metrics=metrics)
+    model.save(args.output)
+
+    holdout = metrics['holdout']
+    print(json.dumps(metrics, indent=2))
+    print(f"Thresholds: benign < {model.low:.4f}, scam >= {model.high:.4f}")
+    print(f"On the holdout the pre-filter decides {holdout['decided_ratio']:.1%} of URLs "
+          f"({holdout['errors_among_decided']} wrong): that share of page fetches and LLM calls is saved.")
+    print(f"Model written to {args.output}")
+
+if __name__ == "__main__":
+    main()